@@ -1,16 +1,24 @@
 """
 缓存管理模块
-提供内存缓存和可选的Redis缓存支持
+提供两级缓存：进程内存缓存（L1）和可选的Redis共享缓存（L2），
+以及可选的磁盘持久化层（进程重启后仍可命中）。
+L2中的值紧凑序列化并压缩，多个服务副本之间通过Redis发布/订阅同步失效
 """
 
+import asyncio
+import inspect
 import json
+import sys
+import threading
 import time
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
-from functools import wraps
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from functools import partial, wraps
 import hashlib
-import logging
 
+from .disk_cache import DiskCache
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -24,12 +32,333 @@ except ImportError:
     HAS_REDIS = False
     redis = None
 
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
+# 尝试导入orjson（可选，更快更紧凑的JSON序列化）
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None
+
+# 尝试导入zstd/lz4压缩（可选，缺失时使用zlib）
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+    lz4_frame = None
+
+# L2值格式：魔数 + 序列化方式 + 压缩方式 + 数据
+_PAYLOAD_MAGIC = b"\xcc"
+_CODEC_JSON = b"j"
+_CODEC_ORJSON = b"o"
+_COMP_NONE = b"n"
+_COMP_ZLIB = b"z"
+_COMP_ZSTD = b"s"
+_COMP_LZ4 = b"l"
+
+# SCAN每批返回的键数
+_SCAN_BATCH = 500
+
+# 创建异步客户端时从同步客户端复制的连接参数
+_ASYNC_CLIENT_FIELDS = (
+    "host",
+    "port",
+    "db",
+    "username",
+    "password",
+    "socket_timeout",
+    "socket_connect_timeout",
+    "client_name",
+)
+
+# 默认的失效通知频道
+DEFAULT_INVALIDATION_CHANNEL = "geodata:cache:invalidate"
+
+
+def _serialize(obj: Any) -> Tuple[bytes, bytes]:
+    """序列化为JSON字节（优先orjson），返回 (序列化方式, 数据)"""
+    if HAS_ORJSON:
+        try:
+            return _CODEC_ORJSON, orjson.dumps(
+                obj, default=str, option=orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            pass  # orjson不支持的类型（如超大整数）回退到json
+    return _CODEC_JSON, json.dumps(obj, default=str, ensure_ascii=False).encode()
+
+
+def _compress(data: bytes, min_bytes: int) -> Tuple[bytes, bytes]:
+    """压缩数据（优先zstd，其次lz4、zlib），小于min_bytes不压缩"""
+    if len(data) < min_bytes:
+        return _COMP_NONE, data
+    if HAS_ZSTD:
+        return _COMP_ZSTD, zstandard.ZstdCompressor(level=3).compress(data)
+    if HAS_LZ4:
+        return _COMP_LZ4, lz4_frame.compress(data)
+    return _COMP_ZLIB, zlib.compress(data, 1)
+
+
+def encode_value(
+    value: Any, expires_at: float, refresh_at: float, compress_min_bytes: int = 1024
+) -> bytes:
+    """
+    编码L2缓存值
+
+    Args:
+        value: 缓存值
+        expires_at: 硬过期时间（Unix时间戳）
+        refresh_at: 软过期时间（Unix时间戳）
+        compress_min_bytes: 超过该大小才压缩
+
+    Returns:
+        编码后的字节
+    """
+    codec, data = _serialize({"v": value, "e": expires_at, "r": refresh_at})
+    comp, data = _compress(data, compress_min_bytes)
+    return _PAYLOAD_MAGIC + codec + comp + data
+
+
+def decode_value(raw: Any) -> Tuple[Any, Optional[float], Optional[float]]:
+    """
+    解码L2缓存值
+
+    Args:
+        raw: Redis返回的原始值
+
+    Returns:
+        (缓存值, 硬过期时间, 软过期时间)，旧格式的值过期时间为None
+    """
+    if isinstance(raw, str) or not raw.startswith(_PAYLOAD_MAGIC):
+        # 旧格式：未压缩的JSON文本
+        return json.loads(raw), None, None
+
+    comp = raw[2:3]
+    data = raw[3:]
+    if comp == _COMP_ZSTD:
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif comp == _COMP_LZ4:
+        data = lz4_frame.decompress(data)
+    elif comp == _COMP_ZLIB:
+        data = zlib.decompress(data)
+
+    payload = orjson.loads(data) if HAS_ORJSON else json.loads(data)
+    return payload["v"], payload["e"], payload["r"]
+
+
+def _approximate_size(value: Any) -> int:
+    """
+    估算缓存值占用的内存（字节）
+
+    递归累加容器及其元素的 sys.getsizeof，用于内存缓存的容量控制。
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += _approximate_size(k) + _approximate_size(v)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _approximate_size(item)
+    return size
+
+
+# 数据库配置中参与标识的字段（不含密码）
+_DSN_FIELDS = ("host", "port", "database", "user", "schema")
+
+
+def dsn_fingerprint(database_config: Optional[Dict[str, Any]]) -> str:
+    """
+    数据库配置指纹（主机、端口、库名、用户、schema），不包含密码
+
+    同一数据库的不同配置字典（如密码不同或字段顺序不同）得到相同指纹。
+
+    Args:
+        database_config: 数据库配置
+
+    Returns:
+        指纹字符串
+    """
+    config = database_config or {}
+    ident = "\x1f".join(str(config.get(field, "")) for field in _DSN_FIELDS)
+    return "dsn:" + hashlib.blake2b(ident.encode(), digest_size=8).hexdigest()
+
+
+def _canonical_argument(name: str, value: Any) -> Any:
+    """
+    规范化命名参数：database_config 参数替换为指纹，其他参数见 _canonical
+    """
+    if name == "database_config" and isinstance(value, dict):
+        return dsn_fingerprint(value)
+    return _canonical(value)
+
+
+def _canonical(value: Any) -> Any:
+    """
+    将参数转换为可哈希、与顺序无关的规范形式
+
+    字典按键排序（保留全部键），列表转为元组。
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, float)):
+        return (type(value).__name__, value)  # 避免True与1、1.0与1相等
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dict):
+        return (
+            "d",
+            tuple(sorted(((str(k), _canonical(v)) for k, v in value.items()))),
+        )
+    if isinstance(value, (list, tuple)):
+        return ("l", tuple(_canonical(v) for v in value))
+    if isinstance(value, (set, frozenset)):
+        return ("s", tuple(sorted(repr(_canonical(v)) for v in value)))
+    return ("r", repr(value))
+
+
+class _CacheEntry:
+    """内存缓存条目"""
+
+    __slots__ = ("value", "expires_at", "refresh_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, refresh_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.refresh_at = refresh_at
+        self.size = size
+
+
+class _Call:
+    """同步调用的共享结果"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    相同请求合并执行（single-flight）
+
+    同一键的并发调用中只有第一个真正执行，其余调用等待并共享其结果或异常，
+    避免缓存过期瞬间多个相同查询同时打到数据库。
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Tuple[int, str], "asyncio.Task"] = {}
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        合并执行异步调用
+
+        共享任务独立于调用方运行，某个调用方被取消不会中断其他等待者。
+
+        Args:
+            key: 请求键
+            factory: 返回协程的无参函数，仅在没有进行中的相同请求时调用
+
+        Returns:
+            调用结果
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = loop.create_task(factory())
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda t: self._task_done(task_key, t))
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _task_done(self, task_key: Tuple[int, str], task: "asyncio.Task") -> None:
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+        if not task.cancelled():
+            task.exception()  # 标记异常已读取，避免所有等待者都取消时告警
+
+    def do_sync(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        合并执行同步调用（多线程）
+
+        Args:
+            key: 请求键
+            func: 无参函数，仅在没有进行中的相同请求时调用
+
+        Returns:
+            调用结果
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+            return call.result
+
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        """进行中的请求数"""
+        with self._lock:
+            return len(self._tasks) + len(self._calls)
+
 
 class CacheManager:
     """缓存管理器"""
 
     def __init__(
-        self, use_redis: bool = False, redis_client=None, default_ttl: int = 300
+        self,
+        use_redis: bool = False,
+        redis_client=None,
+        default_ttl: int = 300,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60.0,
+        compress_min_bytes: int = 1024,
+        invalidation_channel: Optional[str] = DEFAULT_INVALIDATION_CHANNEL,
+        async_redis_client=None,
+        disk_cache_dir: Optional[str] = None,
+        disk_cache_max_bytes: int = 256 * 1024 * 1024,
     ):
         """
         初始化缓存管理器
@@ -38,13 +367,64 @@ class CacheManager:
             use_redis: 是否使用Redis缓存（需要安装redis库）
             redis_client: Redis客户端实例（可选）
             default_ttl: 默认缓存过期时间（秒），默认300秒（5分钟）
+            max_entries: 内存缓存最大条目数，超出时按LRU淘汰
+            max_bytes: 内存缓存最大占用（字节，按结果大小估算），超出时按LRU淘汰
+            sweep_interval: 后台清理过期条目的间隔（秒），0表示不启用后台清理
+            compress_min_bytes: Redis中超过该大小（字节）的值压缩存储
+            invalidation_channel: Redis失效通知频道，None表示不在副本间同步失效
+            async_redis_client: redis.asyncio客户端实例（可选），异步调用方使用，
+                不提供时按同步客户端的连接参数创建，无法创建时在线程池中执行
+            disk_cache_dir: 磁盘缓存目录（可选），persist=True写入的值同时保存到
+                该目录下的SQLite文件，进程重启后仍可命中
+            disk_cache_max_bytes: 磁盘缓存总大小上限（字节）
         """
         self.use_redis = use_redis and HAS_REDIS
         self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.invalidation_channel = invalidation_channel
+        self.instance_id = uuid.uuid4().hex
 
-        # 内存缓存
-        self._memory_cache: Dict[str, Dict[str, Any]] = {}
-        self._cache_ttl: Dict[str, datetime] = {}
+        # 内存缓存（LRU顺序：最近使用的在末尾）
+        self._memory_cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._l2_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._invalidations_received = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._stale_hits = 0
+        self._refreshes = 0
+
+        # 相同请求合并执行
+        self.single_flight = SingleFlight()
+
+        # 正在后台刷新的键（stale-while-revalidate）
+        self._refreshing: set = set()
+        self._refresh_tasks: set = set()
+
+        # 磁盘持久化层
+        self.disk: Optional[DiskCache] = None
+        if disk_cache_dir:
+            try:
+                self.disk = DiskCache(disk_cache_dir, max_bytes=disk_cache_max_bytes)
+                logger.info(f"磁盘缓存已启用: {self.disk.path}")
+            except Exception as e:
+                logger.warning(f"磁盘缓存初始化失败，不使用磁盘缓存: {e}")
+
+        # 后台清理过期条目
+        self._sweep_interval = sweep_interval
+        self._closed = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval > 0:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, name="cache-sweeper", daemon=True
+            )
+            self._sweeper.start()
 
         # Redis客户端
         if self.use_redis:
@@ -52,11 +432,11 @@ class CacheManager:
                 self.redis = redis_client
             else:
                 try:
+                    # L2值为二进制（压缩），不能使用decode_responses
                     self.redis = redis.Redis(
                         host="localhost",
                         port=6379,
                         db=0,
-                        decode_responses=True,
                     )
                     # 测试连接
                     self.redis.ping()
@@ -70,6 +450,20 @@ class CacheManager:
             if use_redis:
                 logger.warning("Redis库未安装，使用内存缓存。安装: pip install redis")
 
+        # 异步客户端（异步调用方不阻塞事件循环）
+        self.async_redis = None
+        self._async_loop = None
+        if self.redis is not None:
+            self.async_redis = async_redis_client or self._create_async_client()
+
+        # 订阅其他副本的失效通知
+        self._listener: Optional[threading.Thread] = None
+        if self.use_redis and self.redis is not None and invalidation_channel:
+            self._listener = threading.Thread(
+                target=self._invalidation_loop, name="cache-invalidation", daemon=True
+            )
+            self._listener.start()
+
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """
         生成缓存键
@@ -82,15 +476,63 @@ class CacheManager:
         Returns:
             缓存键字符串
         """
-        # 将参数序列化为字符串
-        key_data = {
-            "args": args,
-            "kwargs": sorted(kwargs.items()),
-        }
-        key_str = json.dumps(key_data, sort_keys=True, default=str)
-        key_hash = hashlib.md5(key_str.encode()).hexdigest()
+        # 规范化参数（database_config 替换为不含密码的指纹）
+        canonical = (
+            _canonical(args),
+            tuple(sorted((k, _canonical_argument(k, v)) for k, v in kwargs.items())),
+        )
+        key_hash = hashlib.blake2b(repr(canonical).encode(), digest_size=16).hexdigest()
         return f"{prefix}:{key_hash}"
 
+    def _create_async_client(self):
+        """按同步客户端的连接参数创建redis.asyncio客户端"""
+        if redis_asyncio is None:
+            return None
+        try:
+            source = self.redis.connection_pool.connection_kwargs
+            kwargs = {k: source[k] for k in _ASYNC_CLIENT_FIELDS if k in source}
+            if "path" in source:
+                kwargs["unix_socket_path"] = source["path"]
+            return redis_asyncio.Redis(**kwargs)
+        except Exception as e:
+            logger.debug(f"无法创建异步Redis客户端，异步调用将在线程池中执行: {e}")
+            return None
+
+    def _async_client(self):
+        """返回可在当前事件循环使用的异步客户端，不可用时返回None"""
+        if self.async_redis is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._async_loop is None:
+            self._async_loop = loop
+        # 异步客户端的连接绑定在首次使用的事件循环上
+        return self.async_redis if self._async_loop is loop else None
+
+    async def _run_sync(self, func, *args, **kwargs):
+        """在线程池中执行同步调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+    async def _l2(self, async_call, sync_func, *args):
+        """
+        执行一次L2操作：优先使用异步客户端，不可用时在线程池中执行同步版本
+
+        异步客户端连接失败（而同步客户端可用）时不再使用异步客户端。
+
+        Args:
+            async_call: 接收异步客户端、返回协程的函数
+            sync_func: 同步版本
+            *args: 同步版本的参数
+        """
+        client = self._async_client()
+        if client is not None:
+            try:
+                return await async_call(client)
+            except redis.ConnectionError as e:
+                logger.warning(f"异步Redis连接失败，改为在线程池中访问Redis: {e}")
+                self.async_redis = None
+        return await self._run_sync(sync_func, *args)
+
     def get(self, key: str) -> Optional[Any]:
         """
         获取缓存值
@@ -101,31 +543,192 @@ class CacheManager:
         Returns:
             缓存值，如果不存在或已过期则返回None
         """
+        return self.get_with_state(key)[0]
+
+    def get_with_state(self, key: str) -> Tuple[Optional[Any], bool]:
+        """
+        获取缓存值及其是否需要刷新
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            (缓存值, 是否已超过软过期时间)，不存在或已过期时返回 (None, False)
+        """
+        hit = self._get_memory(key)
+        if hit is not None:
+            return hit
+
         if self.use_redis and self.redis:
             try:
                 cached = self.redis.get(key)
                 if cached:
-                    return json.loads(cached)
+                    return self._accept_l2(key, cached)
             except Exception as e:
                 logger.warning(f"从Redis获取缓存失败: {e}")
-                # 回退到内存缓存
 
-        # 内存缓存
-        if key in self._memory_cache:
-            # 检查是否过期
-            if key in self._cache_ttl:
-                if datetime.now() < self._cache_ttl[key]:
-                    return self._memory_cache[key]
-                else:
-                    # 缓存过期，删除
-                    del self._memory_cache[key]
-                    del self._cache_ttl[key]
+        if self.disk is not None:
+            hit = self._get_disk(key)
+            if hit is not None:
+                return hit
+
+        return self._miss()
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get的异步版本，Redis访问不阻塞事件循环"""
+        return (await self.aget_with_state(key))[0]
+
+    async def aget_with_state(self, key: str) -> Tuple[Optional[Any], bool]:
+        """get_with_state的异步版本，Redis访问不阻塞事件循环"""
+        hit = self._get_memory(key)
+        if hit is not None:
+            return hit
+
+        if self.use_redis and self.redis:
+            try:
+                cached = await self._l2(lambda c: c.get(key), self.redis.get, key)
+                if cached:
+                    return self._accept_l2(key, cached)
+            except Exception as e:
+                logger.warning(f"从Redis获取缓存失败: {e}")
+
+        if self.disk is not None:
+            hit = await self._run_sync(self._get_disk, key)
+            if hit is not None:
+                return hit
+
+        return self._miss()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        批量获取缓存值（L1未命中的键通过一次MGET从Redis读取，再查磁盘缓存）
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            {缓存键: 缓存值}，只包含命中的键
+        """
+        found, missing = self._get_many_memory(keys)
+        if missing and self.use_redis and self.redis:
+            try:
+                self._accept_l2_many(found, missing, self.redis.mget(missing))
+            except Exception as e:
+                logger.warning(f"从Redis批量获取缓存失败: {e}")
+        if missing and self.disk is not None:
+            self._get_many_disk(found, missing)
+        self._count_misses(len(missing) - sum(1 for k in missing if k in found))
+        return found
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """get_many的异步版本"""
+        found, missing = self._get_many_memory(keys)
+        if missing and self.use_redis and self.redis:
+            try:
+                values = await self._l2(
+                    lambda c: c.mget(missing), self.redis.mget, missing
+                )
+                self._accept_l2_many(found, missing, values)
+            except Exception as e:
+                logger.warning(f"从Redis批量获取缓存失败: {e}")
+        if missing and self.disk is not None:
+            await self._run_sync(self._get_many_disk, found, missing)
+        self._count_misses(len(missing) - sum(1 for k in missing if k in found))
+        return found
+
+    def _get_memory(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """查询L1，命中返回 (值, 是否需要刷新)，未命中返回None"""
+        with self._lock:
+            entry = self._memory_cache.get(key)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if now < entry.expires_at:
+                self._memory_cache.move_to_end(key)
+                self._hits += 1
+                stale = now >= entry.refresh_at
+                if stale:
+                    self._stale_hits += 1
+                return entry.value, stale
+            # 缓存过期，删除
+            self._remove_entry(key)
+            self._expirations += 1
+            return None
+
+    def _get_many_memory(self, keys: Iterable[str]) -> Tuple[Dict[str, Any], List[str]]:
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key in keys:
+            hit = self._get_memory(key)
+            if hit is not None:
+                found[key] = hit[0]
+            else:
+                missing.append(key)
+        return found, missing
+
+    def _get_disk(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """查询磁盘缓存，命中时回填L1并返回 (值, 是否需要刷新)"""
+        try:
+            raw = self.disk.get(key)
+        except Exception as e:
+            logger.warning(f"从磁盘缓存获取失败: {e}")
+            return None
+        if raw is None:
+            return None
+        return self._accept_l2(key, raw, disk=True)
+
+    def _get_many_disk(self, found: Dict[str, Any], keys: List[str]) -> None:
+        for key in keys:
+            if key not in found:
+                hit = self._get_disk(key)
+                if hit is not None:
+                    found[key] = hit[0]
+
+    def _accept_l2(self, key: str, raw: Any, disk: bool = False) -> Tuple[Any, bool]:
+        """解码L2（或磁盘缓存）命中的值并回填L1，返回 (值, 是否需要刷新)"""
+        value, expires_at, refresh_at = decode_value(raw)
+        now = time.time()
+        if expires_at is None:
+            expires_at = now + self.default_ttl
+        if refresh_at is None:
+            refresh_at = expires_at
+        stale = now >= refresh_at
+        # 回填L1，保持与L2相同的剩余有效期
+        self._set_memory(key, value, expires_at - now, max(refresh_at - now, 0))
+        with self._lock:
+            self._hits += 1
+            if disk:
+                self._disk_hits += 1
             else:
-                return self._memory_cache[key]
+                self._l2_hits += 1
+            if stale:
+                self._stale_hits += 1
+        return value, stale
 
-        return None
+    def _accept_l2_many(
+        self, found: Dict[str, Any], keys: List[str], values: List[Any]
+    ) -> None:
+        for key, raw in zip(keys, values):
+            if raw:
+                found[key] = self._accept_l2(key, raw)[0]
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def _miss(self) -> Tuple[None, bool]:
+        self._count_misses(1)
+        return None, False
+
+    def _count_misses(self, count: int) -> None:
+        if count:
+            with self._lock:
+                self._misses += count
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        refresh_after: Optional[float] = None,
+        persist: bool = False,
+    ) -> None:
         """
         设置缓存值
 
@@ -133,20 +736,267 @@ class CacheManager:
             key: 缓存键
             value: 缓存值
             ttl: 过期时间（秒），如果为None则使用默认TTL
+            refresh_after: 软过期时间（秒，可选），超过后仍返回旧值但需要后台刷新，
+                ttl为硬过期上限
+            persist: 是否同时写入磁盘缓存（配置了disk_cache_dir时有效）
         """
-        if ttl is None:
-            ttl = self.default_ttl
+        ttl, refresh_after = self._normalize_ttl(ttl, refresh_after)
 
         if self.use_redis and self.redis:
             try:
-                self.redis.setex(key, ttl, json.dumps(value, default=str))
+                self._set_l2(key, value, ttl, refresh_after)
             except Exception as e:
                 logger.warning(f"设置Redis缓存失败: {e}")
                 # 回退到内存缓存
 
-        # 内存缓存
-        self._memory_cache[key] = value
-        self._cache_ttl[key] = datetime.now() + timedelta(seconds=ttl)
+        if persist and self.disk is not None:
+            self._set_disk(key, value, ttl, refresh_after)
+
+        self._set_memory(key, value, ttl, refresh_after)
+
+    async def aset(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        refresh_after: Optional[float] = None,
+        persist: bool = False,
+    ) -> None:
+        """set的异步版本，Redis和磁盘访问不阻塞事件循环"""
+        ttl, refresh_after = self._normalize_ttl(ttl, refresh_after)
+
+        if self.use_redis and self.redis:
+            try:
+                await self._l2(
+                    lambda c: self._write_l2(
+                        c.pipeline(transaction=False), key, value, ttl, refresh_after
+                    ).execute(),
+                    self._set_l2,
+                    key,
+                    value,
+                    ttl,
+                    refresh_after,
+                )
+            except Exception as e:
+                logger.warning(f"设置Redis缓存失败: {e}")
+
+        if persist and self.disk is not None:
+            await self._run_sync(self._set_disk, key, value, ttl, refresh_after)
+
+        self._set_memory(key, value, ttl, refresh_after)
+
+    def _normalize_ttl(
+        self, ttl: Optional[float], refresh_after: Optional[float]
+    ) -> Tuple[float, float]:
+        if ttl is None:
+            ttl = self.default_ttl
+        if refresh_after is None or refresh_after > ttl:
+            refresh_after = ttl
+        return ttl, refresh_after
+
+    def _set_l2(self, key: str, value: Any, ttl: float, refresh_after: float) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        self._write_l2(pipe, key, value, ttl, refresh_after).execute()
+
+    def _write_l2(self, pipe, key: str, value: Any, ttl: float, refresh_after: float):
+        """在pipeline中写入L2并通知其他副本丢弃旧的L1副本（一次往返）"""
+        now = time.time()
+        payload = encode_value(
+            value, now + ttl, now + refresh_after, self.compress_min_bytes
+        )
+        pipe.setex(key, max(int(ttl), 1), payload)
+        self._publish_invalidation(pipe, key=key)
+        return pipe
+
+    def _set_disk(self, key: str, value: Any, ttl: float, refresh_after: float) -> None:
+        """写入磁盘缓存（与L2相同的编码）"""
+        now = time.time()
+        try:
+            payload = encode_value(
+                value, now + ttl, now + refresh_after, self.compress_min_bytes
+            )
+            self.disk.set(key, payload, now + ttl)
+        except Exception as e:
+            logger.warning(f"写入磁盘缓存失败: {e}")
+
+    def _set_memory(
+        self, key: str, value: Any, ttl: float, refresh_after: float
+    ) -> None:
+        """写入L1内存缓存"""
+        size = _approximate_size(value)
+        with self._lock:
+            self._remove_entry(key)
+            if size > self.max_bytes:
+                logger.debug(f"缓存值过大（约{size}字节），不写入内存缓存: {key}")
+                return
+            now = time.monotonic()
+            self._memory_cache[key] = _CacheEntry(
+                value, now + ttl, now + refresh_after, size
+            )
+            self._memory_bytes += size
+            self._evict()
+
+    def _publish_invalidation(self, client, **message) -> None:
+        """发布失效通知（client可以是同步Redis客户端或pipeline）"""
+        if self.invalidation_channel:
+            client.publish(
+                self.invalidation_channel, self._invalidation_message(**message)
+            )
+
+    def _invalidation_message(self, **message) -> str:
+        message["origin"] = self.instance_id
+        return json.dumps(message)
+
+    def _invalidate_local(self, key: Optional[str], prefix: Optional[str]) -> None:
+        """按通知删除L1中的条目"""
+        with self._lock:
+            if key is not None:
+                self._remove_entry(key)
+            elif prefix:
+                for k in [k for k in self._memory_cache if k.startswith(prefix)]:
+                    self._remove_entry(k)
+            else:
+                self._memory_cache.clear()
+                self._memory_bytes = 0
+            self._invalidations_received += 1
+
+    def _invalidation_loop(self) -> None:
+        """订阅失效通知，丢弃其他副本已更新或删除的L1条目"""
+        while not self._closed.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.invalidation_channel)
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message or message.get("type") != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data.get("origin") == self.instance_id:
+                        continue
+                    self._invalidate_local(data.get("key"), data.get("prefix"))
+            except Exception as e:
+                logger.warning(f"缓存失效订阅中断，稍后重试: {e}")
+                self._closed.wait(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _remove_entry(self, key: str) -> None:
+        """删除内存缓存条目（调用方需持有锁）"""
+        entry = self._memory_cache.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+
+    def _evict(self) -> None:
+        """按LRU淘汰，直到条目数和占用都在限制内（调用方需持有锁）"""
+        while self._memory_cache and (
+            len(self._memory_cache) > self.max_entries
+            or self._memory_bytes > self.max_bytes
+        ):
+            _, entry = self._memory_cache.popitem(last=False)
+            self._memory_bytes -= entry.size
+            self._evictions += 1
+
+    def refresh_in_background(
+        self, key: str, factory: Callable[[], Awaitable[Any]]
+    ) -> bool:
+        """
+        在事件循环中后台刷新缓存（同一键同时只有一个刷新任务）
+
+        Args:
+            key: 缓存键
+            factory: 返回刷新协程的无参函数，协程负责写回缓存
+
+        Returns:
+            是否启动了新的刷新任务
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._refreshes += 1
+
+        def done(task):
+            with self._lock:
+                self._refreshing.discard(key)
+            self._refresh_tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"后台刷新缓存失败: {key}: {task.exception()}")
+
+        task = asyncio.get_running_loop().create_task(factory())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(done)
+        return True
+
+    def refresh_in_thread(self, key: str, func: Callable[[], Any]) -> bool:
+        """
+        在后台线程中刷新缓存（同步函数使用）
+
+        Args:
+            key: 缓存键
+            func: 刷新函数，负责写回缓存
+
+        Returns:
+            是否启动了新的刷新线程
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._refreshes += 1
+
+        def run():
+            try:
+                func()
+            except Exception as e:
+                logger.warning(f"后台刷新缓存失败: {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+        return True
+
+    def purge_expired(self) -> int:
+        """
+        清理内存缓存中所有已过期的条目
+
+        Returns:
+            清理的条目数
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, e in self._memory_cache.items() if e.expires_at <= now]
+            for key in expired:
+                self._remove_entry(key)
+            self._expirations += len(expired)
+        return len(expired)
+
+    def _sweep_loop(self) -> None:
+        """后台清理线程"""
+        while not self._closed.wait(self._sweep_interval):
+            try:
+                removed = self.purge_expired()
+                if self.disk is not None:
+                    removed += self.disk.purge_expired()
+                if removed:
+                    logger.debug(f"已清理 {removed} 个过期缓存条目")
+            except Exception as e:
+                logger.warning(f"清理过期缓存失败: {e}")
+
+    def close(self) -> None:
+        """停止后台清理和失效订阅线程"""
+        self._closed.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+        if self.disk is not None:
+            self.disk.close()
 
     def delete(self, key: str) -> None:
         """
@@ -157,45 +1007,135 @@ class CacheManager:
         """
         if self.use_redis and self.redis:
             try:
-                self.redis.delete(key)
+                self._delete_l2(key)
             except Exception as e:
                 logger.warning(f"删除Redis缓存失败: {e}")
 
+        if self.disk is not None:
+            self._delete_disk(key)
+
         # 内存缓存
-        if key in self._memory_cache:
-            del self._memory_cache[key]
-        if key in self._cache_ttl:
-            del self._cache_ttl[key]
+        with self._lock:
+            self._remove_entry(key)
+
+    async def adelete(self, key: str) -> None:
+        """delete的异步版本"""
+        if self.use_redis and self.redis:
+            try:
+                await self._l2(
+                    lambda c: self._write_delete(
+                        c.pipeline(transaction=False), key
+                    ).execute(),
+                    self._delete_l2,
+                    key,
+                )
+            except Exception as e:
+                logger.warning(f"删除Redis缓存失败: {e}")
+
+        if self.disk is not None:
+            await self._run_sync(self._delete_disk, key)
+
+        with self._lock:
+            self._remove_entry(key)
+
+    def _delete_disk(self, key: str) -> None:
+        try:
+            self.disk.delete(key)
+        except Exception as e:
+            logger.warning(f"删除磁盘缓存失败: {e}")
+
+    def _delete_l2(self, key: str) -> None:
+        self._write_delete(self.redis.pipeline(transaction=False), key).execute()
+
+    def _write_delete(self, pipe, key: str):
+        """在pipeline中删除L2并通知其他副本"""
+        pipe.delete(key)
+        self._publish_invalidation(pipe, key=key)
+        return pipe
 
     def clear(self, prefix: Optional[str] = None) -> None:
         """
         清除缓存
 
+        按前缀清除时使用SCAN分批查找键（不使用阻塞Redis的KEYS）。
+
         Args:
             prefix: 键前缀（可选），如果提供则只清除匹配前缀的缓存
         """
         if self.use_redis and self.redis:
             try:
-                if prefix:
-                    # 查找所有匹配的键
-                    keys = self.redis.keys(f"{prefix}:*")
-                    if keys:
-                        self.redis.delete(*keys)
-                else:
-                    self.redis.flushdb()
+                self._clear_l2(prefix)
             except Exception as e:
                 logger.warning(f"清除Redis缓存失败: {e}")
 
-        # 内存缓存
+        if self.disk is not None:
+            self._clear_disk(prefix)
+
+        self._clear_memory(prefix)
+
+    def _clear_disk(self, prefix: Optional[str]) -> None:
+        try:
+            self.disk.clear(prefix)
+        except Exception as e:
+            logger.warning(f"清除磁盘缓存失败: {e}")
+
+    def _clear_l2(self, prefix: Optional[str]) -> None:
+        if prefix:
+            batch = []
+            for key in self.redis.scan_iter(match=f"{prefix}:*", count=_SCAN_BATCH):
+                batch.append(key)
+                if len(batch) >= _SCAN_BATCH:
+                    self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                self.redis.unlink(*batch)
+        else:
+            self.redis.flushdb()
+        self._publish_invalidation(self.redis, prefix=prefix)
+
+    async def _aclear_l2(self, client, prefix: Optional[str]) -> None:
         if prefix:
-            keys_to_delete = [
-                k for k in self._memory_cache.keys() if k.startswith(prefix)
-            ]
-            for key in keys_to_delete:
-                self.delete(key)
+            batch = []
+            async for key in client.scan_iter(match=f"{prefix}:*", count=_SCAN_BATCH):
+                batch.append(key)
+                if len(batch) >= _SCAN_BATCH:
+                    await client.unlink(*batch)
+                    batch = []
+            if batch:
+                await client.unlink(*batch)
         else:
-            self._memory_cache.clear()
-            self._cache_ttl.clear()
+            await client.flushdb()
+        if self.invalidation_channel:
+            await client.publish(
+                self.invalidation_channel, self._invalidation_message(prefix=prefix)
+            )
+
+    async def aclear(self, prefix: Optional[str] = None) -> None:
+        """clear的异步版本"""
+        if self.use_redis and self.redis:
+            try:
+                await self._l2(
+                    lambda c: self._aclear_l2(c, prefix), self._clear_l2, prefix
+                )
+            except Exception as e:
+                logger.warning(f"清除Redis缓存失败: {e}")
+
+        if self.disk is not None:
+            await self._run_sync(self._clear_disk, prefix)
+
+        self._clear_memory(prefix)
+
+    def _clear_memory(self, prefix: Optional[str]) -> None:
+        with self._lock:
+            if prefix:
+                keys_to_delete = [
+                    k for k in self._memory_cache.keys() if k.startswith(prefix)
+                ]
+                for key in keys_to_delete:
+                    self._remove_entry(key)
+            else:
+                self._memory_cache.clear()
+                self._memory_bytes = 0
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -204,11 +1144,30 @@ class CacheManager:
         Returns:
             统计信息字典
         """
-        stats = {
-            "type": "redis" if self.use_redis else "memory",
-            "memory_cache_size": len(self._memory_cache),
-            "default_ttl": self.default_ttl,
-        }
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "type": "redis" if self.use_redis else "memory",
+                "serializer": "orjson" if HAS_ORJSON else "json",
+                "compression": ("zstd" if HAS_ZSTD else "lz4" if HAS_LZ4 else "zlib"),
+                "memory_cache_size": len(self._memory_cache),
+                "memory_cache_bytes": self._memory_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "default_ttl": self.default_ttl,
+                "hits": self._hits,
+                "l2_hits": self._l2_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "stale_hits": self._stale_hits,
+                "refreshes": self._refreshes,
+                "invalidations_received": self._invalidations_received,
+                "coalesced": self.single_flight.coalesced,
+                "in_flight": self.single_flight.in_flight(),
+            }
 
         if self.use_redis and self.redis:
             try:
@@ -219,6 +1178,12 @@ class CacheManager:
             except Exception:
                 stats["redis_info"] = {"connected": False}
 
+        if self.disk is not None:
+            try:
+                stats["disk"] = self.disk.get_stats()
+            except Exception as e:
+                stats["disk"] = {"error": str(e)}
+
         return stats
 
 
@@ -227,7 +1192,10 @@ _global_cache: Optional[CacheManager] = None
 
 
 def get_cache_manager(
-    use_redis: bool = False, redis_client=None, default_ttl: int = 300
+    use_redis: bool = False,
+    redis_client=None,
+    default_ttl: int = 300,
+    **kwargs,
 ) -> CacheManager:
     """
     获取全局缓存管理器实例
@@ -236,74 +1204,160 @@ def get_cache_manager(
         use_redis: 是否使用Redis
         redis_client: Redis客户端
         default_ttl: 默认TTL
+        **kwargs: 其他CacheManager参数（max_entries、max_bytes、sweep_interval、
+            disk_cache_dir等）
 
     Returns:
         缓存管理器实例
     """
     global _global_cache
     if _global_cache is None:
-        _global_cache = CacheManager(use_redis, redis_client, default_ttl)
+        _global_cache = CacheManager(use_redis, redis_client, default_ttl, **kwargs)
     return _global_cache
 
 
-def cached(prefix: str = "cache", ttl: int = 300):
+def cached(
+    prefix: str = "cache",
+    ttl: int = 300,
+    refresh_after: Optional[float] = None,
+    persist: bool = False,
+    version: Optional[Callable[..., Any]] = None,
+):
     """
     缓存装饰器
 
     Args:
         prefix: 缓存键前缀
         ttl: 缓存过期时间（秒）
+        refresh_after: 软过期时间（秒，可选）。超过后立即返回旧值并在后台刷新
+            （stale-while-revalidate），ttl为旧值可被使用的上限
+        persist: 是否同时写入磁盘缓存（进程重启后仍可命中）
+        version: 数据版本函数（可选），以被装饰函数的参数（关键字形式）调用，
+            返回值加入缓存键，数据版本变化后旧条目不再命中，因此可以使用较长的ttl；
+            返回None表示版本未知，本次调用不使用缓存
 
     Example:
-        @cached(prefix="tile_codes", ttl=600)
+        @cached(prefix="tile_codes", ttl=3600, refresh_after=300)
         async def list_tile_codes(self, ...):
             ...
     """
 
     def decorator(func):
+        # 方法的self不参与缓存键，不同实例共享缓存
+        signature = inspect.signature(func)
+        params = list(signature.parameters)
+        skip = 1 if params and params[0] in ("self", "cls") else 0
+
+        def make_key(cache_manager, args, kwargs):
+            """生成缓存键，数据版本未知时返回None"""
+            # 按签名规范化参数：位置/关键字写法和省略默认值的调用生成相同的键
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                key_prefix = prefix
+                if version is not None:
+                    data_version = version(*args, **kwargs)
+                    if data_version is None:
+                        return None
+                    key_prefix = f"{prefix}:v{data_version}"
+                return cache_manager._generate_key(key_prefix, *args[skip:], **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            # 键前缀包含数据版本，clear(prefix)仍可清除所有版本
+            key_prefix = prefix
+            if version is not None:
+                data_version = version(**arguments)
+                if data_version is None:
+                    return None
+                key_prefix = f"{prefix}:v{data_version}"
+            if skip:
+                arguments.pop(params[0])
+            return cache_manager._generate_key(key_prefix, **arguments)
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             cache_manager = get_cache_manager()
-            cache_key = cache_manager._generate_key(prefix, *args, **kwargs)
+            cache_key = make_key(cache_manager, args, kwargs)
+            if cache_key is None:
+                return await func(*args, **kwargs)
+
+            async def compute():
+                # 等待期间可能已有相同请求写入缓存
+                cached_result, stale = await cache_manager.aget_with_state(cache_key)
+                if cached_result is not None and not stale:
+                    return cached_result
+
+                # 执行函数
+                result = await func(*args, **kwargs)
+
+                # 保存到缓存
+                await cache_manager.aset(
+                    cache_key,
+                    result,
+                    ttl=ttl,
+                    refresh_after=refresh_after,
+                    persist=persist,
+                )
+                logger.debug(f"缓存已设置: {cache_key} (TTL: {ttl}秒)")
+                return result
 
             # 尝试从缓存获取
-            cached_result = cache_manager.get(cache_key)
+            cached_result, stale = await cache_manager.aget_with_state(cache_key)
             if cached_result is not None:
                 logger.debug(f"缓存命中: {cache_key}")
+                if stale:
+                    # 先返回旧值，后台刷新
+                    cache_manager.refresh_in_background(
+                        cache_key,
+                        lambda: cache_manager.single_flight.do(cache_key, compute),
+                    )
                 return cached_result
 
-            # 执行函数
-            result = await func(*args, **kwargs)
-
-            # 保存到缓存
-            cache_manager.set(cache_key, result, ttl=ttl)
-            logger.debug(f"缓存已设置: {cache_key} (TTL: {ttl}秒)")
-
-            return result
+            # 并发的相同请求只执行一次
+            return await cache_manager.single_flight.do(cache_key, compute)
 
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
             cache_manager = get_cache_manager()
-            cache_key = cache_manager._generate_key(prefix, *args, **kwargs)
+            cache_key = make_key(cache_manager, args, kwargs)
+            if cache_key is None:
+                return func(*args, **kwargs)
+
+            def compute():
+                cached_result, stale = cache_manager.get_with_state(cache_key)
+                if cached_result is not None and not stale:
+                    return cached_result
+
+                # 执行函数
+                result = func(*args, **kwargs)
+
+                # 保存到缓存
+                cache_manager.set(
+                    cache_key,
+                    result,
+                    ttl=ttl,
+                    refresh_after=refresh_after,
+                    persist=persist,
+                )
+                logger.debug(f"缓存已设置: {cache_key} (TTL: {ttl}秒)")
+                return result
 
             # 尝试从缓存获取
-            cached_result = cache_manager.get(cache_key)
+            cached_result, stale = cache_manager.get_with_state(cache_key)
             if cached_result is not None:
                 logger.debug(f"缓存命中: {cache_key}")
+                if stale:
+                    # 先返回旧值，后台刷新
+                    cache_manager.refresh_in_thread(
+                        cache_key,
+                        lambda: cache_manager.single_flight.do_sync(cache_key, compute),
+                    )
                 return cached_result
 
-            # 执行函数
-            result = func(*args, **kwargs)
-
-            # 保存到缓存
-            cache_manager.set(cache_key, result, ttl=ttl)
-            logger.debug(f"缓存已设置: {cache_key} (TTL: {ttl}秒)")
-
-            return result
+            # 并发的相同请求只执行一次
+            return cache_manager.single_flight.do_sync(cache_key, compute)
 
         # 根据函数类型返回相应的包装器
-        import asyncio
-
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
@@ -0,0 +1,68 @@
+"""
+缓存预热模块
+服务启动后在后台预先计算常用的元数据查询和最常执行的SQL，
+使客户端会话的第一批调用即可命中缓存（由 startup.start_startup 调度）
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from .logging_config import get_logger
+from .performance_monitor import get_performance_monitor
+
+logger = get_logger(__name__)
+
+
+async def warm_up_caches(data_importer, top_n: int = 10) -> Dict[str, Any]:
+    """
+    预热缓存：list_tile_codes、list_tables，以及查询历史中最常执行的SQL
+
+    元数据预热填充结果缓存（cache_manager），SQL预热填充查询结果缓存
+    （query_cache），各自只在对应的缓存启用时执行。单项失败只记录警告，
+    不影响其余预热项。
+
+    Args:
+        data_importer: DataImporter实例
+        top_n: 预热的SQL数量，0表示不预热SQL
+
+    Returns:
+        预热结果（成功数、失败数、耗时）
+    """
+    start_time = time.time()
+    warmed = 0
+    failed = 0
+
+    async def warm(name: str, factory) -> None:
+        nonlocal warmed, failed
+        try:
+            await factory()
+            warmed += 1
+        except Exception as e:
+            failed += 1
+            logger.warning(f"缓存预热失败: {name}: {e}")
+
+    if data_importer.cache_manager is not None:
+        # 参数与MCP工具调用一致，生成相同的缓存键
+        await warm("list_tile_codes", lambda: data_importer.list_tile_codes(None))
+        await warm("list_tables", lambda: data_importer.list_tables(None))
+
+    if data_importer.query_cache is not None and top_n > 0:
+        loop = asyncio.get_running_loop()
+        statements = await loop.run_in_executor(
+            None, get_performance_monitor().get_top_statements, "execute_sql", top_n
+        )
+        # 逐条执行，避免预热占满连接池
+        for item in statements:
+            await warm(
+                "execute_sql",
+                lambda statement=item["statement"]: data_importer.execute_sql(
+                    statement, record_history=False
+                ),
+            )
+
+    duration = time.time() - start_time
+    logger.info(
+        f"缓存预热完成: 成功 {warmed} 项，失败 {failed} 项，耗时 {duration:.2f}秒"
+    )
+    return {"warmed": warmed, "failed": failed, "duration": duration}
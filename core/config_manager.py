@@ -3,7 +3,8 @@
 """
 
 import configparser
-from typing import Dict, Any, Optional, List
+import os
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 import json
 import logging
@@ -31,6 +32,8 @@ class ConfigManager:
         # 默认配置文件路径
         self.default_config_file = self.config_dir / "database.ini"
         self.data_sources_file = self.config_dir / "data_sources.json"
+        # 解析后的配置文件，按修改时间判断是否需要重新读取
+        self._config_cache: Optional[Tuple[int, configparser.ConfigParser]] = None
 
         # 加载数据源配置
         self._load_data_sources()
@@ -60,13 +63,7 @@ class ConfigManager:
                 "请创建配置文件或使用database_config参数"
             )
 
-        config = configparser.ConfigParser()
-        try:
-            with open(self.default_config_file, "r", encoding="utf-8") as f:
-                config.read_file(f)
-        except UnicodeDecodeError:
-            with open(self.default_config_file, "r", encoding="gbk") as f:
-                config.read_file(f)
+        config = self._read_config_file()
 
         if "postgresql" not in config:
             raise ValueError("配置文件中缺少[postgresql]节")
@@ -80,6 +77,198 @@ class ConfigManager:
             "password": db_config.get("password"),
         }
 
+    def get_replica_config(self) -> Dict[str, Any]:
+        """
+        获取只读副本配置（配置文件[postgresql]节，环境变量优先）
+
+        replicas 为逗号分隔的 主机[:端口] 列表，副本与主库使用相同的数据库名、
+        用户和密码；replica_max_lag 为允许的最大复制延迟（秒），
+        replica_check_interval 为检查延迟的间隔（秒）。对应环境变量
+        DB_REPLICAS、DB_REPLICA_MAX_LAG、DB_REPLICA_CHECK_INTERVAL
+
+        Returns:
+            {replicas: [副本数据库配置], max_lag, check_interval}
+        """
+        config = self._read_config_file()
+        section = config["postgresql"] if "postgresql" in config else {}
+
+        def _get(name: str, default: str) -> str:
+            return os.getenv(f"DB_{name.upper()}") or section.get(name, default)
+
+        replicas = []
+        hosts = [h.strip() for h in _get("replicas", "").split(",") if h.strip()]
+        if hosts:
+            primary = self.get_default_database_config()
+            for entry in hosts:
+                host, _, port = entry.partition(":")
+                replica = dict(primary)
+                replica["host"] = host
+                replica["port"] = int(port) if port else primary["port"]
+                replicas.append(replica)
+
+        return {
+            "replicas": replicas,
+            "max_lag": float(_get("replica_max_lag", "10")),
+            "check_interval": float(_get("replica_check_interval", "5")),
+        }
+
+    def _read_config_file(self) -> configparser.ConfigParser:
+        """
+        读取默认配置文件（兼容UTF-8和GBK编码），文件不存在时返回空配置
+
+        解析结果按文件修改时间缓存，每次请求只需一次stat；返回的对象不可修改
+        """
+        try:
+            mtime = self.default_config_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return configparser.ConfigParser()
+        cached = self._config_cache
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        config = configparser.ConfigParser()
+        try:
+            with open(self.default_config_file, "r", encoding="utf-8") as f:
+                config.read_file(f)
+        except UnicodeDecodeError:
+            config = configparser.ConfigParser()
+            with open(self.default_config_file, "r", encoding="gbk") as f:
+                config.read_file(f)
+        self._config_cache = (mtime, config)
+        return config
+
+    def get_cache_config(self) -> Dict[str, Any]:
+        """
+        获取缓存配置（配置文件[cache]节，环境变量优先）
+
+        Docker入口脚本会重写database.ini，因此容器中通过环境变量配置：
+        QUERY_CACHE、QUERY_CACHE_TTL、QUERY_CACHE_MAX_ENTRY_BYTES、
+        QUERY_CACHE_PERSIST_SECONDS、DISK_CACHE_DIR、DISK_CACHE_MAX_BYTES、
+        CACHE_WARM_UP、CACHE_WARM_UP_QUERIES
+
+        Returns:
+            缓存配置字典
+        """
+        config = self._read_config_file()
+        section = config["cache"] if "cache" in config else {}
+
+        def _get(name: str, env: str, default: str) -> str:
+            return os.getenv(env) or section.get(name, default)
+
+        return {
+            "query_cache": _get("query_cache", "QUERY_CACHE", "false").lower()
+            in ("1", "true", "yes", "on"),
+            "query_cache_ttl": int(_get("query_cache_ttl", "QUERY_CACHE_TTL", "3600")),
+            "query_cache_max_entry_bytes": int(
+                _get(
+                    "query_cache_max_entry_bytes",
+                    "QUERY_CACHE_MAX_ENTRY_BYTES",
+                    str(2 * 1024 * 1024),
+                )
+            ),
+            "query_cache_persist_seconds": float(
+                _get("query_cache_persist_seconds", "QUERY_CACHE_PERSIST_SECONDS", "1")
+            ),
+            "disk_cache_dir": _get("disk_cache_dir", "DISK_CACHE_DIR", "") or None,
+            "disk_cache_max_bytes": int(
+                _get(
+                    "disk_cache_max_bytes",
+                    "DISK_CACHE_MAX_BYTES",
+                    str(256 * 1024 * 1024),
+                )
+            ),
+            "warm_up": _get("warm_up", "CACHE_WARM_UP", "true").lower()
+            in ("1", "true", "yes", "on"),
+            "warm_up_queries": int(
+                _get("warm_up_queries", "CACHE_WARM_UP_QUERIES", "10")
+            ),
+        }
+
+    def get_pool_config(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各负载类型的连接池设置（配置文件[pool]节，环境变量优先）
+
+        配置项为 <负载类型>_minconn、<负载类型>_maxconn、<负载类型>_timeout，
+        负载类型为 metadata、analytics、import；对应环境变量如
+        POOL_METADATA_MAXCONN、POOL_ANALYTICS_TIMEOUT。连接健康检查设置
+        max_lifetime、max_idle、ping_after 对所有负载类型生效，也可加负载类型前缀
+        单独设置。未配置的项为None（使用默认值）
+
+        Returns:
+            {负载类型: {minconn, maxconn, timeout, max_lifetime, max_idle, ping_after}}
+        """
+        config = self._read_config_file()
+        section = config["pool"] if "pool" in config else {}
+
+        def _get(name: str, convert):
+            value = os.getenv(f"POOL_{name.upper()}") or section.get(name)
+            return convert(value) if value not in (None, "") else None
+
+        def _get_health(workload: str, name: str):
+            value = _get(f"{workload}_{name}", float)
+            return _get(name, float) if value is None else value
+
+        return {
+            workload: {
+                "minconn": _get(f"{workload}_minconn", int),
+                "maxconn": _get(f"{workload}_maxconn", int),
+                "timeout": _get(f"{workload}_timeout", float),
+                "max_lifetime": _get_health(workload, "max_lifetime"),
+                "max_idle": _get_health(workload, "max_idle"),
+                "ping_after": _get_health(workload, "ping_after"),
+            }
+            for workload in ("metadata", "analytics", "import")
+        }
+
+    def get_prepared_statement_config(self) -> Dict[str, Any]:
+        """
+        获取预编译语句缓存配置（配置文件[pool]节，环境变量优先）
+
+        环境变量：POOL_PREPARED_STATEMENTS、POOL_PREPARED_STATEMENTS_MAX、
+        POOL_PREPARED_STATEMENTS_AFTER。经由事务级连接池（如PgBouncer
+        transaction模式）连接时需要关闭
+
+        Returns:
+            {enabled, max_per_connection, prepare_after}
+        """
+        config = self._read_config_file()
+        section = config["pool"] if "pool" in config else {}
+
+        def _get(name: str, default: str) -> str:
+            return os.getenv(f"POOL_{name.upper()}") or section.get(name, default)
+
+        return {
+            "enabled": _get("prepared_statements", "true").lower()
+            in ("1", "true", "yes", "on"),
+            "max_per_connection": int(_get("prepared_statements_max", "100")),
+            "prepare_after": int(_get("prepared_statements_after", "3")),
+        }
+
+    def get_metrics_config(self) -> Dict[str, Any]:
+        """
+        获取指标导出配置（配置文件[metrics]节，环境变量优先）
+
+        port 为HTTP端口（0表示不启动），host 为监听地址，textfile 为写入的
+        指标文件路径（node_exporter textfile collector），textfile_interval
+        为写入间隔（秒）。对应环境变量 METRICS_PORT、METRICS_HOST、
+        METRICS_TEXTFILE、METRICS_TEXTFILE_INTERVAL
+
+        Returns:
+            {port, host, textfile, textfile_interval}
+        """
+        config = self._read_config_file()
+        section = config["metrics"] if "metrics" in config else {}
+
+        def _get(name: str, default: str) -> str:
+            return os.getenv(f"METRICS_{name.upper()}") or section.get(name, default)
+
+        return {
+            "port": int(_get("port", "0")),
+            "host": _get("host", "127.0.0.1"),
+            "textfile": _get("textfile", "") or None,
+            "textfile_interval": float(_get("textfile_interval", "15")),
+        }
+
     def get_data_source(self, source_name: str) -> Dict[str, Any]:
         """
         获取指定数据源配置
@@ -1,61 +1,784 @@
 """
 数据库连接池管理模块
+连接池满时按FIFO顺序排队等待（有超时），不再立即报错或另开直接连接。
+每个数据库按负载类型（元数据、分析查询、导入）使用独立的连接池，
+耗时的分析查询不会占满交互式元数据工具的连接。
+取出连接时检查连接状态（空闲较久时先ping），超过最长存活时间的连接被替换，
+后台线程关闭超出minconn的长时间空闲连接，损坏的连接不会放回池中。
+配置了只读副本时，只读调用按未完成请求数分发到复制延迟正常的副本
 """
 
+import asyncio
+import os
 import psycopg2
-from psycopg2 import pool
-from typing import Dict, Any, Optional
-import logging
+from psycopg2 import extensions, pool
+from collections import deque
+from typing import Dict, Any, Optional, Sequence
 import threading
+import time
 
 from .logging_config import get_logger
+from .prepared_statements import get_statement_cache
+from .replica_router import ReplicaRouter
 
 logger = get_logger(__name__)
 
+# 交给等待者的“空位”：等待者自行创建新连接
+_SLOT = object()
+
+# 连接健康检查的默认设置（秒）：最长存活时间、超出minconn的空闲连接保留时间、
+# 空闲超过该时间后取出前先ping
+DEFAULT_MAX_LIFETIME = 3600.0
+DEFAULT_MAX_IDLE = 600.0
+DEFAULT_PING_AFTER = 30.0
+
+# 预连接后在每个连接上执行的语句：加载PostGIS库并读取系统目录，
+# 使后端进程的库和目录缓存在首个请求之前就绪
+WARM_UP_STATEMENTS = (
+    "SELECT postgis_lib_version();",
+    "SELECT count(*) FROM pg_catalog.pg_tables WHERE schemaname = 'public';",
+)
+
+# 负载类型：元数据工具（list_tables等）、分析查询（query_data、execute_sql）、导入
+WORKLOADS = ("metadata", "analytics", "import")
+DEFAULT_WORKLOAD = "metadata"
+
+
+def default_pool_settings() -> Dict[str, Dict[str, Any]]:
+    """
+    各负载类型的默认连接池设置
+
+    分析查询的最大连接数按CPU核数自动确定（2倍核数，4~16之间）
+
+    Returns:
+        {负载类型: {minconn, maxconn, timeout, max_lifetime, max_idle, ping_after}}
+    """
+    analytics_max = min(16, max(4, 2 * (os.cpu_count() or 2)))
+    health = {
+        "max_lifetime": DEFAULT_MAX_LIFETIME,
+        "max_idle": DEFAULT_MAX_IDLE,
+        "ping_after": DEFAULT_PING_AFTER,
+    }
+    return {
+        "metadata": {"minconn": 1, "maxconn": 4, "timeout": 10.0, **health},
+        "analytics": {
+            "minconn": 1,
+            "maxconn": analytics_max,
+            "timeout": 30.0,
+            **health,
+        },
+        "import": {"minconn": 0, "maxconn": 2, "timeout": 300.0, **health},
+    }
+
+
+class PoolTimeout(ConnectionError):
+    """等待连接超时"""
+
+
+class _Waiter:
+    """排队等待连接的调用方（线程或协程）"""
+
+    __slots__ = ("event", "loop", "future", "value", "assigned")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+        self.value = None
+        self.assigned = False
+
+    def deliver(self, value: Any) -> None:
+        """交付连接或空位（调用方需持有连接池锁）"""
+        self.value = value
+        self.assigned = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class ConnectionPool:
+    """
+    线程安全的连接池
+
+    连接用尽时调用方进入FIFO等待队列，归还的连接直接交给队首等待者；
+    超过等待时间抛出PoolTimeout。同步和异步调用方共用同一队列。
+
+    取出的连接先检查是否已关闭、事务状态是否正常、是否超过最长存活时间，
+    空闲超过 ping_after 秒时再执行一次 SELECT 1；不健康的连接就地替换为新连接。
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        timeout: float = 30.0,
+        max_lifetime: Optional[float] = DEFAULT_MAX_LIFETIME,
+        max_idle: Optional[float] = DEFAULT_MAX_IDLE,
+        ping_after: Optional[float] = DEFAULT_PING_AFTER,
+        reap_interval: float = 30.0,
+        warm_up_statements: Sequence[str] = (),
+        **connect_kwargs,
+    ):
+        """
+        初始化连接池（不创建连接，由prefill或后台线程补足minconn个连接）
+
+        Args:
+            minconn: 最小连接数
+            maxconn: 最大连接数
+            timeout: 默认等待连接的超时时间（秒）
+            max_lifetime: 连接最长存活时间（秒），超过后替换，None表示不限制
+            max_idle: 超出minconn的连接空闲超过该时间（秒）后关闭，None表示不关闭
+            ping_after: 连接空闲超过该时间（秒）后，取出前先执行SELECT 1，
+                None表示不ping
+            reap_interval: 后台清理空闲和过期连接的间隔（秒），0表示不启用
+            warm_up_statements: 预先创建的连接上执行的预热语句
+            **connect_kwargs: psycopg2.connect参数
+        """
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self.warm_up_statements = tuple(warm_up_statements)
+        self._connect_kwargs = connect_kwargs
+        self._lock = threading.Lock()
+        self._idle: list = []  # 后进先出，使多余连接保持空闲
+        self._used: set = set()
+        self._waiters: deque = deque()
+        self._size = 0  # 已创建和正在创建的连接数
+        self._closed = False
+        self._created_at: Dict[Any, float] = {}
+        self._idle_since: Dict[Any, float] = {}
+        self._stop = threading.Event()
+
+        # 统计
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+        self._pings = 0
+        self._broken = 0
+        self._recycled = 0
+        self._reaped = 0
+
+        self._reaper: Optional[threading.Thread] = None
+        if reap_interval > 0 and (max_idle is not None or max_lifetime is not None):
+            self._reaper = threading.Thread(
+                target=self._reap_loop,
+                args=(reap_interval,),
+                name="pool-reaper",
+                daemon=True,
+            )
+            self._reaper.start()
+
+    def _connect(self):
+        return psycopg2.connect(**self._connect_kwargs)
+
+    def _open(self):
+        """创建新连接并记录创建时间"""
+        conn = self._connect()
+        with self._lock:
+            self._created_at[conn] = time.monotonic()
+        return conn
+
+    def _push_idle(self, conn) -> None:
+        """放回空闲列表（调用方需持有锁）"""
+        self._idle.append(conn)
+        self._idle_since[conn] = time.monotonic()
+
+    def _forget(self, conn) -> None:
+        """连接关闭后删除其记录（调用方需持有锁）"""
+        self._created_at.pop(conn, None)
+        self._idle_since.pop(conn, None)
+
+    def _expired(self, conn, now: float) -> bool:
+        if self.max_lifetime is None:
+            return False
+        return now - self._created_at.get(conn, now) >= self.max_lifetime
+
+    def _needs_ping(self, conn) -> bool:
+        if self.ping_after is None or conn is _SLOT:
+            return False
+        # 只读取单个键，无需持锁
+        idle_since = self._idle_since.get(conn)
+        return (
+            idle_since is not None and time.monotonic() - idle_since >= self.ping_after
+        )
+
+    def _needs_io(self, value) -> bool:
+        """
+        取出的连接或空位是否需要网络操作：新建连接、ping，或替换已损坏、
+        已超过最长使用时间的连接（只检查本地状态，不访问数据库）
+        """
+        if value is _SLOT or value.closed:
+            return True
+        if value.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        return self._expired(value, time.monotonic()) or self._needs_ping(value)
+
+    def _healthy(self, conn) -> bool:
+        """
+        检查取出的连接（在锁外执行，可能有一次网络往返）
+
+        Returns:
+            连接是否可用；不可用时由调用方替换
+        """
+        if conn.closed or (
+            conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE
+        ):
+            with self._lock:
+                self._broken += 1
+            return False
+        if self._expired(conn, time.monotonic()):
+            with self._lock:
+                self._recycled += 1
+            return False
+        if self._needs_ping(conn):
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"连接检查失败，替换为新连接: {e}")
+                with self._lock:
+                    self._pings += 1
+                    self._broken += 1
+                return False
+            with self._lock:
+                self._pings += 1
+        return True
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        获取连接，连接用尽时排队等待
+
+        Args:
+            timeout: 等待超时时间（秒），None使用连接池默认值
+
+        Returns:
+            数据库连接
+        """
+        conn, waiter = self._checkout(None)
+        if waiter is None:
+            return self._materialize(conn)
+
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        waiter.event.wait(timeout)
+        return self._materialize(self._finish_wait(waiter, start, timeout))
+
+    async def agetconn(self, timeout: Optional[float] = None):
+        """getconn的异步版本，等待时不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        value, waiter = self._checkout(loop)
+        if waiter is not None:
+            timeout = self.timeout if timeout is None else timeout
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+            value = self._finish_wait(waiter, start, timeout)
+
+        # 新建连接、ping和替换连接需要网络往返，放到线程池中执行
+        if self._needs_io(value):
+            future = loop.run_in_executor(None, self._materialize, value)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 线程池中的任务仍在运行，完成后归还连接
+                future.add_done_callback(self._return_abandoned)
+                raise
+        return self._materialize(value)
+
+    def _return_abandoned(self, future: asyncio.Future) -> None:
+        """归还调用方已取消等待的连接（创建失败时_materialize已释放名额）"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.putconn(future.result())
+
+    def _checkout(self, loop):
+        """立即可用时返回 (连接或空位, None)，否则加入等待队列返回 (None, 等待者)"""
+        with self._lock:
+            if self._closed:
+                raise pool.PoolError("连接池已关闭")
+            self._checkouts += 1
+            # 有人排队时不插队
+            if not self._waiters:
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._used.add(conn)
+                    return conn, None
+                if self._size < self.maxconn:
+                    self._size += 1
+                    return _SLOT, None
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+            self._waits += 1
+            return None, waiter
+
+    def _finish_wait(self, waiter: _Waiter, start: float, timeout: float):
+        waited = time.monotonic() - start
+        with self._lock:
+            self._wait_time += waited
+            self._max_wait = max(self._max_wait, waited)
+            if waiter.assigned:
+                return waiter.value
+            self._waiters.remove(waiter)
+            self._timeouts += 1
+        raise PoolTimeout(
+            f"等待数据库连接超时（{timeout}秒，连接池上限 {self.maxconn}）"
+        )
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """等待被取消：退出队列，已交付的连接或空位转交下一个等待者"""
+        with self._lock:
+            if not waiter.assigned:
+                self._waiters.remove(waiter)
+                return
+            value = waiter.value
+            if value is _SLOT:
+                self._size -= 1
+            else:
+                self._used.discard(value)
+            self._release(value)
+
+    def _materialize(self, value):
+        """检查取出的连接，空位或不健康的连接需要创建新连接"""
+        if value is not _SLOT:
+            if self._healthy(value):
+                with self._lock:
+                    self._idle_since.pop(value, None)
+                return value
+            # 占用的名额不变，用新连接替换
+            with self._lock:
+                self._used.discard(value)
+                self._forget(value)
+            try:
+                value.close()
+            except Exception:
+                pass
+        try:
+            conn = self._open()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                # 让下一个等待者自行尝试创建
+                if self._waiters and self._size < self.maxconn:
+                    self._size += 1
+                    self._waiters.popleft().deliver(_SLOT)
+            raise
+        with self._lock:
+            self._used.add(conn)
+        return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """
+        归还连接
+
+        Args:
+            conn: 数据库连接
+            close: 是否关闭连接而不是放回池中
+        """
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True  # 连接已损坏
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    close = True
+            # 回滚后仍不是空闲状态的连接不放回池中
+            if not close and (
+                conn.closed
+                or conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                close = True
+
+        with self._lock:
+            if conn not in self._used:
+                raise pool.PoolError("归还的连接不属于该连接池")
+            self._used.discard(conn)
+            if (close or conn.closed) and not self._closed:
+                self._broken += 1
+            elif not self._closed and self._expired(conn, time.monotonic()):
+                close = True
+                self._recycled += 1
+            discard = close or bool(conn.closed) or self._closed
+            if discard:
+                # 连接数减少，排队者可以创建新连接
+                self._size -= 1
+                self._forget(conn)
+                self._release(_SLOT)
+            else:
+                self._release(conn)
+
+        if discard:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _release(self, value) -> None:
+        """交给队首等待者或放回空闲列表（调用方需持有锁）"""
+        if self._closed:
+            if value is not _SLOT:
+                self._size -= 1
+                self._forget(value)
+                try:
+                    value.close()
+                except Exception:
+                    pass
+            return
+        if self._waiters:
+            if value is _SLOT:
+                self._size += 1
+            else:
+                self._used.add(value)
+                self._idle_since.pop(value, None)
+            self._waiters.popleft().deliver(value)
+        elif value is not _SLOT:
+            self._push_idle(value)
+
+    def reap(self) -> int:
+        """
+        关闭超出minconn的长时间空闲连接和超过最长存活时间的空闲连接，
+        并补足minconn个连接
+
+        Returns:
+            关闭的连接数
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._closed:
+                return 0
+            expired = [c for c in self._idle if c.closed or self._expired(c, now)]
+            surplus = []
+            if self.max_idle is not None:
+                # 空闲列表后进先出，列表头部是空闲最久的连接
+                for conn in self._idle:
+                    if self._size - len(expired) - len(surplus) <= self.minconn:
+                        break
+                    if conn in expired:
+                        continue
+                    if now - self._idle_since.get(conn, now) < self.max_idle:
+                        break
+                    surplus.append(conn)
+            stale = expired + surplus
+            if stale:
+                self._idle = [c for c in self._idle if c not in stale]
+                for conn in stale:
+                    self._forget(conn)
+                self._size -= len(stale)
+                self._recycled += len(expired)
+                self._reaped += len(surplus)
+
+        for conn in stale:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if stale:
+            logger.debug(f"连接池关闭了{len(stale)}个空闲或过期连接")
+        self.prefill()
+        return len(stale)
+
+    def prefill(self) -> int:
+        """
+        创建连接直到达到minconn，并在新连接上执行预热语句
+
+        Returns:
+            新创建的连接数
+        """
+        with self._lock:
+            if self._closed:
+                return 0
+            missing = max(0, self.minconn - self._size)
+            self._size += missing
+
+        opened = 0
+        for _ in range(missing):
+            try:
+                conn = self._open()
+            except Exception as e:
+                logger.warning(f"补充连接池连接失败: {e}")
+                with self._lock:
+                    self._size -= 1
+                    # 空出的名额交给可能正在等待的调用方
+                    self._release(_SLOT)
+                continue
+            self._warm_up(conn)
+            with self._lock:
+                self._release(conn)
+            opened += 1
+        return opened
+
+    def _warm_up(self, conn) -> None:
+        """执行预热语句并预编译启动语句，失败（如未安装PostGIS）只记录日志"""
+        for statement in self.warm_up_statements:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(statement)
+                    cur.fetchall()
+                conn.rollback()
+            except Exception as e:
+                logger.debug(f"连接预热语句执行失败: {statement}: {e}")
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+        # 预编译热点元数据查询，首次调用即可直接EXECUTE
+        try:
+            get_statement_cache().prepare_startup(conn)
+        except Exception as e:
+            logger.debug(f"连接预编译语句失败: {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+
+    def _reap_loop(self, interval: float) -> None:
+        """后台清理线程"""
+        while not self._stop.wait(interval):
+            try:
+                self.reap()
+            except Exception as e:
+                logger.warning(f"清理连接池失败: {e}")
+
+    def closeall(self) -> None:
+        """关闭所有空闲连接，使用中的连接归还时关闭"""
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            for conn in idle:
+                self._forget(conn)
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def outstanding(self) -> int:
+        """未完成的请求数（使用中、正在创建和排队等待的连接），用于副本选择"""
+        with self._lock:
+            return self._size - len(self._idle) + len(self._waiters)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            return {
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._used),
+                "waiting": len(self._waiters),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "pings": self._pings,
+                "broken": self._broken,
+                "recycled": self._recycled,
+                "reaped": self._reaped,
+                "wait_time_total": round(self._wait_time, 6),
+                "wait_time_max": round(self._max_wait, 6),
+                "wait_time_avg": (
+                    round(self._wait_time / self._waits, 6) if self._waits else 0.0
+                ),
+            }
+
 
 class ConnectionPoolManager:
-    """数据库连接池管理器"""
+    """数据库连接池管理器（每个数据库、每种负载类型一个连接池）"""
 
-    _pools: Dict[str, pool.ThreadedConnectionPool] = {}
+    _pools: Dict[str, ConnectionPool] = {}
+    _settings: Dict[str, Dict[str, Any]] = default_pool_settings()
+    # 使用中的连接所属的连接池，归还时无需指定负载类型
+    _owners: Dict[Any, ConnectionPool] = {}
+    # 主库 -> 只读副本路由
+    _routers: Dict[str, ReplicaRouter] = {}
     _lock = threading.Lock()
 
+    @staticmethod
+    def _database_key(database_config: Dict[str, Any]) -> str:
+        return (
+            f"{database_config.get('host', 'localhost')}:"
+            f"{database_config.get('port', 5432)}/"
+            f"{database_config.get('database', '')}"
+        )
+
+    @classmethod
+    def _pool_key(
+        cls, database_config: Dict[str, Any], workload: str = DEFAULT_WORKLOAD
+    ) -> str:
+        return f"{cls._database_key(database_config)}#{workload}"
+
+    @classmethod
+    def set_replicas(
+        cls,
+        database_config: Dict[str, Any],
+        replicas: Sequence[Dict[str, Any]],
+        max_lag: float = 10.0,
+        check_interval: float = 5.0,
+        retry_after: float = 30.0,
+    ) -> None:
+        """
+        设置主库的只读副本（替换之前的设置，replicas为空时取消）
+
+        Args:
+            database_config: 主库配置字典
+            replicas: 副本数据库配置列表
+            max_lag: 允许的最大复制延迟（秒）
+            check_interval: 检查复制延迟的间隔（秒）
+            retry_after: 连接失败的副本被排除的时间（秒）
+        """
+        key = cls._database_key(database_config)
+        router = (
+            ReplicaRouter(
+                list(replicas),
+                max_lag=max_lag,
+                check_interval=check_interval,
+                retry_after=retry_after,
+            )
+            if replicas
+            else None
+        )
+        with cls._lock:
+            previous = cls._routers.pop(key, None)
+            if router is not None:
+                cls._routers[key] = router
+        if previous is not None:
+            previous.close()
+        if router is not None:
+            logger.info(
+                f"只读副本: {key} -> "
+                f"{', '.join(r.name for r in router.replicas)} (最大延迟 {max_lag}秒)"
+            )
+
+    @classmethod
+    def _route(
+        cls, database_config: Dict[str, Any], workload: str
+    ) -> Optional[Dict[str, Any]]:
+        """为只读调用选择副本，没有配置或没有可用副本时返回None"""
+        if workload == "import" or not cls._routers:
+            return None
+        router = cls._routers.get(cls._database_key(database_config))
+        if router is None:
+            return None
+        return router.choose(
+            lambda replica: cls.get_pool(replica, workload=workload).outstanding()
+        )
+
+    @classmethod
+    def _replica_failed(
+        cls, database_config: Dict[str, Any], replica: Dict[str, Any], error
+    ) -> None:
+        router = cls._routers.get(cls._database_key(database_config))
+        if router is not None:
+            router.mark_down(replica, error)
+
+    @classmethod
+    def _replica_busy(cls, database_config: Dict[str, Any]) -> None:
+        router = cls._routers.get(cls._database_key(database_config))
+        if router is not None:
+            router.record_fallback()
+
+    @classmethod
+    def configure(cls, settings: Dict[str, Dict[str, Any]]) -> None:
+        """
+        设置各负载类型的连接池大小（只影响之后创建的连接池）
+
+        Args:
+            settings: {负载类型: {minconn, maxconn, timeout, max_lifetime, max_idle,
+                ping_after}}，未给出的项保持默认
+        """
+        with cls._lock:
+            for workload, values in settings.items():
+                if workload not in WORKLOADS:
+                    raise ValueError(f"未知的负载类型: {workload}")
+                merged = dict(cls._settings[workload])
+                merged.update({k: v for k, v in values.items() if v is not None})
+                if merged["maxconn"] < 1 or merged["minconn"] > merged["maxconn"]:
+                    raise ValueError(
+                        f"连接池大小无效（{workload}）: "
+                        f"min={merged['minconn']}, max={merged['maxconn']}"
+                    )
+                cls._settings[workload] = merged
+
+    @classmethod
+    def get_settings(cls) -> Dict[str, Dict[str, Any]]:
+        """获取各负载类型的连接池设置"""
+        with cls._lock:
+            return {
+                workload: dict(values) for workload, values in cls._settings.items()
+            }
+
     @classmethod
     def get_pool(
         cls,
         database_config: Dict[str, Any],
-        minconn: int = 2,
-        maxconn: int = 10,
+        minconn: Optional[int] = None,
+        maxconn: Optional[int] = None,
         pool_key: Optional[str] = None,
-    ) -> pool.ThreadedConnectionPool:
+        timeout: Optional[float] = None,
+        workload: str = DEFAULT_WORKLOAD,
+    ) -> ConnectionPool:
         """
         获取或创建连接池
 
         Args:
             database_config: 数据库配置字典
-            minconn: 最小连接数，默认2
-            maxconn: 最大连接数，默认10
+            minconn: 最小连接数（可选），默认使用该负载类型的设置
+            maxconn: 最大连接数（可选），默认使用该负载类型的设置
             pool_key: 连接池键（可选），用于区分不同的数据库配置
+            timeout: 连接用尽时等待的超时时间（秒，可选），默认使用该负载类型的设置
+            workload: 负载类型（metadata、analytics、import）
 
         Returns:
             连接池实例
         """
+        if workload not in WORKLOADS:
+            raise ValueError(f"未知的负载类型: {workload}")
         if pool_key is None:
-            # 使用配置生成唯一键
-            pool_key = (
-                f"{database_config.get('host', 'localhost')}:"
-                f"{database_config.get('port', 5432)}/"
-                f"{database_config.get('database', '')}"
-            )
+            # 使用配置和负载类型生成唯一键
+            pool_key = cls._pool_key(database_config, workload)
 
         with cls._lock:
             if pool_key not in cls._pools:
+                settings = cls._settings[workload]
+                minconn = settings["minconn"] if minconn is None else minconn
+                maxconn = settings["maxconn"] if maxconn is None else maxconn
+                timeout = settings["timeout"] if timeout is None else timeout
                 try:
                     logger.info(
                         f"创建新的连接池: {pool_key} (min={minconn}, max={maxconn})"
                     )
-                    cls._pools[pool_key] = pool.ThreadedConnectionPool(
+                    cls._pools[pool_key] = ConnectionPool(
                         minconn=minconn,
                         maxconn=maxconn,
+                        timeout=timeout,
+                        max_lifetime=settings["max_lifetime"],
+                        max_idle=settings["max_idle"],
+                        ping_after=settings["ping_after"],
+                        warm_up_statements=WARM_UP_STATEMENTS,
                         host=database_config.get("host", "localhost"),
                         port=database_config.get("port", 5432),
                         database=database_config.get("database"),
@@ -69,33 +792,126 @@ class ConnectionPoolManager:
 
             return cls._pools[pool_key]
 
+    @classmethod
+    def warm_up(
+        cls,
+        database_config: Dict[str, Any],
+        workloads: Sequence[str] = WORKLOADS,
+    ) -> Dict[str, int]:
+        """
+        创建各负载类型的连接池并预先打开minconn个连接（服务启动时在后台调用）
+
+        Args:
+            database_config: 数据库配置字典
+            workloads: 需要预热的负载类型
+
+        Returns:
+            {负载类型: 新创建的连接数}（含只读副本上的连接）
+        """
+        opened = {
+            workload: cls.get_pool(database_config, workload=workload).prefill()
+            for workload in workloads
+        }
+        router = cls._routers.get(cls._database_key(database_config))
+        if router is not None:
+            for replica in router.replicas:
+                for workload in workloads:
+                    if workload == "import":
+                        continue
+                    try:
+                        opened[workload] += cls.get_pool(
+                            replica.config, workload=workload
+                        ).prefill()
+                    except Exception as e:
+                        router.mark_down(replica.config, e)
+                        break
+        return opened
+
     @classmethod
     def get_connection(
-        cls, database_config: Dict[str, Any], pool_key: Optional[str] = None
+        cls,
+        database_config: Dict[str, Any],
+        pool_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        workload: str = DEFAULT_WORKLOAD,
+        read_only: bool = False,
     ) -> psycopg2.extensions.connection:
         """
-        从连接池获取连接
+        从连接池获取连接（连接用尽时排队等待）
 
         Args:
             database_config: 数据库配置字典
             pool_key: 连接池键（可选）
+            timeout: 等待超时时间（秒，可选），默认使用连接池的设置
+            workload: 负载类型（metadata、analytics、import）
+            read_only: 只读调用，配置了只读副本时取副本的连接
+                （副本连接失败或等待超时时改用主库）
 
         Returns:
             数据库连接
         """
-        connection_pool = cls.get_pool(database_config, pool_key=pool_key)
+        replica = cls._route(database_config, workload) if read_only else None
+        if replica is not None and pool_key is None:
+            connection_pool = cls.get_pool(replica, workload=workload)
+            try:
+                conn = connection_pool.getconn(timeout)
+            except PoolTimeout:
+                # 副本连接池已满，本次改用主库（副本仍参与后续路由）
+                cls._replica_busy(database_config)
+            except Exception as e:
+                cls._replica_failed(database_config, replica, e)
+            else:
+                return cls._prepare(connection_pool, conn)
+
+        connection_pool = cls.get_pool(
+            database_config, pool_key=pool_key, workload=workload
+        )
+        conn = connection_pool.getconn(timeout)
+        return cls._prepare(connection_pool, conn)
 
+    @classmethod
+    async def aget_connection(
+        cls,
+        database_config: Dict[str, Any],
+        pool_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        workload: str = DEFAULT_WORKLOAD,
+        read_only: bool = False,
+    ) -> psycopg2.extensions.connection:
+        """get_connection的异步版本，排队等待时不阻塞事件循环"""
+        replica = cls._route(database_config, workload) if read_only else None
+        if replica is not None and pool_key is None:
+            connection_pool = cls.get_pool(replica, workload=workload)
+            try:
+                conn = await connection_pool.agetconn(timeout)
+            except PoolTimeout:
+                # 副本连接池已满，本次改用主库（副本仍参与后续路由）
+                cls._replica_busy(database_config)
+            except Exception as e:
+                cls._replica_failed(database_config, replica, e)
+            else:
+                return cls._prepare(connection_pool, conn)
+
+        connection_pool = cls.get_pool(
+            database_config, pool_key=pool_key, workload=workload
+        )
+        conn = await connection_pool.agetconn(timeout)
+        return cls._prepare(connection_pool, conn)
+
+    @classmethod
+    def _prepare(cls, connection_pool: ConnectionPool, conn):
+        """确认连接编码并记录所属连接池，失败时丢弃连接"""
         try:
-            conn = connection_pool.getconn()
-            if conn:
-                # 设置连接编码
-                with conn.cursor() as cur:
-                    cur.execute("SET client_encoding TO 'UTF8';")
-                conn.commit()
-            return conn
-        except pool.PoolError as e:
+            # 连接创建时已指定UTF8，只有被会话中的SET修改过才需要往返数据库
+            if conn.encoding != "UTF8":
+                conn.set_client_encoding("UTF8")
+        except Exception as e:
+            connection_pool.putconn(conn, close=True)
             logger.error(f"从连接池获取连接失败: {e}")
             raise ConnectionError(f"无法从连接池获取连接: {e}") from e
+        with cls._lock:
+            cls._owners[conn] = connection_pool
+        return conn
 
     @classmethod
     def put_connection(
@@ -110,18 +926,18 @@ class ConnectionPoolManager:
         Args:
             conn: 数据库连接
             database_config: 数据库配置字典
-            pool_key: 连接池键（可选）
+            pool_key: 连接池键（可选），默认归还到获取该连接的连接池
         """
-        if pool_key is None:
-            pool_key = (
-                f"{database_config.get('host', 'localhost')}:"
-                f"{database_config.get('port', 5432)}/"
-                f"{database_config.get('database', '')}"
-            )
+        with cls._lock:
+            connection_pool = cls._owners.pop(conn, None)
+            if pool_key is not None or connection_pool is None:
+                connection_pool = cls._pools.get(
+                    pool_key or cls._pool_key(database_config)
+                )
 
-        if pool_key in cls._pools:
+        if connection_pool is not None:
             try:
-                cls._pools[pool_key].putconn(conn)
+                connection_pool.putconn(conn)
             except Exception as e:
                 logger.warning(f"归还连接到池失败: {e}")
                 # 如果归还失败，尝试关闭连接
@@ -130,10 +946,87 @@ class ConnectionPoolManager:
                 except Exception:
                     pass
 
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有连接池的统计（含等待次数、等待时间、超时次数和使用率）
+
+        Returns:
+            {连接池键: 统计信息}，连接池键以 #负载类型 结尾
+        """
+        with cls._lock:
+            pools = dict(cls._pools)
+        stats = {}
+        for key, connection_pool in pools.items():
+            pool_stats = connection_pool.get_stats()
+            # 调用方自定义的pool_key不属于任何负载类型
+            pool_stats["workload"] = key.rpartition("#")[2] if "#" in key else None
+            pool_stats["utilization"] = round(
+                pool_stats["in_use"] / pool_stats["maxconn"], 4
+            )
+            stats[key] = pool_stats
+        return stats
+
+    @classmethod
+    def get_workload_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        按负载类型汇总连接池使用情况（所有数据库合计）
+
+        Returns:
+            {负载类型: {pools, maxconn, size, in_use, idle, waiting, waits,
+            timeouts, wait_time_total, utilization}}
+        """
+        summary = {
+            workload: {
+                "pools": 0,
+                "maxconn": 0,
+                "size": 0,
+                "in_use": 0,
+                "idle": 0,
+                "waiting": 0,
+                "waits": 0,
+                "timeouts": 0,
+                "wait_time_total": 0.0,
+            }
+            for workload in WORKLOADS
+        }
+        for pool_stats in cls.get_stats().values():
+            totals = summary.get(pool_stats["workload"])
+            if totals is None:
+                continue
+            totals["pools"] += 1
+            for name in totals:
+                if name != "pools":
+                    totals[name] += pool_stats[name]
+        for totals in summary.values():
+            totals["wait_time_total"] = round(totals["wait_time_total"], 6)
+            totals["utilization"] = (
+                round(totals["in_use"] / totals["maxconn"], 4)
+                if totals["maxconn"]
+                else 0.0
+            )
+        return summary
+
+    @classmethod
+    def get_replica_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        获取只读副本路由统计
+
+        Returns:
+            {主库: {max_lag, fallbacks, replicas: [{name, available, lag, error,
+            checked_at, routed}]}}
+        """
+        with cls._lock:
+            routers = dict(cls._routers)
+        return {key: router.get_stats() for key, router in routers.items()}
+
     @classmethod
     def close_all_pools(cls) -> None:
         """关闭所有连接池"""
         with cls._lock:
+            for router in cls._routers.values():
+                router.close()
+            cls._routers.clear()
             for pool_key, connection_pool in cls._pools.items():
                 try:
                     logger.info(f"关闭连接池: {pool_key}")
@@ -141,3 +1034,4 @@ class ConnectionPoolManager:
                 except Exception as e:
                     logger.error(f"关闭连接池 {pool_key} 失败: {e}")
             cls._pools.clear()
+            cls._owners.clear()
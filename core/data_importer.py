@@ -2,6 +2,7 @@
 数据导入器：核心数据导入逻辑
 """
 
+import asyncio
 import psycopg2
 import re
 from pathlib import Path
@@ -9,35 +10,116 @@ from typing import Dict, Any, Optional
 import time
 
 from .spec_loader import SpecLoader
-from .connection_pool import ConnectionPoolManager
+from .connection_pool import DEFAULT_WORKLOAD, ConnectionPoolManager
 from .table_validator import TableValidator
 from .logging_config import get_logger
 from .cache_manager import cached, get_cache_manager
-from .performance_monitor import monitor_performance
+from .performance_monitor import get_performance_monitor, monitor_performance
+from .import_profiler import ImportProfiler
+from .query_cache import QueryResultCache, is_cacheable_sql, normalize_sql
+from .data_version import DATA_VERSION_TABLE, DataVersionTracker
+from .prepared_statements import get_statement_cache
+from .schema_cache import SchemaCache
+
+# 导入隔离表名（与gdb_importer.QUARANTINE_TABLE一致，避免在此导入fiona）
+QUARANTINE_TABLE = "import_quarantine"
 
 logger = get_logger(__name__)
 
 
+def _global_data_version(self, database_config=None, **kwargs) -> Optional[int]:
+    """@cached的版本函数：全库数据版本（未知时为None，本次调用不使用缓存）"""
+    return self.get_data_version(database_config)
+
+
 class DataImporter:
     """数据导入器"""
 
-    def __init__(self, use_connection_pool: bool = True, use_cache: bool = True):
+    def __init__(
+        self,
+        use_connection_pool: bool = True,
+        use_cache: bool = True,
+        query_cache: bool = False,
+        query_cache_ttl: int = 3600,
+        query_cache_max_entry_bytes: int = 2 * 1024 * 1024,
+        query_cache_persist_seconds: Optional[float] = 1.0,
+        disk_cache_dir: Optional[str] = None,
+        disk_cache_max_bytes: int = 256 * 1024 * 1024,
+        config_manager=None,
+    ):
         """
         初始化数据导入器
 
         Args:
             use_connection_pool: 是否使用连接池，默认True
             use_cache: 是否使用缓存，默认True
+            query_cache: 是否缓存query_data/execute_sql的查询结果，默认False
+            query_cache_ttl: 查询结果最长缓存时间（秒），导入数据后提前失效
+            query_cache_max_entry_bytes: 单条查询结果的最大缓存大小（字节）
+            query_cache_persist_seconds: 耗时超过该值（秒）的查询结果同时写入磁盘
+                缓存，None表示不持久化查询结果
+            disk_cache_dir: 磁盘缓存目录（可选），元数据和耗时查询的结果持久化到
+                该目录，进程重启后仍可命中
+            disk_cache_max_bytes: 磁盘缓存总大小上限（字节）
+            config_manager: 配置管理器（可选），用于读取默认数据库配置，
+                不提供时首次使用时创建
         """
         self.spec_loader = SpecLoader()
         self.default_srid = 4326
         self.use_connection_pool = use_connection_pool
         self.use_cache = use_cache
+        self._config_manager = config_manager
+        # 热点元数据查询和查询模板使用预编译语句
+        self.statements = get_statement_cache()
+        # 数据版本（导入程序递增），缓存键包含数据版本
+        self.data_versions = DataVersionTracker(
+            self._get_connection, self._put_connection
+        )
+        # 表结构缓存，数据版本变化时失效
+        self.schema_cache = SchemaCache()
+        self.data_versions.add_callback(self.schema_cache.invalidate)
         if use_cache:
-            self.cache_manager = get_cache_manager()
+            self.cache_manager = get_cache_manager(
+                disk_cache_dir=disk_cache_dir,
+                disk_cache_max_bytes=disk_cache_max_bytes,
+            )
         else:
             self.cache_manager = None
 
+        self.query_cache: Optional[QueryResultCache] = None
+        if use_cache and query_cache:
+            self.query_cache = QueryResultCache(
+                self.cache_manager,
+                ttl=query_cache_ttl,
+                max_entry_bytes=query_cache_max_entry_bytes,
+                persist_seconds=query_cache_persist_seconds,
+            )
+            # 查询历史保存到磁盘缓存，重启后的启动预热仍能选出常用查询
+            if self.cache_manager.disk is not None:
+                get_performance_monitor().set_history_store(self.cache_manager.disk)
+
+    def get_data_version(
+        self,
+        database_config: Optional[Dict[str, Any]] = None,
+        table_name: Optional[str] = None,
+        wait: bool = False,
+    ) -> Optional[int]:
+        """
+        获取数据版本（缓存键的一部分，导入数据后变化）
+
+        Args:
+            database_config: 数据库配置
+            table_name: 表名（可选），提供时返回该表的版本
+            wait: 尚未读取过该数据库时是否同步读取目录表（阻塞，只在工作线程中
+                使用），默认False
+
+        Returns:
+            数据版本；尚未读取过该数据库且不等待时为None（调用方不使用缓存）
+        """
+        if not database_config:
+            database_config = self._get_default_config()
+        return self.data_versions.get_version(database_config, table_name, wait)
+
     async def import_data(
         self,
         data_path: str,
@@ -52,7 +134,10 @@ class DataImporter:
             data_path: 数据文件或目录路径
             spec_name: 数据规格名称（可选）
             database_config: 数据库配置
-            options: 导入选项
+            options: 导入选项（srid、batch_size、skip_invalid、create_indexes、
+                profile 是否统计各阶段耗时、profile_trace_path Chrome Trace输出路径、
+                pipeline 是否流水线导入、pipeline_workers 几何处理进程数、
+                pipeline_queue_size 流水线队列容量、inventory_cache_dir 图层清单缓存目录）
 
         Returns:
             导入结果字典
@@ -77,8 +162,23 @@ class DataImporter:
         skip_invalid = options.get("skip_invalid", True)
         create_indexes = options.get("create_indexes", True)
 
+        # 导入阶段剖析（默认关闭）
+        profiler = None
+        if options.get("profile", False) or options.get("profile_trace_path"):
+            profiler = ImportProfiler(
+                enabled=True, trace_path=options.get("profile_trace_path")
+            )
+
+        # 流水线导入（读取、几何处理、写入并行，默认关闭）
+        importer_options = {
+            "pipeline": options.get("pipeline", False),
+            "pipeline_workers": options.get("pipeline_workers", 0),
+            "queue_size": options.get("pipeline_queue_size", 4),
+            "inventory_cache_dir": options.get("inventory_cache_dir"),
+        }
+
         # 连接数据库
-        conn = self._get_connection(database_config)
+        conn = await self._aget_connection(database_config, workload="import")
 
         try:
             # 确保PostGIS扩展已安装
@@ -92,15 +192,51 @@ class DataImporter:
 
             # 导入GDB数据到PostgreSQL
             result = await self._import_gdb(
-                data_path, spec, conn, srid, batch_size, skip_invalid, create_indexes
+                data_path,
+                spec,
+                conn,
+                srid,
+                batch_size,
+                skip_invalid,
+                create_indexes,
+                profiler=profiler,
+                importer_options=importer_options,
             )
 
+            get_performance_monitor().record_import(
+                sum(result.get("table_stats", {}).values()),
+                result.get("total_time_seconds", 0.0),
+            )
             return result
 
         finally:
-            conn.close()
-
+            self._put_connection(conn, database_config)
+            # 导入程序已递增数据版本，重新读取后缓存键随之变化（在工作线程中读取，
+            # 导入返回后的查询即使用新版本）；旧版本的条目不会再被访问，提前清除以释放空间
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    self.data_versions.refresh,
+                    database_config or self._get_default_config(),
+                )
+            except Exception as e:
+                logger.warning(f"重新读取数据版本失败: {e}")
+            if self.cache_manager is not None:
+                await self.cache_manager.aclear("list_tables")
+                await self.cache_manager.aclear("list_tile_codes")
+                await self.cache_manager.aclear("verify_data")
+
+    # 逐表统计开销大，结果持久化到磁盘缓存（配置了磁盘缓存目录时）
+    # 缓存键包含数据版本，数据变化后立即失效，因此使用较长的TTL；
+    # 耗时统计在缓存之外，命中缓存的调用同样计入延迟分位数
     @monitor_performance("verify_data")
+    @cached(
+        prefix="verify_data",
+        ttl=86400,
+        refresh_after=3600,
+        persist=True,
+        version=_global_data_version,
+    )
     async def verify_data(
         self,
         table_name: Optional[str] = None,
@@ -119,7 +255,8 @@ class DataImporter:
         if not database_config:
             database_config = self._get_default_config()
 
-        conn = self._get_connection(database_config)
+        # 通常紧接导入调用，使用主库（副本可能尚未回放刚导入的数据）
+        conn = await self._aget_connection(database_config, workload="analytics")
 
         try:
             with conn.cursor() as cur:
@@ -129,14 +266,17 @@ class DataImporter:
                     tables = [table_name]
                 else:
                     # 获取所有表
-                    cur.execute(
+                    self.statements.execute(
+                        cur,
                         """
                         SELECT table_name 
                         FROM information_schema.tables 
                         WHERE table_schema = 'public' 
                           AND table_type = 'BASE TABLE'
+                          AND table_name NOT IN (%s, %s)
                         ORDER BY table_name;
-                    """
+                    """,
+                        (QUARANTINE_TABLE, DATA_VERSION_TABLE),
                     )
                     tables = [row[0] for row in cur.fetchall()]
 
@@ -157,7 +297,7 @@ class DataImporter:
         finally:
             self._put_connection(conn, database_config)
 
-    @monitor_performance("query_data")
+    @monitor_performance("query_data", detail_arg="table_name")
     async def query_data(
         self,
         table_name: str,
@@ -166,6 +306,7 @@ class DataImporter:
         limit: int = 100,
         database_config: Optional[Dict[str, Any]] = None,
         timeout: int = 30,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         查询地理数据（优化版本：批量转换几何对象）
@@ -177,6 +318,7 @@ class DataImporter:
             limit: 返回记录数限制
             database_config: 数据库配置
             timeout: 查询超时时间（秒），默认30秒
+            use_cache: 启用查询缓存时是否使用缓存结果，默认True
 
         Returns:
             查询结果字典
@@ -184,36 +326,64 @@ class DataImporter:
         if not database_config:
             database_config = self._get_default_config()
 
-        # 验证表名（防止SQL注入）
-        conn = self._get_connection(database_config)
-        try:
-            table_name = TableValidator.validate_table_name(table_name, conn)
-        finally:
-            self._put_connection(conn, database_config)
+        def run():
+            return self._run_query_data(
+                table_name,
+                spatial_filter,
+                attribute_filter,
+                limit,
+                database_config,
+                timeout,
+            )
 
-        # 重新获取连接用于查询
-        conn = self._get_connection(database_config)
+        # 查询结果缓存（SQL由参数确定，按参数生成缓存键，避免先查询列信息）
+        if self.query_cache is not None and use_cache:
+            data_version = self.get_data_version(database_config, table_name)
+        else:
+            data_version = None
+        # 数据版本未知（后台尚未读取到目录表）时不使用缓存
+        if data_version is not None:
+            cache_key = self.query_cache.make_key(
+                "query_data",
+                {
+                    "table_name": table_name,
+                    "spatial_filter": spatial_filter,
+                    "attribute_filter": attribute_filter,
+                    "limit": limit,
+                },
+                database_config=database_config,
+                data_version=data_version,
+            )
+            return await self.query_cache.get_or_compute(cache_key, run)
+
+        return await run()
+
+    async def _run_query_data(
+        self,
+        table_name: str,
+        spatial_filter: Optional[Dict[str, Any]],
+        attribute_filter: Optional[Dict[str, Any]],
+        limit: int,
+        database_config: Dict[str, Any],
+        timeout: int,
+    ) -> Dict[str, Any]:
+        """执行query_data查询（不使用查询缓存）"""
+        # 验证表名格式（防止SQL注入），表是否存在由表结构缓存确认
+        table_name = TableValidator.check_format(table_name)
+
+        conn = await self._aget_connection(
+            database_config, workload="analytics", read_only=True
+        )
 
         try:
-            # 设置查询超时
-            with conn.cursor() as cur:
-                cur.execute(f"SET statement_timeout = {timeout * 1000}")  # 毫秒
-                conn.commit()
+            # 表结构缓存命中时只有一次数据库往返（超时设置与查询一起发送）
+            schema = self.schema_cache.get_table(database_config, table_name, conn)
+            if schema is None:
+                raise ValueError(f"表不存在: {table_name}")
+            all_columns = schema.column_names
 
             with conn.cursor() as cur:
                 # 构建查询SQL，一次性转换所有几何对象（性能优化）
-                # 获取所有列名
-                cur.execute(
-                    """
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_schema = 'public' 
-                      AND table_name = %s
-                    ORDER BY ordinal_position
-                    """,
-                    (table_name,),
-                )
-                all_columns = [row[0] for row in cur.fetchall()]
 
                 # 构建SELECT语句，包含几何转换
                 select_fields = []
@@ -244,6 +414,8 @@ class DataImporter:
                         # 验证属性名（防止SQL注入）
                         if not TableValidator.TABLE_NAME_PATTERN.match(key):
                             raise ValueError(f"无效的属性名: {key}")
+                        if key not in all_columns:
+                            raise ValueError(f"表 {table_name} 中不存在字段: {key}")
                         sql += f" AND {key} = %s"
                         params.append(value)
 
@@ -251,7 +423,13 @@ class DataImporter:
                 params.append(limit)
 
                 start_time = time.time()
-                cur.execute(sql, params)
+                # SET LOCAL只作用于本次事务，不会遗留在归还连接池的连接上
+                self.statements.execute(
+                    cur,
+                    sql,
+                    params,
+                    setup=f"SET LOCAL statement_timeout = {int(timeout * 1000)}",
+                )
                 columns = [desc[0] for desc in cur.description]
                 rows = cur.fetchall()
                 query_time = time.time() - start_time
@@ -289,6 +467,10 @@ class DataImporter:
 
         except psycopg2.errors.QueryCanceled:
             raise ValueError(f"查询超时（超过{timeout}秒）")
+        except (psycopg2.errors.UndefinedTable, psycopg2.errors.UndefinedColumn):
+            # 表结构在导入程序之外被修改，下次调用重新加载
+            self.schema_cache.invalidate(database_config)
+            raise
         except psycopg2.OperationalError as e:
             logger.error(f"查询失败: {e}", exc_info=True)
             raise ConnectionError(f"数据库操作失败: {e}") from e
@@ -300,19 +482,25 @@ class DataImporter:
 
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认数据库配置"""
-        from .config_manager import ConfigManager
+        if self._config_manager is None:
+            from .config_manager import ConfigManager
 
-        config_manager = ConfigManager()
-        return config_manager.get_default_database_config()
+            self._config_manager = ConfigManager()
+        return self._config_manager.get_default_database_config()
 
     def _get_connection(
-        self, database_config: Optional[Dict[str, Any]] = None
+        self,
+        database_config: Optional[Dict[str, Any]] = None,
+        workload: str = DEFAULT_WORKLOAD,
+        read_only: bool = False,
     ) -> psycopg2.extensions.connection:
         """
         获取数据库连接（支持连接池）
 
         Args:
             database_config: 数据库配置，如果为None则使用默认配置
+            workload: 负载类型（metadata、analytics、import），决定使用的连接池
+            read_only: 只读调用，配置了只读副本时使用副本的连接
 
         Returns:
             数据库连接
@@ -321,13 +509,43 @@ class DataImporter:
             database_config = self._get_default_config()
 
         if self.use_connection_pool:
+            # 连接池满时排队等待（超时抛出PoolTimeout），不另开直接连接，
+            # 避免突发负载下连接数失控
             try:
-                return ConnectionPoolManager.get_connection(database_config)
-            except Exception as e:
-                logger.warning(f"从连接池获取连接失败，使用直接连接: {e}")
-                # 如果连接池失败，回退到直接连接
+                return ConnectionPoolManager.get_connection(
+                    database_config, workload=workload, read_only=read_only
+                )
+            except psycopg2.Error as e:
+                logger.error(f"从连接池获取连接失败: {e}")
+                raise ConnectionError(f"无法连接到数据库: {e}") from e
+
+        return self._direct_connection(database_config)
+
+    async def _aget_connection(
+        self,
+        database_config: Optional[Dict[str, Any]] = None,
+        workload: str = DEFAULT_WORKLOAD,
+        read_only: bool = False,
+    ) -> psycopg2.extensions.connection:
+        """_get_connection的异步版本，连接池满时排队等待不阻塞事件循环"""
+        if not database_config:
+            database_config = self._get_default_config()
+
+        if self.use_connection_pool:
+            try:
+                return await ConnectionPoolManager.aget_connection(
+                    database_config, workload=workload, read_only=read_only
+                )
+            except psycopg2.Error as e:
+                logger.error(f"从连接池获取连接失败: {e}")
+                raise ConnectionError(f"无法连接到数据库: {e}") from e
+
+        return self._direct_connection(database_config)
 
-        # 直接连接（不使用连接池）
+    def _direct_connection(
+        self, database_config: Dict[str, Any]
+    ) -> psycopg2.extensions.connection:
+        """直接连接（不使用连接池）"""
         try:
             conn = psycopg2.connect(
                 host=database_config.get("host", "localhost"),
@@ -409,15 +627,15 @@ class DataImporter:
         batch_size: int,
         skip_invalid: bool,
         create_indexes: bool,
+        profiler: Optional[ImportProfiler] = None,
+        importer_options: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """导入GDB文件"""
         # 这里复用原有的导入逻辑，但使用规格配置
         from .gdb_importer import GDBImporter
 
-        importer = GDBImporter(spec)
+        importer = GDBImporter(spec, profiler=profiler, **(importer_options or {}))
         # 在事件循环中运行同步代码
-        import asyncio
-
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
             None,
@@ -426,8 +644,15 @@ class DataImporter:
             ),
         )
 
-    @cached(prefix="list_tables", ttl=600)  # 缓存10分钟
+    # 缓存键包含数据版本，导入后立即失效；1小时后后台刷新（应对未经导入程序的修改）
     @monitor_performance("list_tables")
+    @cached(
+        prefix="list_tables",
+        ttl=86400,
+        refresh_after=3600,
+        persist=True,
+        version=_global_data_version,
+    )
     async def list_tables(
         self, database_config: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -440,48 +665,41 @@ class DataImporter:
         Returns:
             表列表字典
         """
-        conn = self._get_connection(database_config)
+        if not database_config:
+            database_config = self._get_default_config()
 
-        try:
-            with conn.cursor() as cur:
-                # 查找所有包含geom字段的表（PostGIS表）
-                cur.execute(
-                    """
-                    SELECT 
-                        t.table_name,
-                        (SELECT COUNT(*) FROM information_schema.columns 
-                         WHERE table_schema = 'public' 
-                         AND table_name = t.table_name 
-                         AND column_name = 'geom') as has_geom
-                    FROM information_schema.tables t
-                    WHERE t.table_schema = 'public' 
-                      AND t.table_type = 'BASE TABLE'
-                    ORDER BY t.table_name;
-                """
-                )
+        conn = await self._aget_connection(database_config, read_only=True)
 
-                all_tables = cur.fetchall()
+        try:
+            # 查找所有包含geom字段的表（PostGIS表），表结构来自缓存
+            schemas = self.schema_cache.get_tables(database_config, conn)
 
-                # 过滤出有geom字段的表
+            with conn.cursor() as cur:
                 geo_tables = []
-                for table_name, has_geom in all_tables:
-                    if has_geom > 0:
+                for table_name in sorted(schemas):
+                    if "geom" in schemas[table_name].column_names:
                         # 获取记录数
                         try:
-                            cur.execute(f"SELECT COUNT(*) FROM {table_name};")
+                            self.statements.execute(
+                                cur, f"SELECT COUNT(*) FROM {table_name};"
+                            )
                             count = cur.fetchone()[0]
 
-                            # 获取SRID
-                            cur.execute(
-                                f"""
-                                SELECT DISTINCT ST_SRID(geom) as srid
-                                FROM {table_name}
-                                WHERE geom IS NOT NULL
-                                LIMIT 1;
-                            """
-                            )
-                            srid_result = cur.fetchone()
-                            srid = srid_result[0] if srid_result else None
+                            # 获取SRID（字段类型声明了SRID时无需查询数据）
+                            geometry = schemas[table_name].geometry_columns
+                            srid = geometry.get("geom", {}).get("srid")
+                            if srid is None:
+                                self.statements.execute(
+                                    cur,
+                                    f"""
+                                    SELECT DISTINCT ST_SRID(geom) as srid
+                                    FROM {table_name}
+                                    WHERE geom IS NOT NULL
+                                    LIMIT 1;
+                                """,
+                                )
+                                srid_result = cur.fetchone()
+                                srid = srid_result[0] if srid_result else None
 
                             # 获取表的用途信息
                             table_info = self._get_table_info(table_name)
@@ -502,10 +720,17 @@ class DataImporter:
                 return {"tables": geo_tables, "total": len(geo_tables)}
 
         finally:
-            conn.close()
+            self._put_connection(conn, database_config)
 
-    @cached(prefix="list_tile_codes", ttl=600)  # 缓存10分钟
+    # 缓存键包含数据版本，导入后立即失效；1小时后后台刷新（应对未经导入程序的修改）
     @monitor_performance("list_tile_codes")
+    @cached(
+        prefix="list_tile_codes",
+        ttl=86400,
+        refresh_after=3600,
+        persist=True,
+        version=_global_data_version,
+    )
     async def list_tile_codes(
         self, database_config: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -521,23 +746,23 @@ class DataImporter:
         if not database_config:
             database_config = self._get_default_config()
 
-        conn = self._get_connection(database_config)
+        conn = await self._aget_connection(database_config, read_only=True)
 
         try:
-            with conn.cursor() as cur:
-                # 查找所有包含tile_code字段的表
-                cur.execute(
-                    """
-                    SELECT DISTINCT table_name
-                    FROM information_schema.columns
-                    WHERE table_schema = 'public' 
-                      AND column_name = 'tile_code'
-                      AND table_name NOT IN ('spatial_ref_sys', 'geometry_columns')
-                    ORDER BY table_name;
-                """
+            # 查找所有包含tile_code字段的表，表结构来自缓存（表已确认存在，
+            # 只需检查表名格式防止SQL注入，不再逐表查询数据库）
+            excluded = {"spatial_ref_sys", QUARANTINE_TABLE, DATA_VERSION_TABLE}
+            tables_with_tile_code = [
+                table_name
+                for table_name, schema in sorted(
+                    self.schema_cache.get_tables(database_config, conn).items()
                 )
+                if table_name not in excluded
+                and "tile_code" in schema.column_names
+                and TableValidator.TABLE_NAME_PATTERN.match(table_name)
+            ]
 
-                tables_with_tile_code = [row[0] for row in cur.fetchall()]
+            with conn.cursor() as cur:
 
                 if not tables_with_tile_code:
                     return {
@@ -552,18 +777,15 @@ class DataImporter:
 
                 for table_name in tables_with_tile_code:
                     try:
-                        # 验证表名后使用（防止SQL注入）
-                        validated_table = TableValidator.validate_table_name(
-                            table_name, conn
-                        )
-                        cur.execute(
+                        self.statements.execute(
+                            cur,
                             f"""
                             SELECT DISTINCT tile_code, COUNT(*) as count
-                            FROM {validated_table}
+                            FROM {table_name}
                             WHERE tile_code IS NOT NULL
                             GROUP BY tile_code
                             ORDER BY tile_code;
-                        """
+                        """,
                         )
 
                         for tile_code, count in cur.fetchall():
@@ -594,12 +816,14 @@ class DataImporter:
         finally:
             self._put_connection(conn, database_config)
 
-    @monitor_performance("execute_sql")
+    @monitor_performance("execute_sql", detail_arg="sql")
     async def execute_sql(
         self,
         sql: str,
         database_config: Optional[Dict[str, Any]] = None,
         timeout: int = 30,
+        use_cache: bool = True,
+        record_history: bool = True,
     ) -> Dict[str, Any]:
         """
         执行SQL查询（带超时和错误处理）
@@ -608,6 +832,8 @@ class DataImporter:
             sql: SQL语句
             database_config: 数据库配置
             timeout: 查询超时时间（秒），默认30秒
+            use_cache: 启用查询缓存时是否使用缓存结果，默认True
+            record_history: 是否计入查询历史（启动预热按历史选出常用查询），默认True
 
         Returns:
             查询结果字典
@@ -650,19 +876,56 @@ class DataImporter:
         if sql_clean.count("JOIN") > 5:
             logger.warning("查询包含多个JOIN操作，可能较慢")
 
+        # 只记录默认数据库上的查询（预热使用默认数据库）
+        record_history = record_history and not database_config
         if not database_config:
             database_config = self._get_default_config()
 
-        conn = self._get_connection(database_config)
+        # 查询结果缓存（按规范化SQL，含易变函数或依赖会话、系统目录的查询不缓存）
+        if self.query_cache is not None and use_cache:
+            normalized = normalize_sql(sql)
+            # 数据版本未知（后台尚未读取到目录表）时不使用缓存
+            data_version = (
+                self.get_data_version(database_config)
+                if is_cacheable_sql(normalized)
+                else None
+            )
+            if data_version is not None:
+                cache_key = self.query_cache.make_key(
+                    "execute_sql",
+                    normalized,
+                    database_config=database_config,
+                    data_version=data_version,
+                )
+                start_time = time.time()
+                result = await self.query_cache.get_or_compute(
+                    cache_key, lambda: self._run_sql(sql, database_config, timeout)
+                )
+                if record_history:
+                    # 按规范化SQL合并计数，保存原始SQL供预热原样执行
+                    get_performance_monitor().record_statement(
+                        "execute_sql",
+                        sql,
+                        time.time() - start_time,
+                        key=normalized,
+                    )
+                return result
 
-        try:
-            # 设置查询超时
-            with conn.cursor() as cur:
-                cur.execute(f"SET statement_timeout = {timeout * 1000}")  # 毫秒
-                conn.commit()
+        return await self._run_sql(sql, database_config, timeout)
+
+    async def _run_sql(
+        self, sql: str, database_config: Dict[str, Any], timeout: int
+    ) -> Dict[str, Any]:
+        """执行已通过安全检查的SQL（不使用查询缓存）"""
+        conn = await self._aget_connection(
+            database_config, workload="analytics", read_only=True
+        )
 
-            start_time = time.time()
+        try:
             with conn.cursor() as cur:
+                # SET LOCAL只作用于本次事务，归还连接池时回滚，不会遗留在连接上
+                cur.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+                start_time = time.time()
                 cur.execute(sql)
 
                 # 获取列名
@@ -781,29 +1044,32 @@ class DataImporter:
             "srid": None,
             "bbox": None,
             "invalid_geometries": 0,
+            "quarantined_geometries": 0,
             "columns": [],
         }
 
         try:
             # 记录数
-            cur.execute(f"SELECT COUNT(*) FROM {table_name};")
+            self.statements.execute(cur, f"SELECT COUNT(*) FROM {table_name};")
             result["record_count"] = cur.fetchone()[0]
 
             # 坐标系
-            cur.execute(
+            self.statements.execute(
+                cur,
                 f"""
                 SELECT DISTINCT ST_SRID(geom) as srid
                 FROM {table_name}
                 WHERE geom IS NOT NULL
                 LIMIT 1;
-            """
+            """,
             )
             srid_result = cur.fetchone()
             if srid_result:
                 result["srid"] = srid_result[0]
 
             # 空间范围
-            cur.execute(
+            self.statements.execute(
+                cur,
                 f"""
                 SELECT 
                     ST_XMin(ST_Extent(geom)) as xmin,
@@ -812,7 +1078,7 @@ class DataImporter:
                     ST_YMax(ST_Extent(geom)) as ymax
                 FROM {table_name}
                 WHERE geom IS NOT NULL;
-            """
+            """,
             )
             bbox = cur.fetchone()
             if bbox:
@@ -824,18 +1090,32 @@ class DataImporter:
                 }
 
             # 无效几何
-            cur.execute(
+            self.statements.execute(
+                cur,
                 f"""
                 SELECT COUNT(*) 
                 FROM {table_name}
                 WHERE geom IS NOT NULL 
                   AND NOT ST_IsValid(geom);
-            """
+            """,
             )
             result["invalid_geometries"] = cur.fetchone()[0]
 
+            # 导入时被隔离的要素（无法修复或无法插入）
+            self.statements.execute(
+                cur, "SELECT to_regclass(%s);", (f"public.{QUARANTINE_TABLE}",)
+            )
+            if cur.fetchone()[0]:
+                self.statements.execute(
+                    cur,
+                    f"SELECT COUNT(*) FROM public.{QUARANTINE_TABLE} WHERE table_name = %s;",
+                    (table_name,),
+                )
+                result["quarantined_geometries"] = cur.fetchone()[0]
+
             # 字段信息（包含字段说明）
-            cur.execute(
+            self.statements.execute(
+                cur,
                 """
                 SELECT column_name, data_type
                 FROM information_schema.columns
@@ -0,0 +1,411 @@
+"""
+数据版本模块
+在数据库目录表中为每个表/图幅维护单调递增的数据版本，导入程序写入数据后递增
+并通过LISTEN/NOTIFY通知服务进程。缓存键包含数据版本，数据变化后立即失效，
+因此缓存可以使用较长的TTL
+"""
+
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import psycopg2
+
+from .cache_manager import dsn_fingerprint
+from .logging_config import get_logger
+from .prepared_statements import get_statement_cache, register_startup_statement
+
+logger = get_logger(__name__)
+
+DATA_VERSION_TABLE = "data_versions"
+DATA_VERSION_CHANNEL = "geodata_data_version"
+
+# 版本号取 max(原版本 + 1, 当前微秒时间戳)：重建目录表（如重置数据库）后仍大于旧版本
+_BUMP_SQL = f"""
+INSERT INTO public.{DATA_VERSION_TABLE} (table_name, tile_code, version, updated_at)
+VALUES (%s, %s, (EXTRACT(EPOCH FROM clock_timestamp()) * 1000000)::BIGINT, now())
+ON CONFLICT (table_name, tile_code) DO UPDATE SET
+    version = GREATEST(
+        {DATA_VERSION_TABLE}.version + 1,
+        (EXTRACT(EPOCH FROM clock_timestamp()) * 1000000)::BIGINT
+    ),
+    updated_at = now()
+"""
+
+# 读取数据版本的语句（每次重新读取快照时执行，服务启动时预编译）
+_TABLE_EXISTS_SQL = register_startup_statement("SELECT to_regclass(%s);")
+_VERSIONS_SQL = register_startup_statement(
+    f"""
+    SELECT table_name, MAX(version)
+    FROM public.{DATA_VERSION_TABLE}
+    GROUP BY table_name;
+    """
+)
+
+
+def ensure_data_version_table(conn) -> None:
+    """
+    创建数据版本目录表（已存在时不做任何操作）
+
+    Args:
+        conn: 数据库连接
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS public.{DATA_VERSION_TABLE} (
+                table_name VARCHAR(63) NOT NULL,
+                tile_code VARCHAR(10) NOT NULL DEFAULT '',
+                version BIGINT NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (table_name, tile_code)
+            );
+            """
+        )
+    conn.commit()
+
+
+def bump_data_versions(conn, changes: Iterable[Tuple[str, Optional[str]]]) -> int:
+    """
+    递增表/图幅的数据版本并通知监听的服务进程（在一个事务中提交）
+
+    Args:
+        conn: 数据库连接
+        changes: [(表名, 图幅代码)]，图幅代码为None表示整表
+
+    Returns:
+        递增的版本数
+    """
+    rows = sorted({(table, tile or "") for table, tile in changes})
+    if not rows:
+        return 0
+    ensure_data_version_table(conn)
+    with conn.cursor() as cur:
+        cur.executemany(_BUMP_SQL, rows)
+        tables = sorted({table for table, _ in rows})
+        cur.execute(
+            "SELECT pg_notify(%s, %s);", (DATA_VERSION_CHANNEL, ",".join(tables))
+        )
+    conn.commit()
+    logger.info(f"数据版本已递增: {', '.join(tables)}")
+    return len(rows)
+
+
+class _Snapshot:
+    """某个数据库的数据版本快照"""
+
+    __slots__ = ("tables", "latest", "loaded_at", "config")
+
+    def __init__(
+        self,
+        tables: Dict[str, int],
+        loaded_at: float,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.tables = tables
+        self.latest = max(tables.values(), default=0)
+        self.loaded_at = loaded_at
+        self.config = config
+
+
+class DataVersionTracker:
+    """
+    读取并缓存数据版本
+
+    读取版本只返回内存中的快照，不在调用方线程中查询数据库。首次访问某个数据库
+    时返回None（版本未知，调用方不使用缓存）并在后台线程中读取；LISTEN线程在线时
+    由它在收到NOTIFY后重新读取目录表；监听不可用时快照超过 check_interval 秒后
+    在后台线程中重新读取。
+    """
+
+    def __init__(
+        self,
+        get_connection: Callable[[Dict[str, Any]], Any],
+        put_connection: Callable[[Any, Dict[str, Any]], None],
+        check_interval: float = 1.0,
+        listen: bool = True,
+    ):
+        """
+        初始化数据版本跟踪器
+
+        Args:
+            get_connection: 获取数据库连接的函数
+            put_connection: 归还数据库连接的函数
+            check_interval: 监听不可用时重新读取目录表的间隔（秒）
+            listen: 是否为访问过的数据库启动LISTEN线程，收到通知后立即生效
+        """
+        self._get_connection = get_connection
+        self._put_connection = put_connection
+        self.check_interval = check_interval
+        self.listen = listen
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, threading.Thread] = {}
+        # 已成功执行LISTEN的数据库（指纹），这些数据库不再轮询
+        self._listening: Set[str] = set()
+        # 正在后台重新读取的数据库（指纹）
+        self._refreshing: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = threading.Event()
+        self._notifications = 0
+        self._callbacks: List[Callable[[Optional[Dict[str, Any]]], None]] = []
+
+    def add_callback(
+        self, callback: Callable[[Optional[Dict[str, Any]]], None]
+    ) -> None:
+        """
+        注册数据版本可能变化时的回调（重新读取到不同的版本）
+
+        Args:
+            callback: 以数据库配置为参数的函数（None表示所有数据库）
+        """
+        self._callbacks.append(callback)
+
+    def _changed(self, database_config: Optional[Dict[str, Any]]) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(database_config)
+            except Exception as e:
+                logger.warning(f"数据版本变更回调失败: {e}")
+
+    def get_version(
+        self,
+        database_config: Dict[str, Any],
+        table_name: Optional[str] = None,
+        wait: bool = False,
+    ) -> Optional[int]:
+        """
+        获取数据版本
+
+        Args:
+            database_config: 数据库配置
+            table_name: 表名（可选），提供时返回该表的版本（该表没有版本记录时
+                返回全库最新版本），否则返回全库最新版本
+            wait: 尚未读取过该数据库时是否同步读取目录表（阻塞，只在工作线程中
+                使用），默认False
+
+        Returns:
+            数据版本（目录表不存在或没有记录时为0）；尚未读取过该数据库且不等待
+            时为None，表示版本未知
+        """
+        snapshot = self._snapshot(database_config, wait)
+        if snapshot is None:
+            return None
+        if table_name is None:
+            return snapshot.latest
+        return snapshot.tables.get(table_name, snapshot.latest)
+
+    def invalidate(self, database_config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        在后台重新读取版本快照（不阻塞调用方）
+
+        需要立即读到新版本时（如本进程刚完成导入）在工作线程中调用 refresh。
+
+        Args:
+            database_config: 数据库配置（可选），不提供则重新读取所有数据库
+        """
+        if database_config is not None:
+            self._schedule_refresh(database_config)
+            return
+        with self._lock:
+            configs = [snapshot.config for snapshot in self._snapshots.values()]
+        for config in configs:
+            self._schedule_refresh(config)
+
+    def refresh(self, database_config: Dict[str, Any]) -> _Snapshot:
+        """
+        从目录表重新读取版本快照（阻塞，在工作线程或监听线程中调用）
+
+        Args:
+            database_config: 数据库配置
+
+        Returns:
+            新的快照；读取失败时返回原快照（没有时为空快照）
+        """
+        fingerprint = dsn_fingerprint(database_config)
+        with self._lock:
+            previous = self._snapshots.get(fingerprint)
+        try:
+            tables = self._load(database_config)
+        except Exception as e:
+            logger.warning(f"读取数据版本失败: {e}")
+            if previous is not None:
+                # 推迟下次轮询，数据库不可用时不连续重试
+                previous.loaded_at = time.monotonic()
+                return previous
+            tables = {}
+
+        snapshot = _Snapshot(tables, time.monotonic(), dict(database_config))
+        with self._lock:
+            self._snapshots[fingerprint] = snapshot
+        # 读取到其他进程递增的版本
+        if previous is not None and previous.tables != tables:
+            self._changed(database_config)
+        if self.listen and fingerprint not in self._listeners:
+            self.start_listener(database_config)
+        return snapshot
+
+    def _snapshot(
+        self, database_config: Dict[str, Any], wait: bool = False
+    ) -> Optional[_Snapshot]:
+        fingerprint = dsn_fingerprint(database_config)
+        with self._lock:
+            snapshot = self._snapshots.get(fingerprint)
+            listening = fingerprint in self._listening
+        if snapshot is None:
+            if wait:
+                return self.refresh(database_config)
+            # 首次访问不在调用方（可能是事件循环）中读取，后台读取完成前版本未知
+            self._schedule_refresh(database_config)
+            return None
+        if (
+            not listening
+            and time.monotonic() - snapshot.loaded_at >= self.check_interval
+        ):
+            self._schedule_refresh(database_config)
+        return snapshot
+
+    def _schedule_refresh(self, database_config: Dict[str, Any]) -> None:
+        """在后台线程中重新读取快照（同一数据库同时只有一个读取任务）"""
+        fingerprint = dsn_fingerprint(database_config)
+        with self._lock:
+            if fingerprint in self._refreshing or self._closed.is_set():
+                return
+            self._refreshing.add(fingerprint)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="data-version"
+                )
+            executor = self._executor
+
+        def run():
+            try:
+                self.refresh(database_config)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(fingerprint)
+
+        executor.submit(run)
+
+    def _load(self, database_config: Dict[str, Any]) -> Dict[str, int]:
+        """从目录表读取各表的最新版本"""
+        conn = self._get_connection(database_config)
+        try:
+            statements = get_statement_cache()
+            with conn.cursor() as cur:
+                statements.execute(
+                    cur, _TABLE_EXISTS_SQL, (f"public.{DATA_VERSION_TABLE}",)
+                )
+                if cur.fetchone()[0] is None:
+                    conn.rollback()
+                    return {}
+                statements.execute(cur, _VERSIONS_SQL)
+                tables = {name: int(version) for name, version in cur.fetchall()}
+            conn.rollback()
+            return tables
+        finally:
+            self._put_connection(conn, database_config)
+
+    def start_listener(self, database_config: Dict[str, Any]) -> bool:
+        """
+        后台监听数据版本变更通知（LISTEN），收到后在监听线程中重新读取快照
+
+        监听失败（如经由事务级连接池）时按 check_interval 在后台轮询目录表。
+
+        Args:
+            database_config: 数据库配置
+
+        Returns:
+            是否启动了新的监听线程
+        """
+        fingerprint = dsn_fingerprint(database_config)
+        with self._lock:
+            if fingerprint in self._listeners or self._closed.is_set():
+                return False
+            thread = threading.Thread(
+                target=self._listen_loop,
+                args=(dict(database_config),),
+                name="data-version-listener",
+                daemon=True,
+            )
+            self._listeners[fingerprint] = thread
+        thread.start()
+        return True
+
+    def _listen_loop(self, database_config: Dict[str, Any]) -> None:
+        """监听线程：断线后重连，断线期间由读取方触发轮询"""
+        fingerprint = dsn_fingerprint(database_config)
+        while not self._closed.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(
+                    host=database_config.get("host", "localhost"),
+                    port=database_config.get("port", 5432),
+                    database=database_config.get("database"),
+                    user=database_config.get("user"),
+                    password=database_config.get("password"),
+                    client_encoding="UTF8",
+                )
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {DATA_VERSION_CHANNEL};")
+                # 连接建立前可能错过通知
+                self.refresh(database_config)
+                with self._lock:
+                    self._listening.add(fingerprint)
+                logger.info("已开始监听数据版本变更通知")
+
+                while not self._closed.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        with self._lock:
+                            self._notifications += 1
+                        self.refresh(database_config)
+            except Exception as e:
+                with self._lock:
+                    self._listening.discard(fingerprint)
+                logger.warning(
+                    f"监听数据版本变更失败，改为每{self.check_interval}秒读取目录表: {e}"
+                )
+                self._closed.wait(30)
+            finally:
+                with self._lock:
+                    self._listening.discard(fingerprint)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def close(self) -> None:
+        """停止监听线程和后台读取线程"""
+        self._closed.set()
+        for thread in list(self._listeners.values()):
+            thread.join(timeout=2)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取数据版本统计
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            return {
+                "databases": len(self._snapshots),
+                "listeners": len(self._listeners),
+                "listening": len(self._listening),
+                "notifications": self._notifications,
+                "check_interval": self.check_interval,
+                "versions": {
+                    fingerprint: snapshot.latest
+                    for fingerprint, snapshot in self._snapshots.items()
+                },
+            }
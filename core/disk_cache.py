@@ -0,0 +1,312 @@
+"""
+磁盘缓存模块
+基于SQLite的持久化缓存层，进程重启（如stdio传输下每个客户端会话）后仍可命中。
+缓存键本身包含数据库中记录的数据版本（data_version模块），导入后旧条目不再命中，
+到期后清除；同时保存查询历史，供启动预热选出最常用的查询
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_FILENAME = "cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS statement_history (
+    operation TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    sql TEXT,
+    count INTEGER NOT NULL,
+    total_time REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (operation, statement)
+);
+"""
+
+# 查询历史保留时间（秒），超过后不再参与预热
+HISTORY_RETENTION = 30 * 24 * 3600
+
+_SELECT = "SELECT value FROM entries WHERE key = ? AND expires_at > ?"
+
+
+class DiskCache:
+    """SQLite持久化缓存（多个进程可共享同一目录）"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        filename: str = DEFAULT_FILENAME,
+    ):
+        """
+        初始化磁盘缓存
+
+        Args:
+            directory: 缓存目录，不存在时自动创建
+            max_bytes: 缓存值总大小上限（字节），超出时先淘汰最早过期的条目
+            filename: 数据库文件名
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / filename
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+
+        conn = self._connect()
+        with conn:
+            # 旧版本按进程内的数据版本计数保存条目，计数已不再使用，丢弃旧条目
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+            if "version" in columns:
+                conn.execute("DROP TABLE entries")
+                conn.execute("DROP TABLE IF EXISTS meta")
+            conn.executescript(_SCHEMA)
+            # 旧版本的查询历史只保存了规范化SQL，补充原始SQL列
+            columns = [
+                row[1] for row in conn.execute("PRAGMA table_info(statement_history)")
+            ]
+            if "sql" not in columns:
+                conn.execute("ALTER TABLE statement_history ADD COLUMN sql TEXT")
+        self.purge_expired()
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的连接（sqlite3连接不能跨线程使用）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            # WAL：读不阻塞写，多个进程可同时读
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            编码后的缓存值（cache_manager.encode_value的输出），不存在或已过期时
+            返回None
+        """
+        row = self._connect().execute(_SELECT, (key, time.time())).fetchone()
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return row[0]
+
+    def set(self, key: str, payload: bytes, expires_at: float) -> None:
+        """
+        写入缓存值
+
+        Args:
+            key: 缓存键
+            payload: 编码后的缓存值
+            expires_at: 过期时间（Unix时间戳）
+        """
+        if len(payload) > self.max_bytes:
+            logger.debug(f"缓存值过大（{len(payload)}字节），不写入磁盘缓存: {key}")
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO entries (key, value, expires_at, size)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, payload, expires_at, len(payload)),
+            )
+            evicted = self._evict(conn)
+        with self._lock:
+            self._writes += 1
+            self._evictions += evicted
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """超过大小上限时删除最早过期的条目（调用方在事务中）"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY expires_at")
+        keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            keys.append((key,))
+            total -= size
+            evicted += 1
+        conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+        return evicted
+
+    def delete(self, key: str) -> None:
+        """
+        删除缓存
+
+        Args:
+            key: 缓存键
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self, prefix: Optional[str] = None) -> None:
+        """
+        清除缓存
+
+        Args:
+            prefix: 键前缀（可选），如果提供则只清除匹配前缀的缓存
+        """
+        conn = self._connect()
+        with conn:
+            if prefix:
+                # 范围条件可以使用主键索引（LIKE需要转义前缀中的通配符）
+                conn.execute(
+                    "DELETE FROM entries WHERE key >= ? AND key < ?",
+                    (prefix, prefix + "\U0010ffff"),
+                )
+            else:
+                conn.execute("DELETE FROM entries")
+
+    def purge_expired(self) -> int:
+        """
+        删除已过期的条目
+
+        Returns:
+            删除的条目数
+        """
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                """
+                DELETE FROM entries WHERE expires_at <= ?
+                """,
+                (time.time(),),
+            )
+            conn.execute(
+                "DELETE FROM statement_history WHERE last_seen <= ?",
+                (time.time() - HISTORY_RETENTION,),
+            )
+        return cursor.rowcount
+
+    def record_statement(
+        self,
+        operation: str,
+        statement: str,
+        duration: float,
+        key: Optional[str] = None,
+    ) -> None:
+        """
+        记录一次查询（用于启动预热时选出最常用的查询）
+
+        Args:
+            operation: 操作名称（如 execute_sql）
+            statement: 原始查询语句
+            duration: 执行时间（秒）
+            key: 统计键（如规范化SQL），默认为statement
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO statement_history
+                    (operation, statement, sql, count, total_time, last_seen)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (operation, statement) DO UPDATE SET
+                    sql = excluded.sql,
+                    count = count + 1,
+                    total_time = total_time + excluded.total_time,
+                    last_seen = excluded.last_seen
+                """,
+                (
+                    operation,
+                    statement if key is None else key,
+                    statement,
+                    duration,
+                    time.time(),
+                ),
+            )
+
+    def top_statements(self, operation: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        获取保留期内执行次数最多的查询（含之前进程的记录）
+
+        旧版本只记录了规范化SQL的条目不返回（规范化SQL不能原样执行）
+
+        Args:
+            operation: 操作名称
+            limit: 返回数量
+
+        Returns:
+            [{statement（原始语句）, count, avg_time}]，按执行次数降序
+        """
+        rows = (
+            self._connect()
+            .execute(
+                """
+                SELECT sql, count, total_time / count FROM statement_history
+                WHERE operation = ? AND last_seen > ? AND sql IS NOT NULL
+                ORDER BY count DESC, total_time DESC
+                LIMIT ?
+                """,
+                (operation, time.time() - HISTORY_RETENTION, limit),
+            )
+            .fetchall()
+        )
+        return [
+            {"statement": statement, "count": count, "avg_time": avg_time}
+            for statement, count, avg_time in rows
+        ]
+
+    def close(self) -> None:
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取磁盘缓存统计
+
+        Returns:
+            统计信息字典
+        """
+        entries, total = (
+            self._connect()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+            .fetchone()
+        )
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "path": str(self.path),
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "writes": self._writes,
+                "evictions": self._evictions,
+            }
@@ -3,31 +3,554 @@ GDB文件导入器：实现GDB格式的导入逻辑
 """
 
 import fiona
+import numpy as np
 import psycopg2
+import shapely
 from shapely.geometry import shape
 from pathlib import Path
-from typing import Dict, Any, List
-from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+import json
+import queue
+import threading
 import time
 
 from .logging_config import get_logger
+from .import_profiler import ImportProfiler, NULL_PROFILER
+from .layer_inventory import load_layer_inventory, plan_layers
+from .data_version import bump_data_versions
 
 logger = get_logger(__name__)
 
+# 流水线队列结束标记
+_END = object()
+
+# 隔离表：保存无法修复或无法插入的要素（原始WKB及原因）
+QUARANTINE_TABLE = "import_quarantine"
+
+QUARANTINE_INSERT_SQL = f"""
+INSERT INTO public.{QUARANTINE_TABLE}
+    (table_name, tile_code, layer_name, stage, reason, original_wkb, properties)
+VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb)
+"""
+
+# 重新导入图幅时清除上次导入留下的隔离记录
+QUARANTINE_CLEAR_SQL = f"""
+DELETE FROM public.{QUARANTINE_TABLE} WHERE table_name = %s AND tile_code = %s
+"""
+
+
+def feature_record(feature) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    将Fiona要素转换为可跨进程传递的 (几何, 属性) 元组
+
+    Args:
+        feature: Fiona要素
+
+    Returns:
+        (GeoJSON几何字典或None, 属性字典)
+    """
+    geometry = feature["geometry"]
+    if geometry is not None and not isinstance(geometry, dict):
+        geometry = geometry.__geo_interface__
+    return geometry, dict(feature["properties"])
+
+
+def _to_db_value(value: Any) -> Any:
+    """确保字符串值被正确处理"""
+    if value is None or isinstance(value, str):
+        return value
+    # Python 3中str已经是unicode，但确保编码正确
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return str(value)
+
+
+def _extract_same_dimension(original, repaired):
+    """
+    从make_valid的结果中提取与原几何同维度的部分（保持几何类型）
+
+    make_valid可能把面修复为包含线、点的GeometryCollection，
+    这里只保留与原几何同维度的部分，单部件几何保持单部件类型。
+
+    Returns:
+        同维度的有效几何，无法保留时返回None
+    """
+    if repaired is None or repaired.is_empty:
+        return None
+
+    dimension = shapely.get_dimensions(original)
+    if (
+        shapely.get_dimensions(repaired) == dimension
+        and repaired.geom_type != "GeometryCollection"
+    ):
+        parts = shapely.get_parts(repaired)
+    else:
+        # 展开GeometryCollection及其中的多部件几何
+        parts = shapely.get_parts(shapely.get_parts(repaired))
+        parts = parts[shapely.get_dimensions(parts) == dimension]
+        parts = parts[~shapely.is_empty(parts)]
+
+    if len(parts) == 0:
+        return None
+    if len(parts) == 1 and not original.geom_type.startswith("Multi"):
+        return parts[0]
+    if dimension == 2:
+        return shapely.multipolygons(parts)
+    if dimension == 1:
+        return shapely.multilinestrings(parts)
+    return shapely.multipoints(parts)
+
+
+def convert_features(
+    records: List[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]],
+    column_sources: List[Tuple[str, str]],
+    tile_code: str,
+    skip_invalid: bool,
+) -> Tuple[List[tuple], List[Dict[str, Any]], Dict[str, List[float]]]:
+    """
+    校验、修复并序列化一批要素（模块级函数，可在进程池中执行）
+
+    校验、修复、WKT序列化均使用shapely 2的向量化函数按批执行。
+
+    Args:
+        records: feature_record() 生成的 (几何, 属性) 列表
+        column_sources: [(数据库字段, GDB字段), ...]，按INSERT字段顺序排列
+        tile_code: 图幅代码
+        skip_invalid: 是否修复无效几何（修复失败的要素进入隔离区）
+
+    Returns:
+        (待插入的行,
+         被拒绝的要素 [{"reason", "wkb", "properties"}, ...],
+         {阶段: [耗时秒数, 要素数]})
+    """
+    rejects: List[Dict[str, Any]] = []
+    timings: Dict[str, List[float]] = {}
+    clock = time.perf_counter
+
+    # 构建几何对象
+    started = clock()
+    geoms = []
+    props = []
+    for geometry, properties in records:
+        if geometry is None:
+            continue
+        try:
+            geoms.append(shape(geometry))
+            props.append(properties)
+        except Exception as e:
+            rejects.append(
+                {"reason": f"几何解析失败: {e}", "wkb": None, "properties": properties}
+            )
+    geom_array = np.array(geoms, dtype=object)
+    keep = np.ones(len(geom_array), dtype=bool)
+
+    # 校验
+    valid = shapely.is_valid(geom_array)
+    timings["validate"] = [clock() - started, len(geom_array)]
+
+    # 修复
+    invalid_idx = np.flatnonzero(~valid)
+    if len(invalid_idx):
+        started = clock()
+        originals = geom_array[invalid_idx]
+        reasons = shapely.is_valid_reason(originals)
+        repaired = (
+            shapely.make_valid(originals) if skip_invalid else [None] * len(originals)
+        )
+        for idx, original, fixed, reason in zip(
+            invalid_idx, originals, repaired, reasons
+        ):
+            fixed = _extract_same_dimension(original, fixed)
+            if fixed is not None and fixed.is_valid:
+                geom_array[idx] = fixed
+                continue
+            keep[idx] = False
+            if skip_invalid:
+                reason = f"几何修复失败: {reason}"
+            rejects.append(
+                {
+                    "reason": reason,
+                    "wkb": shapely.to_wkb(original),
+                    "properties": props[idx],
+                }
+            )
+        timings["repair"] = [clock() - started, len(invalid_idx)]
+
+    # 序列化（按照数据库字段顺序构建属性值）
+    started = clock()
+    rows = []
+    kept_idx = np.flatnonzero(keep)
+    wkts = shapely.to_wkt(geom_array[kept_idx], rounding_precision=-1)
+    for idx, wkt in zip(kept_idx, wkts):
+        properties = props[idx]
+        values = [wkt, tile_code]
+        for _, gdb_field in column_sources:
+            values.append(_to_db_value(properties.get(gdb_field)))
+        rows.append(tuple(values))
+    timings["serialize"] = [clock() - started, len(rows)]
+
+    return rows, rejects, timings
+
+
+def _queue_put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """阻塞放入有界队列，流水线中止时返回False"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _queue_get(q: queue.Queue, stop: threading.Event) -> Any:
+    """阻塞从队列取出，流水线中止时返回结束标记"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+
+class AdaptiveBatchSizer:
+    """
+    自适应批量大小（爬山法）
+
+    每批写入后根据单行耗时调整批量大小：单行耗时下降则沿当前方向继续调整，
+    上升则反向调整，始终限制在 [min_size, max_size] 范围内。
+    """
+
+    def __init__(
+        self,
+        initial_size: int,
+        min_size: int = 100,
+        max_size: int = 20000,
+        factor: float = 1.5,
+    ):
+        """
+        初始化自适应批量大小
+
+        Args:
+            initial_size: 初始批量大小
+            min_size: 最小批量大小
+            max_size: 最大批量大小
+            factor: 每次调整的倍数
+        """
+        self.min_size = max(1, min(min_size, initial_size))
+        self.max_size = max(self.min_size, max_size)
+        self.factor = factor
+        self.size = min(max(initial_size, self.min_size), self.max_size)
+        self._direction = 1
+        self._last_per_row: Optional[float] = None
+
+    def observe(self, rows: int, seconds: float) -> int:
+        """
+        记录一批写入的耗时并返回下一批的大小
+
+        Args:
+            rows: 本批行数
+            seconds: 本批写入耗时（秒）
+
+        Returns:
+            调整后的批量大小
+        """
+        # 只根据满批调整，避免尾批干扰
+        if rows < self.size or rows <= 0:
+            return self.size
+
+        per_row = seconds / rows
+        if self._last_per_row is not None and per_row > self._last_per_row:
+            self._direction = -self._direction
+        self._last_per_row = per_row
+
+        if self._direction > 0:
+            new_size = int(self.size * self.factor)
+        else:
+            new_size = int(self.size / self.factor)
+        self.size = min(max(new_size, self.min_size), self.max_size)
+        return self.size
+
+
+class BatchWriter:
+    """
+    批量写入器
+
+    - 缓冲待插入行，达到批量大小后写入（可配合AdaptiveBatchSizer自动调整）
+    - 按时间/数据量预算提交事务，而不是每批提交
+    - 每批在SAVEPOINT中写入，失败时二分定位出错行，只丢弃出错的行
+    - 无法修复或无法插入的要素写入隔离表（import_quarantine），与数据同事务提交
+    """
+
+    # 估算每行除几何WKT外的数据量（字节）
+    ROW_OVERHEAD_BYTES = 64
+
+    def __init__(
+        self,
+        conn: psycopg2.extensions.connection,
+        cur,
+        insert_sql: str,
+        prof,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        batch_size: int = 1000,
+        commit_interval: float = 2.0,
+        commit_bytes: int = 32 * 1024 * 1024,
+        quarantine: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        初始化批量写入器
+
+        Args:
+            conn: 数据库连接
+            cur: 数据库游标
+            insert_sql: INSERT语句
+            prof: 图层剖析句柄
+            sizer: 自适应批量大小（可选），不提供则使用固定批量大小
+            batch_size: 固定批量大小（未提供sizer时使用）
+            commit_interval: 距上次提交超过该秒数时提交
+            commit_bytes: 未提交数据量超过该字节数时提交
+            quarantine: 隔离区上下文（可选），包含 table_name、tile_code、
+                layer_name、columns（INSERT中属性字段名）；不提供则只计数
+        """
+        self.conn = conn
+        self.cur = cur
+        self.insert_sql = insert_sql
+        self.prof = prof
+        self.sizer = sizer
+        self.fixed_batch_size = max(1, batch_size)
+        self.commit_interval = commit_interval
+        self.commit_bytes = commit_bytes
+        self.quarantine_context = quarantine
+
+        self.inserted = 0
+        self.failed = 0
+        self.quarantined = 0
+        self._write_rejects: List[Dict[str, Any]] = []
+
+        self._buffer: List[tuple] = []
+        # 上次提交以来实际插入和写入隔离表的行数，提交失败时按此回退计数
+        self._pending_inserted = 0
+        self._pending_quarantined = 0
+        self._uncommitted_bytes = 0
+        self._last_commit = time.time()
+
+    @property
+    def batch_size(self) -> int:
+        """当前批量大小"""
+        return self.sizer.size if self.sizer else self.fixed_batch_size
+
+    def add(
+        self, rows: List[tuple], rejects: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        添加待插入行，缓冲区满时自动写入
+
+        Args:
+            rows: 待插入行列表
+            rejects: 转换阶段被拒绝的要素（可选），写入隔离表
+        """
+        if rejects:
+            self._quarantine(rejects, "repair")
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.batch_size:
+            size = self.batch_size
+            batch = self._buffer[:size]
+            del self._buffer[:size]
+            self._write(batch)
+
+    def close(self) -> None:
+        """写入剩余数据并提交"""
+        if self._buffer:
+            batch = self._buffer
+            self._buffer = []
+            self._write(batch)
+        if self._pending_inserted or self._pending_quarantined:
+            self._commit()
+
+    def _write(self, batch: List[tuple]) -> None:
+        """写入一批数据，必要时提交"""
+        started = time.perf_counter()
+        with self.prof.stage("write"):
+            inserted = self._insert_rows(batch)
+        self.inserted += inserted
+        self._pending_inserted += inserted
+        if self._write_rejects:
+            rejects = self._write_rejects
+            self._write_rejects = []
+            self._quarantine(rejects, "write")
+        if self.sizer:
+            self.sizer.observe(len(batch), time.perf_counter() - started)
+
+        self._uncommitted_bytes += sum(
+            len(row[0]) + self.ROW_OVERHEAD_BYTES for row in batch
+        )
+        if (
+            time.time() - self._last_commit >= self.commit_interval
+            or self._uncommitted_bytes >= self.commit_bytes
+        ):
+            self._commit()
+
+    def _insert_rows(self, rows: List[tuple]) -> int:
+        """
+        在SAVEPOINT中插入，失败时二分重试
+
+        Returns:
+            成功插入的行数
+        """
+        cur = self.cur
+        cur.execute("SAVEPOINT import_batch")
+        try:
+            cur.executemany(self.insert_sql, rows)
+        except psycopg2.Error as e:
+            cur.execute("ROLLBACK TO SAVEPOINT import_batch")
+            cur.execute("RELEASE SAVEPOINT import_batch")
+            if len(rows) == 1:
+                self._reject(rows[0], e)
+                return 0
+            mid = len(rows) // 2
+            return self._insert_rows(rows[:mid]) + self._insert_rows(rows[mid:])
+        cur.execute("RELEASE SAVEPOINT import_batch")
+        return len(rows)
+
+    def _reject(self, row: tuple, error: Exception) -> None:
+        """记录无法插入的行"""
+        self.failed += 1
+        reason = str(error).strip()
+        if self.failed <= 5:
+            logger.warning(f"    插入记录失败: {reason}")
+        if self.quarantine_context is None:
+            return
+
+        try:
+            wkb = shapely.to_wkb(shapely.from_wkt(row[0]))
+        except Exception:
+            wkb = None
+        columns = self.quarantine_context.get("columns", [])
+        self._write_rejects.append(
+            {
+                "reason": reason,
+                "wkb": wkb,
+                "properties": dict(zip(columns, row[2:])),
+            }
+        )
+
+    def _quarantine(self, rejects: List[Dict[str, Any]], stage: str) -> None:
+        """将被拒绝的要素写入隔离表（在独立SAVEPOINT中，失败不影响导入）"""
+        context = self.quarantine_context
+        if context is None:
+            return
+
+        params = [
+            (
+                context["table_name"],
+                context["tile_code"],
+                context["layer_name"],
+                stage,
+                reject["reason"],
+                psycopg2.Binary(reject["wkb"]) if reject["wkb"] else None,
+                json.dumps(reject["properties"], ensure_ascii=False, default=str),
+            )
+            for reject in rejects
+        ]
+        cur = self.cur
+        cur.execute("SAVEPOINT import_quarantine")
+        try:
+            cur.executemany(QUARANTINE_INSERT_SQL, params)
+            self.quarantined += len(params)
+            self._pending_quarantined += len(params)
+        except psycopg2.Error as e:
+            cur.execute("ROLLBACK TO SAVEPOINT import_quarantine")
+            logger.warning(f"    写入隔离表失败: {e}")
+        cur.execute("RELEASE SAVEPOINT import_quarantine")
+
+    def abort(self) -> None:
+        """
+        丢弃缓冲区和未提交的事务（导入中途出错时调用）
+
+        之后 inserted、failed、quarantined 只反映已提交的数据
+        """
+        self._buffer = []
+        self._write_rejects = []
+        self._rollback()
+
+    def _commit(self) -> None:
+        """提交当前事务"""
+        try:
+            with self.prof.stage("commit"):
+                self.conn.commit()
+        except Exception as e:
+            logger.warning(
+                f"    提交失败，{self._pending_inserted:,} 条记录未写入: {e}"
+            )
+            self._rollback()
+            return
+        self._reset_pending()
+
+    def _rollback(self) -> None:
+        """回滚当前事务，本事务内插入的数据和隔离记录全部丢失"""
+        try:
+            self.conn.rollback()
+        finally:
+            # 已被拒绝的行此前已计入失败，不重复计数
+            self.inserted -= self._pending_inserted
+            self.failed += self._pending_inserted
+            self.quarantined -= self._pending_quarantined
+            self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        self._pending_inserted = 0
+        self._pending_quarantined = 0
+        self._uncommitted_bytes = 0
+        self._last_commit = time.time()
+
 
 class GDBImporter:
     """GDB文件导入器"""
 
-    def __init__(self, spec: Dict[str, Any]):
+    def __init__(
+        self,
+        spec: Dict[str, Any],
+        profiler: Optional[ImportProfiler] = None,
+        pipeline: bool = False,
+        pipeline_workers: int = 0,
+        queue_size: int = 4,
+        adaptive_batch: bool = True,
+        max_batch_size: int = 20000,
+        commit_interval: float = 2.0,
+        commit_bytes: int = 32 * 1024 * 1024,
+        inventory_cache_dir: Optional[str] = None,
+    ):
         """
         初始化GDB导入器
 
         Args:
             spec: 数据规格配置
+            profiler: 导入阶段剖析器（可选），不提供则不做阶段统计
+            pipeline: 是否使用流水线导入（读取、几何处理、写入并行）
+            pipeline_workers: 几何处理进程数，0表示在流水线主线程中处理
+            queue_size: 各阶段之间有界队列的容量（单位：批）
+            adaptive_batch: 是否根据写入耗时自动调整批量大小
+            max_batch_size: 自适应批量大小的上限
+            commit_interval: 提交间隔（秒），按时间预算提交事务
+            commit_bytes: 单个事务的数据量上限（字节）
+            inventory_cache_dir: 图层清单缓存目录（可选）
         """
         self.spec = spec
         self.layer_mapping = spec.get("layer_mapping", {})
         self.default_srid = spec.get("default_srid", 4326)
+        self.profiler = profiler or NULL_PROFILER
+        self.pipeline = pipeline
+        self.pipeline_workers = max(0, pipeline_workers)
+        self.queue_size = max(1, queue_size)
+        self.adaptive_batch = adaptive_batch
+        self.max_batch_size = max_batch_size
+        self.commit_interval = commit_interval
+        self.commit_bytes = commit_bytes
+        self.inventory_cache_dir = inventory_cache_dir
+        self._quarantine_enabled = False
 
     def import_gdb_sync(
         self,
@@ -61,101 +584,135 @@ class GDBImporter:
             f"开始时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}"
         )
 
-        # 获取所有图层
-        layers = self._get_layers(gdb_path)
-        if not layers:
+        # 读取图层清单（名称、要素数、结构、范围），据此跳过空图层并按要素数排序
+        inventory = load_layer_inventory(gdb_path, self.inventory_cache_dir)
+        if not inventory["layers"]:
             raise ValueError(f"无法读取GDB文件或文件为空: {gdb_path}")
+        layers, empty_layers = plan_layers(inventory)
+        total_layers = len(inventory["layers"])
 
-        logger.info(f"找到 {len(layers)} 个图层，开始处理...")
+        logger.info(
+            f"找到 {total_layers} 个图层（空图层 {len(empty_layers)} 个"
+            f"{'，清单来自缓存' if inventory.get('cached') else ''}），开始处理..."
+        )
+        for entry in empty_layers:
+            logger.info(f"  [SKIP] 图层 {entry['name']} 为空（0条记录）")
         logger.info("=" * 60)
 
         # 统计信息
         table_stats = defaultdict(int)
         success_count = 0
         error_count = 0
-        skipped_count = 0  # 空图层计数
+        skipped_count = len(empty_layers)  # 空图层计数
+        layer_stats: Dict[str, Dict[str, Any]] = {}
+        touched_tables = set()  # 可能已写入数据的表（导入结束后递增数据版本）
 
-        for idx, layer_name in enumerate(layers, 1):
-            layer_start_time = time.time()
-            logger.info(f"[{idx}/{len(layers)}] 处理图层: {layer_name}")
-            try:
-                table_name = self._get_table_name(layer_name)
-                logger.info(f"处理图层: {layer_name} -> 表: {table_name}")
+        # 隔离表（保存无法修复/插入的要素）
+        self._quarantine_enabled = self._ensure_quarantine_table(conn)
 
+        # 流水线模式下几何处理使用的进程池（所有图层共享）
+        executor = None
+        if self.pipeline and self.pipeline_workers > 0:
+            executor = ProcessPoolExecutor(max_workers=self.pipeline_workers)
+            logger.info(f"流水线导入已启用，几何处理进程数: {self.pipeline_workers}")
+
+        try:
+            for idx, entry in enumerate(layers, 1):
+                layer_name = entry["name"]
+                layer_start_time = time.time()
+                feature_count = entry.get("feature_count")
+                logger.info(
+                    f"[{idx}/{len(layers)}] 处理图层: {layer_name}"
+                    + (f"（{feature_count:,} 条要素）" if feature_count else "")
+                )
                 try:
-                    # 先检查图层是否有数据
-                    layer_empty = False
-                    try:
-                        with fiona.open(gdb_path, layer=layer_name) as src:
-                            # 尝试读取第一个要素
-                            first = next(iter(src), None)
-                            if first is None:
-                                layer_empty = True
-                    except StopIteration:
-                        layer_empty = True
-                    except Exception:
-                        pass  # 如果检查失败，继续尝试导入
+                    table_name = self._get_table_name(layer_name)
+                    logger.info(f"处理图层: {layer_name} -> 表: {table_name}")
 
-                    if layer_empty:
-                        elapsed = time.time() - layer_start_time
-                        logger.info(
-                            f"  [SKIP] 图层 {layer_name} 为空（0条记录） - 耗时 {elapsed:.2f}秒"
+                    try:
+                        logger.info(f"  → 导入到表: {table_name}")
+                        # 多个图层可能写入同一张表，只在该表的第一个图层清除隔离记录
+                        clear_quarantine = table_name not in touched_tables
+                        touched_tables.add(table_name)
+                        layer_result = self._import_layer(
+                            gdb_path,
+                            layer_name,
+                            table_name,
+                            tile_code,
+                            conn,
+                            srid,
+                            batch_size,
+                            skip_invalid,
+                            create_indexes,
+                            executor=executor,
+                            clear_quarantine=clear_quarantine,
                         )
-                        skipped_count += 1
-                        continue
-
-                    logger.info(f"  → 导入到表: {table_name}")
-                    count = self._import_layer(
-                        gdb_path,
-                        layer_name,
-                        table_name,
-                        tile_code,
-                        conn,
-                        srid,
-                        batch_size,
-                        skip_invalid,
-                        create_indexes,
-                    )
+                        count = layer_result["count"]
+                        layer_stats[layer_name] = {
+                            "table_name": table_name,
+                            "count": count,
+                            "error_count": layer_result["error_count"],
+                            "repaired": layer_result["repaired"],
+                            "quarantined": layer_result["quarantined"],
+                            "repair_seconds": layer_result["repair_seconds"],
+                        }
 
-                    elapsed = time.time() - layer_start_time
-                    if count > 0:
-                        table_stats[table_name] += count
-                        success_count += 1
-                        logger.info(
-                            f"  ✓ 成功导入 {count:,} 条记录 - 耗时 {elapsed:.2f}秒"
-                        )
-                    else:
+                        elapsed = time.time() - layer_start_time
+                        if "error" in layer_result:
+                            # 中途失败，已提交的部分仍计入表统计
+                            layer_stats[layer_name]["error"] = layer_result["error"]
+                            if count > 0:
+                                table_stats[table_name] += count
+                            error_count += 1
+                            logger.warning(
+                                f"  ✗ 图层 {layer_name} 导入中途失败，已提交 {count:,} 条 - 耗时 {elapsed:.2f}秒"
+                            )
+                        elif count > 0:
+                            table_stats[table_name] += count
+                            success_count += 1
+                            logger.info(
+                                f"  ✓ 成功导入 {count:,} 条记录 - 耗时 {elapsed:.2f}秒"
+                            )
+                        else:
+                            error_count += 1
+                            logger.warning(
+                                f"  ✗ 图层 {layer_name} 导入失败（源数据有记录，但导入0条） - 耗时 {elapsed:.2f}秒"
+                            )
+                    except Exception as e:
+                        elapsed = time.time() - layer_start_time
                         error_count += 1
-                        logger.warning(
-                            f"  ✗ 图层 {layer_name} 导入失败（源数据有记录，但导入0条） - 耗时 {elapsed:.2f}秒"
+                        logger.error(
+                            f"  ✗ 图层 {layer_name} 导入时出错: {e} - 耗时 {elapsed:.2f}秒"
                         )
+                        import traceback
+
+                        logger.debug(traceback.format_exc())
+
                 except Exception as e:
                     elapsed = time.time() - layer_start_time
                     error_count += 1
                     logger.error(
-                        f"  ✗ 图层 {layer_name} 导入时出错: {e} - 耗时 {elapsed:.2f}秒"
+                        f"  ✗ 导入图层 {layer_name} 时出错: {e} - 耗时 {elapsed:.2f}秒"
                     )
-                    import traceback
-
-                    logger.debug(traceback.format_exc())
 
+                # 显示进度
+                progress = (idx / len(layers)) * 100
+                logger.info(f"  进度: {idx}/{len(layers)} ({progress:.1f}%)")
+                logger.info("-" * 60)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            # 部分失败时也可能已提交数据，因此总是递增
+            try:
+                bump_data_versions(conn, ((t, tile_code) for t in touched_tables))
             except Exception as e:
-                elapsed = time.time() - layer_start_time
-                error_count += 1
-                logger.error(
-                    f"  ✗ 导入图层 {layer_name} 时出错: {e} - 耗时 {elapsed:.2f}秒"
-                )
-
-            # 显示进度
-            progress = (idx / len(layers)) * 100
-            logger.info(f"  进度: {idx}/{len(layers)} ({progress:.1f}%)")
-            logger.info("-" * 60)
+                logger.warning(f"递增数据版本失败，缓存可能在TTL内返回旧数据: {e}")
 
         total_time = time.time() - start_time
         logger.info("=" * 60)
-        logger.info(f"导入完成!")
+        logger.info("导入完成!")
         logger.info(f"  总耗时: {total_time:.2f}秒 ({total_time/60:.2f}分钟)")
-        logger.info(f"  总图层数: {len(layers)}")
+        logger.info(f"  总图层数: {total_layers}")
         logger.info(f"  成功导入: {success_count} 个图层")
         logger.info(f"  跳过(空): {skipped_count} 个图层")
         if error_count > 0:
@@ -163,18 +720,31 @@ class GDBImporter:
         logger.info(f"  总记录数: {sum(table_stats.values()):,} 条")
         logger.info("=" * 60)
 
-        return {
+        result = {
             "status": "success",
             "gdb_name": gdb_name,
             "tile_code": tile_code,
-            "total_layers": len(layers),
+            "total_layers": total_layers,
             "success_layers": success_count,
             "error_layers": error_count,
             "skipped_layers": skipped_count,
             "total_time_seconds": total_time,
             "table_stats": dict(table_stats),
+            "layer_stats": layer_stats,
+            "quarantined": sum(s["quarantined"] for s in layer_stats.values()),
+            "inventory_cached": bool(inventory.get("cached")),
         }
 
+        if self.profiler.enabled:
+            result["profile"] = self.profiler.to_dict()
+            if self.profiler.trace_path:
+                try:
+                    result["profile_trace"] = self.profiler.dump_chrome_trace()
+                except Exception as e:
+                    logger.warning(f"写出导入剖析Trace失败: {e}")
+
+        return result
+
     def _extract_tile_code(self, gdb_name: str) -> str:
         """提取图幅代码"""
         # 从规格配置中获取图幅代码提取规则
@@ -194,15 +764,6 @@ class GDBImporter:
             # TODO: 实现自定义规则解析
             return gdb_name
 
-    def _get_layers(self, gdb_path: str) -> List[str]:
-        """获取GDB文件中的所有图层"""
-        try:
-            layers = fiona.listlayers(gdb_path)
-            return layers
-        except Exception as e:
-            logger.error(f"无法读取GDB图层: {e}")
-            return []
-
     def _get_table_name(self, layer_name: str) -> str:
         """根据图层名获取表名"""
         # 移除可能的图幅前缀
@@ -237,8 +798,20 @@ class GDBImporter:
         batch_size: int,
         skip_invalid: bool,
         create_indexes: bool,
-    ) -> int:
-        """导入单个图层"""
+        executor: Optional[Executor] = None,
+        clear_quarantine: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        导入单个图层
+
+        clear_quarantine 为True时先删除该表该图幅已有的隔离记录，
+        删除与本图层的数据在同一事务中提交
+
+        Returns:
+            图层导入统计（count、error_count、repaired、quarantined、repair_seconds等）；
+            中途出错时 count、error_count、quarantined 为已提交的部分，error 为错误信息
+        """
+        writer = None
         try:
             with fiona.open(gdb_path, layer=layer_name) as src:
                 layer_schema = src.schema
@@ -249,204 +822,419 @@ class GDBImporter:
                     conn, table_name, layer_schema, srid, create_indexes
                 ):
                     logger.warning(f"无法创建表 {table_name}")
-                    return 0
+                    return self._new_layer_stats()
 
                 with conn.cursor() as cur:
-                    # 获取字段映射
-                    cur.execute(
-                        """
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_schema = 'public' 
-                          AND table_name = %s
-                        ORDER BY ordinal_position;
-                    """,
-                        (table_name,),
+                    insert_sql, column_sources = self._prepare_insert(
+                        cur, table_name, properties, srid
                     )
+                    if clear_quarantine and self._quarantine_enabled:
+                        cur.execute(QUARANTINE_CLEAR_SQL, (table_name, tile_code))
 
-                    existing_columns = [row[0] for row in cur.fetchall()]
-                    data_columns = [
-                        col
-                        for col in existing_columns
-                        if col not in ["id", "geom", "tile_code"]
-                    ]
-
-                    # 构建字段映射
-                    field_mapping = {}
-                    for field_name in properties.keys():
-                        clean_name = self._clean_identifier(field_name)
-                        if clean_name in data_columns:
-                            field_mapping[field_name] = clean_name
-
-                    # 确保字段顺序与数据库表字段顺序一致
-                    # 按照数据库字段顺序构建field_names
-                    mapped_db_columns = []
-                    for db_col in data_columns:
-                        # 找到对应的GDB字段名
-                        gdb_field = None
-                        for gdb_name, db_name in field_mapping.items():
-                            if db_name == db_col:
-                                gdb_field = gdb_name
-                                break
-                        if gdb_field:
-                            mapped_db_columns.append(db_col)
-
-                    # 准备插入SQL（按照数据库字段顺序）
-                    field_names = ["geom", "tile_code"] + mapped_db_columns
-                    placeholders = [f"ST_GeomFromText(%s, {srid})", "%s"] + [
-                        "%s"
-                    ] * len(mapped_db_columns)
-
-                    insert_sql = f"""
-                    INSERT INTO public.{table_name} ({', '.join(field_names)})
-                    VALUES ({', '.join(placeholders)})
-                    """
+                    # 阶段剖析句柄（未启用时为空操作）
+                    prof = self.profiler.layer(tile_code, layer_name)
 
-                    count = 0
-                    error_count = 0
-                    batch = []
+                    writer = BatchWriter(
+                        conn,
+                        cur,
+                        insert_sql,
+                        prof,
+                        sizer=(
+                            AdaptiveBatchSizer(batch_size, max_size=self.max_batch_size)
+                            if self.adaptive_batch
+                            else None
+                        ),
+                        batch_size=batch_size,
+                        commit_interval=self.commit_interval,
+                        commit_bytes=self.commit_bytes,
+                        quarantine=(
+                            {
+                                "table_name": table_name,
+                                "tile_code": tile_code,
+                                "layer_name": layer_name,
+                                "columns": [db_col for db_col, _ in column_sources],
+                            }
+                            if self._quarantine_enabled
+                            else None
+                        ),
+                    )
 
-                    # 初始化进度跟踪
-                    processed = 0
+                    logger.info("    开始导入数据...")
                     layer_start_time = time.time()
-                    last_log_time = layer_start_time
-                    total_features = None  # 大图层不统计总数
-
-                    logger.info(f"    开始导入数据...")
-
-                    for feature in src:
-                        processed += 1
-
-                        if feature["geometry"] is None:
-                            continue
-
-                        try:
-                            geom = shape(feature["geometry"])
-
-                            # 验证并修复几何
-                            if not geom.is_valid:
-                                if skip_invalid:
-                                    geom = geom.buffer(0)
-                                    if not geom.is_valid:
-                                        error_count += 1
-                                        continue
-                                else:
-                                    error_count += 1
-                                    continue
-
-                            wkt_geom = geom.wkt
-
-                            # 构建属性值（按照field_names的顺序，确保与数据库字段顺序一致）
-                            values = [wkt_geom, tile_code]
-                            # 按照mapped_db_columns的顺序构建值
-                            for db_col in mapped_db_columns:
-                                # 找到对应的GDB字段名
-                                gdb_field = None
-                                for gdb_name, db_name in field_mapping.items():
-                                    if db_name == db_col:
-                                        gdb_field = gdb_name
-                                        break
-                                if gdb_field:
-                                    value = feature["properties"].get(gdb_field)
-                                    # 确保字符串值被正确处理
-                                    if value is not None:
-                                        # Python 3中str已经是unicode，但确保编码正确
-                                        if isinstance(value, bytes):
-                                            value = value.decode(
-                                                "utf-8", errors="ignore"
-                                            )
-                                        elif not isinstance(value, str):
-                                            value = str(value)
-                                    values.append(value)
-
-                            batch.append(tuple(values))
-
-                            if len(batch) >= batch_size:
-                                try:
-                                    cur.executemany(insert_sql, batch)
-                                    conn.commit()
-                                    count += len(batch)
-                                    batch = []
-
-                                    # 每批显示进度（每5秒或每1000条）
-                                    current_time = time.time()
-                                    elapsed = current_time - layer_start_time
-                                    if (
-                                        current_time - last_log_time >= 5
-                                        or processed % 1000 == 0
-                                    ):
-                                        if total_features:
-                                            progress_pct = (
-                                                processed / total_features
-                                            ) * 100
-                                            speed = (
-                                                count / elapsed if elapsed > 0 else 0
-                                            )
-                                            logger.info(
-                                                f"    进度: {processed:,}/{total_features:,} ({progress_pct:.1f}%) - 已导入 {count:,} 条 - 速度: {speed:.0f} 条/秒"
-                                            )
-                                        else:
-                                            speed = (
-                                                count / elapsed if elapsed > 0 else 0
-                                            )
-                                            logger.info(
-                                                f"    已处理: {processed:,} 条 - 已导入 {count:,} 条 - 速度: {speed:.0f} 条/秒"
-                                            )
-                                        last_log_time = current_time
-                                except Exception as e:
-                                    conn.rollback()
-                                    error_count += len(batch)
-                                    logger.warning(f"    批量插入失败: {e}")
-                                    batch = []
 
-                        except Exception as e:
-                            error_count += 1
-                            if error_count <= 5:
-                                logger.warning(f"跳过记录: {e}")
-                            continue
+                    if self.pipeline:
+                        stats = self._run_pipeline(
+                            src,
+                            writer,
+                            column_sources,
+                            tile_code,
+                            batch_size,
+                            skip_invalid,
+                            prof,
+                            executor,
+                        )
+                    else:
+                        stats = self._run_serial(
+                            src,
+                            writer,
+                            column_sources,
+                            tile_code,
+                            batch_size,
+                            skip_invalid,
+                            prof,
+                        )
+                    if self.adaptive_batch:
+                        logger.info(
+                            f"    自适应批量大小: 最终 {writer.batch_size:,} 条/批"
+                        )
 
-                    # 插入剩余数据
-                    if batch:
-                        try:
-                            cur.executemany(insert_sql, batch)
-                            conn.commit()
-                            count += len(batch)
-                            logger.info(f"    插入最后一批: {len(batch)} 条")
-                        except Exception as e:
-                            conn.rollback()
-                            error_count += len(batch)
-                            logger.warning(f"    插入剩余数据失败: {e}")
+                    count = stats["count"]
+                    error_count = stats["error_count"]
 
                     # 显示最终统计
                     layer_elapsed = time.time() - layer_start_time
-                    if total_features:
-                        logger.info(
-                            f"    处理完成: {processed:,}/{total_features:,} 条记录"
-                        )
-                    else:
-                        logger.info(f"    处理完成: {processed:,} 条记录")
+                    logger.info(f"    处理完成: {stats['processed']:,} 条记录")
                     logger.info(f"    成功导入: {count:,} 条")
                     if error_count > 0:
                         logger.warning(f"    失败记录: {error_count:,} 条")
+                    if stats["repaired"] or stats["quarantined"]:
+                        logger.info(
+                            f"    几何修复: {stats['repaired']:,} 条，"
+                            f"隔离: {stats['quarantined']:,} 条，"
+                            f"修复耗时 {stats['repair_seconds']:.2f}秒"
+                        )
                     if layer_elapsed > 0:
                         avg_speed = count / layer_elapsed
                         logger.info(f"    平均速度: {avg_speed:.0f} 条/秒")
 
                     # 更新统计信息
-                    logger.info(f"    更新表统计信息...")
+                    logger.info("    更新表统计信息...")
                     try:
-                        cur.execute(f"ANALYZE public.{table_name};")
-                        conn.commit()
-                        logger.info(f"    统计信息已更新")
+                        with prof.stage("analyze"):
+                            cur.execute(f"ANALYZE public.{table_name};")
+                            conn.commit()
+                        logger.info("    统计信息已更新")
                     except Exception:
                         conn.rollback()
-                        logger.warning(f"    更新统计信息失败")
+                        logger.warning("    更新统计信息失败")
 
-                    return count
+                    return stats
 
         except Exception as e:
             logger.error(f"导入图层 {layer_name} 时出错: {e}")
-            return 0
+            stats = self._new_layer_stats()
+            stats["error"] = str(e)
+            # 丢弃未提交的数据，避免被后续图层的提交带入；
+            # 按预算提交过的数据已在表中，统计中保留
+            try:
+                if writer is not None:
+                    writer.abort()
+                else:
+                    conn.rollback()
+            except Exception:
+                pass
+            if writer is not None:
+                stats["count"] = writer.inserted
+                stats["error_count"] = writer.failed
+                stats["quarantined"] = writer.quarantined
+            return stats
+
+    def _prepare_insert(
+        self,
+        cur,
+        table_name: str,
+        properties: Dict[str, Any],
+        srid: int,
+    ) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        根据表的现有字段构建INSERT语句和字段映射
+
+        Returns:
+            (INSERT语句, [(数据库字段, GDB字段), ...])，字段按数据库字段顺序排列
+        """
+        # 获取字段映射
+        cur.execute(
+            """
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_schema = 'public' 
+              AND table_name = %s
+            ORDER BY ordinal_position;
+        """,
+            (table_name,),
+        )
+
+        existing_columns = [row[0] for row in cur.fetchall()]
+        data_columns = [
+            col for col in existing_columns if col not in ["id", "geom", "tile_code"]
+        ]
+
+        # 构建字段映射（数据库字段 -> GDB字段）
+        field_mapping = {}
+        for field_name in properties.keys():
+            clean_name = self._clean_identifier(field_name)
+            if clean_name in data_columns and clean_name not in field_mapping:
+                field_mapping[clean_name] = field_name
+
+        # 确保字段顺序与数据库表字段顺序一致
+        column_sources = [
+            (db_col, field_mapping[db_col])
+            for db_col in data_columns
+            if db_col in field_mapping
+        ]
+        mapped_db_columns = [db_col for db_col, _ in column_sources]
+
+        # 准备插入SQL（按照数据库字段顺序）
+        field_names = ["geom", "tile_code"] + mapped_db_columns
+        placeholders = [f"ST_GeomFromText(%s, {srid})", "%s"] + ["%s"] * len(
+            mapped_db_columns
+        )
+
+        insert_sql = f"""
+        INSERT INTO public.{table_name} ({', '.join(field_names)})
+        VALUES ({', '.join(placeholders)})
+        """
+        return insert_sql, column_sources
+
+    def _run_serial(
+        self,
+        src,
+        writer: "BatchWriter",
+        column_sources: List[Tuple[str, str]],
+        tile_code: str,
+        batch_size: int,
+        skip_invalid: bool,
+        prof,
+    ) -> Dict[str, int]:
+        """串行导入：读取、转换、写入依次执行"""
+        stats = self._new_layer_stats()
+        start_time = last_log_time = time.time()
+
+        features = iter(src)
+        while True:
+            read_start = time.perf_counter()
+            chunk = [feature_record(f) for f in islice(features, batch_size)]
+            prof.add("read", time.perf_counter() - read_start, len(chunk))
+            if not chunk:
+                break
+            stats["processed"] += len(chunk)
+
+            rows, rejects, timings = convert_features(
+                chunk, column_sources, tile_code, skip_invalid
+            )
+            self._account_conversion(stats, rejects, timings, prof)
+
+            writer.add(rows, rejects)
+            stats["count"] = writer.inserted
+
+            current_time = time.time()
+            if current_time - last_log_time >= 5:
+                self._log_progress(stats, start_time, current_time)
+                last_log_time = current_time
+
+        writer.close()
+        return self._finish_layer_stats(stats, writer)
+
+    def _run_pipeline(
+        self,
+        src,
+        writer: "BatchWriter",
+        column_sources: List[Tuple[str, str]],
+        tile_code: str,
+        batch_size: int,
+        skip_invalid: bool,
+        prof,
+        executor: Optional[Executor],
+    ) -> Dict[str, int]:
+        """
+        流水线导入：读取线程 -> 几何处理（进程池或当前线程）-> 写入线程
+
+        各阶段之间使用有界队列连接，下游变慢时上游自动阻塞（背压），
+        内存占用上限约为 (2 * queue_size + 在途任务数) * batch_size 条要素。
+        """
+        stats = self._new_layer_stats()
+        raw_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        row_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        start_time = time.time()
+
+        def reader():
+            try:
+                features = iter(src)
+                while not stop.is_set():
+                    read_start = time.perf_counter()
+                    chunk = [feature_record(f) for f in islice(features, batch_size)]
+                    prof.add("read", time.perf_counter() - read_start, len(chunk))
+                    if not chunk:
+                        break
+                    if not _queue_put(raw_queue, chunk, stop):
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                _queue_put(raw_queue, _END, stop)
+
+        def write_loop():
+            last_log_time = start_time
+            try:
+                while True:
+                    item = _queue_get(row_queue, stop)
+                    if item is _END:
+                        break
+                    writer.add(*item)
+
+                    current_time = time.time()
+                    if current_time - last_log_time >= 5:
+                        self._log_progress(
+                            {"processed": stats["processed"], "count": writer.inserted},
+                            start_time,
+                            current_time,
+                        )
+                        last_log_time = current_time
+                if not stop.is_set():
+                    writer.close()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        reader_thread = threading.Thread(
+            target=reader, name="gdb-import-reader", daemon=True
+        )
+        writer_thread = threading.Thread(
+            target=write_loop, name="gdb-import-writer", daemon=True
+        )
+        reader_thread.start()
+        writer_thread.start()
+
+        max_inflight = max(1, self.pipeline_workers) * 2
+        pending: deque = deque()
+
+        def forward(future: Future) -> None:
+            rows, rejects, timings = future.result()
+            self._account_conversion(stats, rejects, timings, prof)
+            if rows or rejects:
+                _queue_put(row_queue, (rows, rejects), stop)
+
+        try:
+            while True:
+                chunk = _queue_get(raw_queue, stop)
+                if chunk is _END:
+                    break
+                stats["processed"] += len(chunk)
+
+                args = (chunk, column_sources, tile_code, skip_invalid)
+                if executor is not None:
+                    pending.append(executor.submit(convert_features, *args))
+                else:
+                    future: Future = Future()
+                    future.set_result(convert_features(*args))
+                    pending.append(future)
+
+                # 按提交顺序转发结果，限制在途任务数
+                while pending and (len(pending) >= max_inflight or pending[0].done()):
+                    forward(pending.popleft())
+
+            while pending and not stop.is_set():
+                forward(pending.popleft())
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            _queue_put(row_queue, _END, stop)
+            reader_thread.join()
+            writer_thread.join()
+
+        if errors:
+            raise errors[0]
+
+        return self._finish_layer_stats(stats, writer)
+
+    def _new_layer_stats(self) -> Dict[str, Any]:
+        """创建图层导入统计"""
+        return {
+            "processed": 0,
+            "count": 0,
+            "error_count": 0,
+            "repaired": 0,
+            "quarantined": 0,
+            "repair_seconds": 0.0,
+        }
+
+    def _finish_layer_stats(
+        self, stats: Dict[str, Any], writer: "BatchWriter"
+    ) -> Dict[str, Any]:
+        """合并写入器的统计结果"""
+        stats["count"] = writer.inserted
+        stats["error_count"] += writer.failed
+        stats["quarantined"] = writer.quarantined
+        stats["repair_seconds"] = round(stats["repair_seconds"], 6)
+        return stats
+
+    def _account_conversion(
+        self,
+        stats: Dict[str, Any],
+        rejects: List[Dict[str, Any]],
+        timings: Dict[str, List[float]],
+        prof,
+    ) -> None:
+        """汇总一批要素的转换结果（失败计数、修复统计、阶段耗时）"""
+        for reject in rejects:
+            stats["error_count"] += 1
+            if stats["error_count"] <= 5:
+                logger.warning(f"跳过记录: {reject['reason']}")
+        if "repair" in timings:
+            repair_seconds, repair_count = timings["repair"]
+            stats["repair_seconds"] += repair_seconds
+            # 带原始WKB的拒绝记录来自修复失败
+            stats["repaired"] += int(repair_count) - sum(
+                1 for r in rejects if r["wkb"] is not None
+            )
+        for name, (duration, count) in timings.items():
+            prof.add(name, duration, int(count))
+
+    def _log_progress(
+        self, stats: Dict[str, int], start_time: float, current_time: float
+    ) -> None:
+        """输出图层导入进度"""
+        elapsed = current_time - start_time
+        speed = stats["count"] / elapsed if elapsed > 0 else 0
+        logger.info(
+            f"    已处理: {stats['processed']:,} 条 - 已导入 {stats['count']:,} 条 - 速度: {speed:.0f} 条/秒"
+        )
+
+    def _ensure_quarantine_table(self, conn: psycopg2.extensions.connection) -> bool:
+        """创建隔离表（如果不存在），失败时返回False"""
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS public.{QUARANTINE_TABLE} (
+                        id SERIAL PRIMARY KEY,
+                        table_name VARCHAR(63) NOT NULL,
+                        tile_code VARCHAR(10),
+                        layer_name TEXT,
+                        stage VARCHAR(16) NOT NULL,
+                        reason TEXT,
+                        original_wkb BYTEA,
+                        properties JSONB,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                """
+                )
+                cur.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {QUARANTINE_TABLE}_table_idx
+                    ON public.{QUARANTINE_TABLE} (table_name, tile_code);
+                """
+                )
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"创建隔离表失败，被拒绝的要素将只计数: {e}")
+            return False
 
     def _create_table_if_not_exists(
         self,
@@ -0,0 +1,244 @@
+"""
+导入性能剖析模块
+按阶段（读取、校验、修复、序列化、写入、提交、ANALYZE）统计导入耗时，
+支持按图幅/图层汇总，并可导出Chrome Trace格式（speedscope可直接打开）
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 导入流水线的标准阶段（按执行顺序）
+IMPORT_STAGES = (
+    "read",
+    "validate",
+    "repair",
+    "serialize",
+    "write",
+    "commit",
+    "analyze",
+)
+
+# 禁用时复用的空上下文，避免每次调用分配对象
+_NULL_STAGE = nullcontext()
+
+
+class _StageTimer:
+    """单次阶段计时上下文"""
+
+    __slots__ = ("_layer", "_name", "_start")
+
+    def __init__(self, layer: "LayerProfile", name: str):
+        self._layer = layer
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._layer._record(self._name, self._start, time.perf_counter())
+        return False
+
+
+class LayerProfile:
+    """单个图层的阶段统计句柄"""
+
+    def __init__(self, profiler: "ImportProfiler", sheet: str, layer: str):
+        self.profiler = profiler
+        self.sheet = sheet
+        self.layer = layer
+
+    def stage(self, name: str):
+        """
+        返回阶段计时上下文
+
+        Args:
+            name: 阶段名称（见IMPORT_STAGES）
+
+        Example:
+            with layer_profile.stage("write"):
+                cur.executemany(sql, batch)
+        """
+        return _StageTimer(self, name)
+
+    def add(self, name: str, duration: float, count: int = 1) -> None:
+        """
+        直接累加阶段耗时（用于已在别处计时的场景）
+
+        Args:
+            name: 阶段名称
+            duration: 耗时（秒）
+            count: 计数
+        """
+        self.profiler._accumulate(self.sheet, self.layer, name, duration, count)
+
+    def _record(self, name: str, start: float, end: float) -> None:
+        self.profiler._accumulate(self.sheet, self.layer, name, end - start, 1)
+        if self.profiler.trace_path:
+            self.profiler._trace(self.sheet, self.layer, name, start, end)
+
+
+class _NullLayerProfile:
+    """禁用剖析时使用的空句柄，所有操作均为空操作"""
+
+    sheet = ""
+    layer = ""
+
+    def stage(self, name: str):
+        return _NULL_STAGE
+
+    def add(self, name: str, duration: float, count: int = 1) -> None:
+        pass
+
+
+_NULL_LAYER = _NullLayerProfile()
+
+
+class ImportProfiler:
+    """导入阶段剖析器"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_path: Optional[str] = None,
+        max_trace_events: int = 200000,
+    ):
+        """
+        初始化导入剖析器
+
+        Args:
+            enabled: 是否启用剖析，禁用时所有计时均为空操作
+            trace_path: Chrome Trace输出路径（可选），提供则记录逐次事件
+            max_trace_events: 最多保留的Trace事件数，超出后只统计不记录
+        """
+        self.enabled = enabled
+        self.trace_path = trace_path if enabled else None
+        self.max_trace_events = max_trace_events
+
+        # {(sheet, layer): {stage: [total_seconds, count]}}
+        self._stats: Dict[tuple, Dict[str, List[float]]] = defaultdict(
+            lambda: defaultdict(lambda: [0.0, 0])
+        )
+        self._events: List[Dict[str, Any]] = []
+        self._dropped_events = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def layer(self, sheet: str, layer: str):
+        """
+        获取图层剖析句柄
+
+        Args:
+            sheet: 图幅代码或GDB名称
+            layer: 图层名称
+
+        Returns:
+            图层剖析句柄（禁用时返回空句柄）
+        """
+        if not self.enabled:
+            return _NULL_LAYER
+        return LayerProfile(self, sheet, layer)
+
+    def _accumulate(
+        self, sheet: str, layer: str, name: str, duration: float, count: int
+    ) -> None:
+        with self._lock:
+            entry = self._stats[(sheet, layer)][name]
+            entry[0] += duration
+            entry[1] += count
+
+    def _trace(
+        self, sheet: str, layer: str, name: str, start: float, end: float
+    ) -> None:
+        with self._lock:
+            if len(self._events) >= self.max_trace_events:
+                self._dropped_events += 1
+                return
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": f"{sheet}/{layer}",
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": {"sheet": sheet, "layer": layer},
+                }
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出统计结果
+
+        Returns:
+            包含总计（stages）和按图幅/图层明细（sheets）的字典
+        """
+        with self._lock:
+            totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+            sheets: Dict[str, Dict[str, Any]] = defaultdict(dict)
+            for (sheet, layer), stages in self._stats.items():
+                layer_stats = {}
+                for name, (total, count) in stages.items():
+                    layer_stats[name] = {
+                        "total_seconds": round(total, 6),
+                        "count": int(count),
+                    }
+                    totals[name][0] += total
+                    totals[name][1] += count
+                sheets[sheet][layer] = layer_stats
+
+            return {
+                "enabled": self.enabled,
+                "stages": {
+                    name: {"total_seconds": round(total, 6), "count": int(count)}
+                    for name, (total, count) in totals.items()
+                },
+                "sheets": dict(sheets),
+                "trace_events": len(self._events),
+                "dropped_trace_events": self._dropped_events,
+            }
+
+    def dump_chrome_trace(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        写出Chrome Trace文件（chrome://tracing 或 speedscope.app 可打开）
+
+        Args:
+            path: 输出路径（可选），默认使用初始化时的trace_path
+
+        Returns:
+            实际写出的路径，未配置路径时返回None
+        """
+        path = path or self.trace_path
+        if not path:
+            return None
+
+        with self._lock:
+            payload = {
+                "traceEvents": list(self._events),
+                "displayTimeUnit": "ms",
+            }
+
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        logger.info(
+            f"导入剖析Trace已写出: {out} ({len(payload['traceEvents'])} 个事件)"
+        )
+        return str(out)
+
+
+# 默认的禁用剖析器
+NULL_PROFILER = ImportProfiler(enabled=False)
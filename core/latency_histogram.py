@@ -0,0 +1,236 @@
+"""
+延迟直方图模块
+对数线性分桶（每个2的幂区间再均分16份，相对误差不超过6.25%）的固定内存直方图，
+按10秒时间片滚动保存最近1小时的数据，可计算最近1分钟、5分钟、1小时的分位数、
+错误率和吞吐量；另保存启动以来的累计直方图
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 每个2的幂区间的子桶数（2**SUB_BUCKET_BITS）
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# 记录单位：微秒；超过上限（约12.7天）的值计入最后一个桶
+MAX_MICROS = 1 << 40
+
+# 时间片长度（秒）和时间片数（覆盖最近1小时）
+SLOT_SECONDS = 10
+SLOT_COUNT = 360
+
+# 统计窗口名 -> 秒数
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+PERCENTILES = (50, 90, 95, 99)
+
+
+def bucket_index(seconds: float) -> int:
+    """
+    计算耗时所在的桶
+
+    Args:
+        seconds: 耗时（秒）
+
+    Returns:
+        桶编号（小于16微秒时每微秒一个桶，之后每个2的幂区间16个桶）
+    """
+    micros = min(int(seconds * 1_000_000), MAX_MICROS)
+    if micros < SUB_BUCKETS:
+        return max(micros, 0)
+    shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKETS * (shift + 1) + (micros >> shift) - SUB_BUCKETS
+
+
+def bucket_bounds(index: int) -> Tuple[float, float]:
+    """
+    桶的取值范围
+
+    Args:
+        index: 桶编号
+
+    Returns:
+        (下界, 上界)，单位秒，下界包含、上界不包含
+    """
+    if index < SUB_BUCKETS:
+        return index / 1_000_000, (index + 1) / 1_000_000
+    shift = index // SUB_BUCKETS - 1
+    lower = (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+    return lower / 1_000_000, (lower + (1 << shift)) / 1_000_000
+
+
+class _Slot:
+    """一个时间片内的数据"""
+
+    __slots__ = ("epoch", "buckets", "count", "errors", "total", "max")
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class LatencyHistogram:
+    """
+    单个操作的延迟直方图
+
+    本身不加锁，记录和读取由调用方（PerformanceMonitor）持锁串行进行。
+    内存上限为 SLOT_COUNT 个时间片 × 桶数。
+    """
+
+    def __init__(self):
+        self._slots: List[Optional[_Slot]] = [None] * SLOT_COUNT
+        self._cumulative = _Slot(0)
+        self.created_at = time.time()
+
+    def record(
+        self, duration: float, success: bool = True, now: Optional[float] = None
+    ) -> None:
+        """
+        记录一次调用
+
+        Args:
+            duration: 耗时（秒）
+            success: 是否成功
+            now: 当前时间（可选，默认time.time()）
+        """
+        epoch = int((time.time() if now is None else now) // SLOT_SECONDS)
+        position = epoch % SLOT_COUNT
+        slot = self._slots[position]
+        if slot is None or slot.epoch < epoch:
+            slot = self._slots[position] = _Slot(epoch)
+        index = bucket_index(duration)
+        # 早于时间片记录范围的调用（时钟回拨）只计入累计直方图
+        targets = (
+            (slot, self._cumulative) if slot.epoch == epoch else (self._cumulative,)
+        )
+        for target in targets:
+            target.buckets[index] = target.buckets.get(index, 0) + 1
+            target.count += 1
+            target.total += duration
+            if duration > target.max:
+                target.max = duration
+            if not success:
+                target.errors += 1
+
+    def _merge(self, slots: Iterable[_Slot]) -> _Slot:
+        merged = _Slot(0)
+        for slot in slots:
+            for index, count in dict(slot.buckets).items():
+                merged.buckets[index] = merged.buckets.get(index, 0) + count
+            merged.count += slot.count
+            merged.errors += slot.errors
+            merged.total += slot.total
+            merged.max = max(merged.max, slot.max)
+        return merged
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        统计最近一段时间的调用
+
+        Args:
+            seconds: 窗口长度（秒，最长 SLOT_SECONDS × SLOT_COUNT）
+            now: 当前时间（可选）
+
+        Returns:
+            {count, errors, error_rate, throughput, mean, max, p50, p90, p95, p99}
+        """
+        now = time.time() if now is None else now
+        epoch = int(now // SLOT_SECONDS)
+        oldest = epoch - min(int(seconds // SLOT_SECONDS), SLOT_COUNT) + 1
+        merged = self._merge(
+            slot
+            for slot in list(self._slots)
+            if slot is not None and oldest <= slot.epoch <= epoch
+        )
+        # 当前时间片只过去了一部分；服务启动不足一个窗口时按实际时长计算吞吐量
+        elapsed = min(seconds, max(now - self.created_at, SLOT_SECONDS))
+        return self._summary(merged, elapsed)
+
+    def _summary(self, data: _Slot, elapsed: float) -> Dict[str, Any]:
+        summary = {
+            "count": data.count,
+            "errors": data.errors,
+            "error_rate": round(data.errors / data.count, 4) if data.count else 0.0,
+            "throughput": round(data.count / elapsed, 4) if elapsed > 0 else 0.0,
+            "mean": round(data.total / data.count, 6) if data.count else 0.0,
+            "max": round(data.max, 6),
+        }
+        summary.update(
+            zip(
+                (f"p{p}" for p in PERCENTILES),
+                self._percentiles(data, PERCENTILES),
+            )
+        )
+        return summary
+
+    @staticmethod
+    def _percentiles(data: _Slot, percentiles: Sequence[float]) -> List[float]:
+        """按桶中点估算分位数（不超过观测到的最大值）"""
+        if not data.count:
+            return [0.0] * len(percentiles)
+        items = sorted(data.buckets.items())
+        results = []
+        for percentile in percentiles:
+            rank = max(1, -(-data.count * percentile // 100))
+            seen = 0
+            for index, count in items:
+                seen += count
+                if seen >= rank:
+                    lower, upper = bucket_bounds(index)
+                    results.append(round(min((lower + upper) / 2, data.max), 6))
+                    break
+            else:
+                results.append(round(data.max, 6))
+        return results
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        统计启动以来的所有调用
+
+        Returns:
+            与window相同的字段，throughput为启动以来的平均值
+        """
+        return self._summary(self._cumulative, time.time() - self.created_at)
+
+    def cumulative_buckets(self, bounds: Sequence[float]) -> List[int]:
+        """
+        启动以来耗时不超过各上界的调用数（累计分布，用于Prometheus直方图）
+
+        桶跨越上界时按桶上界判断，计数可能略微偏向较大的上界。
+
+        Args:
+            bounds: 升序的上界（秒）
+
+        Returns:
+            与bounds对应的累计调用数
+        """
+        items = sorted(dict(self._cumulative.buckets).items())
+        counts = []
+        seen = 0
+        position = 0
+        for bound in bounds:
+            while (
+                position < len(items)
+                and bucket_bounds(items[position][0])[1] <= bound + 1e-9
+            ):
+                seen += items[position][1]
+                position += 1
+            counts.append(seen)
+        return counts
+
+    @property
+    def count(self) -> int:
+        """启动以来的调用数"""
+        return self._cumulative.count
+
+    @property
+    def total(self) -> float:
+        """启动以来的总耗时（秒）"""
+        return self._cumulative.total
+
+    @property
+    def errors(self) -> int:
+        """启动以来的失败次数"""
+        return self._cumulative.errors
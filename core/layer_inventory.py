@@ -0,0 +1,311 @@
+"""
+GDB图层清单模块
+一次性读取GDB中所有图层的名称、要素数、字段结构和空间范围，
+用于规划导入（跳过空图层、按要素数从大到小排序），并可缓存到磁盘
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import fiona
+
+from .logging_config import get_logger
+
+try:
+    from osgeo import ogr
+
+    HAS_OGR = True
+except ImportError:
+    HAS_OGR = False
+
+logger = get_logger(__name__)
+
+if HAS_OGR:
+    # OGR字段类型 -> Fiona字段类型名（与 GDBImporter._get_pg_field_type 对应）
+    _OGR_FIELD_TYPES = {
+        ogr.OFTInteger: "int32",
+        ogr.OFTInteger64: "int64",
+        ogr.OFTReal: "float",
+        ogr.OFTString: "str",
+        ogr.OFTDate: "date",
+        ogr.OFTTime: "time",
+        ogr.OFTDateTime: "datetime",
+        ogr.OFTBinary: "bytes",
+    }
+
+# 进程内清单缓存 {(GDB绝对路径, 指纹): 清单}
+_memory_inventory: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_memory_lock = threading.Lock()
+
+
+def gdb_fingerprint(gdb_path: str) -> str:
+    """
+    计算GDB目录指纹（文件名、大小、修改时间），数据变化时指纹随之变化
+
+    Args:
+        gdb_path: GDB目录路径
+
+    Returns:
+        指纹字符串
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    path = Path(gdb_path)
+    if path.is_dir():
+        entries = sorted(os.scandir(path), key=lambda e: e.name)
+        for entry in entries:
+            if entry.is_file():
+                stat = entry.stat()
+                digest.update(
+                    f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+                )
+    else:
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def _new_entry(name: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "feature_count": None,
+        "geometry_type": None,
+        "properties": {},
+        "bounds": None,
+    }
+
+
+def _ogr_field_type(field_defn) -> str:
+    """OGR字段定义 -> Fiona风格的类型名（如 str:254、int32）"""
+    if field_defn.GetSubType() == ogr.OFSTBoolean:
+        return "bool"
+    name = _OGR_FIELD_TYPES.get(field_defn.GetType(), "str")
+    if name == "str" and field_defn.GetWidth():
+        return f"str:{field_defn.GetWidth()}"
+    return name
+
+
+def _ogr_geometry_type(geom_type: int) -> Optional[str]:
+    """OGR几何类型 -> Fiona风格的类型名（如 MultiPolygon、3D Point）"""
+    if geom_type == ogr.wkbNone:
+        return None
+    name = ogr.GeometryTypeToName(ogr.GT_Flatten(geom_type)).replace(" ", "")
+    return f"3D {name}" if ogr.GT_HasZ(geom_type) else name
+
+
+@contextmanager
+def _ogr_exceptions():
+    """
+    在作用域内让OGR出错时抛出异常，退出后恢复原设置
+
+    OGR的异常开关是进程级的，不在导入时全局开启，以免影响Fiona等其他OGR使用者
+    """
+    if hasattr(ogr, "ExceptionMgr"):
+        with ogr.ExceptionMgr(useExceptions=True):
+            yield
+        return
+    previous = ogr.GetUseExceptions()
+    ogr.UseExceptions()
+    try:
+        yield
+    finally:
+        if not previous:
+            ogr.DontUseExceptions()
+
+
+def _read_layers_ogr(gdb_path: str) -> List[Dict[str, Any]]:
+    """打开一次数据集，读取所有图层的元数据"""
+    layers = []
+    dataset = ogr.Open(str(gdb_path), 0)
+    try:
+        for index in range(dataset.GetLayerCount()):
+            layer = dataset.GetLayerByIndex(index)
+            entry = _new_entry(layer.GetName())
+            try:
+                defn = layer.GetLayerDefn()
+                entry["geometry_type"] = _ogr_geometry_type(layer.GetGeomType())
+                entry["properties"] = {
+                    defn.GetFieldDefn(i).GetName(): _ogr_field_type(
+                        defn.GetFieldDefn(i)
+                    )
+                    for i in range(defn.GetFieldCount())
+                }
+                # force=0：驱动不支持快速计数时返回-1，保持未知
+                count = layer.GetFeatureCount(0)
+                entry["feature_count"] = count if count >= 0 else None
+                if count and layer.GetGeomType() != ogr.wkbNone:
+                    try:
+                        minx, maxx, miny, maxy = layer.GetExtent(0)
+                        entry["bounds"] = [minx, miny, maxx, maxy]
+                    except Exception:
+                        pass
+            except Exception as e:
+                logger.warning(f"读取图层 {entry['name']} 信息失败: {e}")
+            layers.append(entry)
+    finally:
+        dataset = None  # 释放数据集句柄
+    return layers
+
+
+def inventory_cache_name(gdb_path: str) -> str:
+    """
+    清单缓存文件名（按GDB的完整路径和修改时间区分，不同目录下的同名GDB不冲突）
+
+    Args:
+        gdb_path: GDB目录路径
+
+    Returns:
+        文件名，形如 <GDB名>-<路径与修改时间摘要>.inventory.json
+    """
+    path = Path(gdb_path).resolve()
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{path}:{path.stat().st_mtime_ns}".encode())
+    return f"{path.name}-{digest.hexdigest()}.inventory.json"
+
+
+def build_layer_inventory(gdb_path: str) -> Dict[str, Any]:
+    """
+    读取GDB图层清单（只读取元数据，不遍历要素）
+
+    安装了GDAL Python绑定（osgeo）时只打开一次数据集读取所有图层；
+    否则逐个图层用Fiona打开。要素数使用驱动的快速计数，
+    空间范围使用图层记录的范围。
+
+    Args:
+        gdb_path: GDB目录路径
+
+    Returns:
+        清单字典：{"gdb_path", "layers": [{"name", "feature_count",
+        "geometry_type", "properties", "bounds"}, ...]}
+    """
+    if HAS_OGR:
+        try:
+            with _ogr_exceptions():
+                layers = _read_layers_ogr(gdb_path)
+            return {"gdb_path": str(gdb_path), "layers": layers}
+        except Exception as e:
+            logger.warning(f"使用OGR读取图层清单失败，改为逐个图层读取: {e}")
+
+    try:
+        layer_names = fiona.listlayers(gdb_path)
+    except Exception as e:
+        logger.error(f"无法读取GDB图层: {e}")
+        layer_names = []
+
+    layers = []
+    with fiona.Env():
+        for name in layer_names:
+            entry = _new_entry(name)
+            try:
+                with fiona.open(gdb_path, layer=name) as src:
+                    entry["geometry_type"] = src.schema.get("geometry")
+                    entry["properties"] = dict(src.schema.get("properties", {}))
+                    try:
+                        entry["feature_count"] = len(src)
+                    except Exception:
+                        pass  # 驱动不支持快速计数时保持未知
+                    if entry["feature_count"]:
+                        try:
+                            entry["bounds"] = list(src.bounds)
+                        except Exception:
+                            pass
+            except Exception as e:
+                logger.warning(f"读取图层 {name} 信息失败: {e}")
+            layers.append(entry)
+
+    return {"gdb_path": str(gdb_path), "layers": layers}
+
+
+def load_layer_inventory(
+    gdb_path: str, cache_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    获取GDB图层清单（优先使用缓存）
+
+    缓存按GDB指纹校验，GDB内容变化后自动重新读取。
+
+    Args:
+        gdb_path: GDB目录路径
+        cache_dir: 磁盘缓存目录（可选），不提供则只使用进程内缓存
+
+    Returns:
+        清单字典，额外包含 fingerprint 和 cached（是否命中缓存）
+    """
+    try:
+        fingerprint = gdb_fingerprint(gdb_path)
+    except OSError as e:
+        logger.warning(f"计算GDB指纹失败，不使用清单缓存: {e}")
+        inventory = build_layer_inventory(gdb_path)
+        inventory.update({"fingerprint": None, "cached": False})
+        return inventory
+
+    resolved = str(Path(gdb_path).resolve())
+    memory_key = (resolved, fingerprint)
+    with _memory_lock:
+        cached = _memory_inventory.get(memory_key)
+    if cached is not None:
+        return dict(cached, cached=True)
+
+    cache_file = None
+    if cache_dir:
+        cache_file = Path(cache_dir) / inventory_cache_name(gdb_path)
+        if cache_file.exists():
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if (
+                    cached.get("fingerprint") == fingerprint
+                    and cached.get("resolved_path") == resolved
+                ):
+                    with _memory_lock:
+                        _memory_inventory[memory_key] = cached
+                    return dict(cached, cached=True)
+            except Exception as e:
+                logger.warning(f"读取图层清单缓存失败: {e}")
+
+    inventory = build_layer_inventory(gdb_path)
+    inventory["fingerprint"] = fingerprint
+    inventory["resolved_path"] = resolved
+
+    if inventory["layers"]:
+        with _memory_lock:
+            _memory_inventory[memory_key] = inventory
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    json.dump(inventory, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                logger.warning(f"写入图层清单缓存失败: {e}")
+
+    return dict(inventory, cached=False)
+
+
+def plan_layers(
+    inventory: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    根据清单规划导入顺序
+
+    Args:
+        inventory: 图层清单
+
+    Returns:
+        (待导入图层（按要素数从大到小，要素数未知的排在最后）, 空图层)
+    """
+    to_import = []
+    empty = []
+    for entry in inventory.get("layers", []):
+        if entry.get("feature_count") == 0:
+            empty.append(entry)
+        else:
+            to_import.append(entry)
+
+    to_import.sort(
+        key=lambda e: (e.get("feature_count") is None, -(e.get("feature_count") or 0))
+    )
+    return to_import, empty
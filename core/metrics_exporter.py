@@ -0,0 +1,350 @@
+"""
+指标导出模块
+以Prometheus文本格式或OpenMetrics格式导出工具延迟直方图、连接池使用情况、
+缓存命中/未命中/淘汰计数、导入行数和慢查询次数。可在独立的HTTP端口上提供
+/metrics，或定期写入node_exporter textfile collector目录中的文件（默认均关闭）
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from .connection_pool import ConnectionPoolManager
+from .logging_config import get_logger
+from .performance_monitor import get_performance_monitor
+from .server_stats import cache_stats
+
+logger = get_logger(__name__)
+
+PREFIX = "geodata"
+
+# 工具延迟直方图的上界（秒）
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+Labels = Dict[str, Any]
+
+
+class _Family:
+    """一个指标族：名称、类型、说明和样本"""
+
+    __slots__ = ("name", "type", "help", "samples")
+
+    def __init__(self, name: str, metric_type: str, help_text: str):
+        self.name = f"{PREFIX}_{name}"
+        self.type = metric_type
+        self.help = help_text
+        # [(后缀, 标签, 值)]
+        self.samples: List[Tuple[str, Labels, float]] = []
+
+    def add(self, value: float, suffix: str = "", **labels) -> None:
+        self.samples.append((suffix, labels, value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class MetricsExporter:
+    """
+    指标导出器
+
+    每次抓取时从各组件的统计接口读取当前值，不在调用路径上额外记录。
+    """
+
+    def __init__(self, data_importer=None):
+        """
+        初始化指标导出器
+
+        Args:
+            data_importer: DataImporter实例（可选），提供结果缓存、查询缓存和
+                表结构缓存的统计
+        """
+        self.data_importer = data_importer
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def collect(self) -> List[_Family]:
+        """
+        读取所有指标
+
+        Returns:
+            指标族列表
+        """
+        families: List[_Family] = []
+        for collector in (
+            self._collect_tools,
+            self._collect_pools,
+            self._collect_caches,
+            self._collect_imports,
+        ):
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.warning(f"读取指标失败（{collector.__name__}）: {e}")
+        return families
+
+    def _collect_tools(self) -> List[_Family]:
+        monitor = get_performance_monitor()
+        duration = _Family("tool_duration_seconds", "histogram", "工具调用耗时（秒）")
+        errors = _Family("tool_errors", "counter", "工具调用失败次数")
+        slow = _Family(
+            "slow_queries",
+            "counter",
+            f"耗时超过慢查询阈值（{monitor.slow_query_threshold}秒）的调用次数",
+        )
+        bounds = LATENCY_BUCKETS + (float("inf"),)
+        for tool, stats in sorted(monitor.get_latency_buckets(LATENCY_BUCKETS).items()):
+            counts = stats["buckets"] + [stats["count"]]
+            for bound, count in zip(bounds, counts):
+                duration.add(count, "_bucket", tool=tool, le=_format_bound(bound))
+            duration.add(stats["count"], "_count", tool=tool)
+            duration.add(stats["total"], "_sum", tool=tool)
+            errors.add(stats["errors"], "_total", tool=tool)
+            slow.add(stats["slow_queries"], "_total", tool=tool)
+        return [duration, errors, slow]
+
+    def _collect_pools(self) -> List[_Family]:
+        connections = _Family(
+            "pool_connections",
+            "gauge",
+            "连接池连接数（state: in_use、idle）和排队等待的请求数（waiting）",
+        )
+        max_connections = _Family("pool_max_connections", "gauge", "连接池最大连接数")
+        waits = _Family("pool_waits", "counter", "取连接时排队等待的次数")
+        timeouts = _Family("pool_timeouts", "counter", "排队等待超时次数")
+        wait_seconds = _Family("pool_wait_seconds", "counter", "排队等待的总时间（秒）")
+        for key, stats in sorted(ConnectionPoolManager.get_stats().items()):
+            labels = {
+                "pool": key.partition("#")[0],
+                "workload": stats["workload"] or "",
+            }
+            for state in ("in_use", "idle", "waiting"):
+                connections.add(stats[state], **labels, state=state)
+            max_connections.add(stats["maxconn"], **labels)
+            waits.add(stats["waits"], "_total", **labels)
+            timeouts.add(stats["timeouts"], "_total", **labels)
+            wait_seconds.add(stats["wait_time_total"], "_total", **labels)
+
+        lag = _Family("replica_lag_seconds", "gauge", "只读副本复制延迟（秒）")
+        available = _Family("replica_available", "gauge", "只读副本是否参与路由")
+        for primary, stats in sorted(ConnectionPoolManager.get_replica_stats().items()):
+            for replica in stats["replicas"]:
+                labels = {"primary": primary, "replica": replica["name"]}
+                if replica["lag"] is not None:
+                    lag.add(replica["lag"], **labels)
+                available.add(1 if replica["available"] else 0, **labels)
+        return [connections, max_connections, waits, timeouts, wait_seconds] + (
+            [lag, available] if available.samples else []
+        )
+
+    def _collect_caches(self) -> List[_Family]:
+        hits = _Family("cache_hits", "counter", "缓存命中次数")
+        misses = _Family("cache_misses", "counter", "缓存未命中次数")
+        evictions = _Family("cache_evictions", "counter", "缓存因容量淘汰的条目数")
+        for cache, stats in sorted(cache_stats(self.data_importer).items()):
+            hits.add(stats.get("hits", 0), "_total", cache=cache)
+            misses.add(stats.get("misses", 0), "_total", cache=cache)
+            if "evictions" in stats:
+                evictions.add(stats["evictions"], "_total", cache=cache)
+        return [hits, misses, evictions]
+
+    def _collect_imports(self) -> List[_Family]:
+        stats = get_performance_monitor().get_import_stats()
+        imports = _Family("imports", "counter", "完成的数据导入次数")
+        rows = _Family("import_rows", "counter", "导入写入的记录数")
+        seconds = _Family("import_seconds", "counter", "导入总耗时（秒）")
+        rate = _Family(
+            "import_rows_per_second", "gauge", "最近一次导入的每秒写入记录数"
+        )
+        imports.add(stats["imports"], "_total")
+        rows.add(stats["rows"], "_total")
+        seconds.add(stats["seconds"], "_total")
+        rate.add(stats["last_rows_per_second"])
+        return [imports, rows, seconds, rate]
+
+    def render(self, openmetrics: bool = False) -> str:
+        """
+        生成指标文本
+
+        Args:
+            openmetrics: True时使用OpenMetrics格式，否则使用Prometheus文本格式
+
+        Returns:
+            指标文本
+        """
+        lines = []
+        for family in self.collect():
+            # Prometheus文本格式中计数器的名称包含_total后缀
+            name = family.name
+            if family.type == "counter" and not openmetrics:
+                name += "_total"
+            lines.append(f"# HELP {name} {_escape(family.help)}")
+            lines.append(f"# TYPE {name} {family.type}")
+            for suffix, labels, value in family.samples:
+                sample = family.name + suffix
+                if labels:
+                    sample += (
+                        "{"
+                        + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                        + "}"
+                    )
+                lines.append(f"{sample} {_format_value(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """
+        写入指标文件（先写临时文件再替换，collector不会读到写了一半的文件）
+
+        Args:
+            path: 文件路径，node_exporter要求扩展名为.prom
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_textfile_writer(self, path: str, interval: float = 15.0) -> None:
+        """
+        启动后台线程，每 interval 秒写入一次指标文件
+
+        Args:
+            path: 文件路径
+            interval: 写入间隔（秒）
+        """
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.write_textfile(path)
+                except Exception as e:
+                    logger.warning(f"写入指标文件失败: {e}")
+                self._stop.wait(interval)
+
+        self._writer = threading.Thread(
+            target=loop, name="metrics-textfile", daemon=True
+        )
+        self._writer.start()
+        logger.info(f"指标写入文件: {path}（每{interval}秒）")
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1") -> None:
+        """
+        在独立端口上提供 /metrics（后台线程）
+
+        客户端在Accept中声明 application/openmetrics-text 时返回OpenMetrics格式。
+
+        Args:
+            port: 端口
+            host: 监听地址，默认只监听本机
+        """
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get(
+                    "Accept", ""
+                )
+                try:
+                    body = exporter.render(openmetrics).encode("utf-8")
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type",
+                    (
+                        OPENMETRICS_CONTENT_TYPE
+                        if openmetrics
+                        else PROMETHEUS_CONTENT_TYPE
+                    ),
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # stdout用于MCP通信，访问日志只记录到调试级别
+                logger.debug("指标请求: " + format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        ).start()
+        logger.info(f"指标端点: http://{host}:{self._server.server_port}/metrics")
+
+    def close(self) -> None:
+        """停止HTTP服务和文件写入线程"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def start_metrics_exporter(
+    data_importer, config: Dict[str, Any]
+) -> Optional[MetricsExporter]:
+    """
+    按配置启动指标导出（端口和文件路径都未配置时不启动）
+
+    Args:
+        data_importer: DataImporter实例
+        config: 指标配置（ConfigManager.get_metrics_config()）
+
+    Returns:
+        指标导出器，未启用时返回None
+    """
+    if not config.get("port") and not config.get("textfile"):
+        return None
+    exporter = MetricsExporter(data_importer)
+    if config.get("port"):
+        try:
+            exporter.start_http_server(config["port"], config.get("host", "127.0.0.1"))
+        except OSError as e:
+            logger.error(f"启动指标端点失败（端口 {config['port']}）: {e}")
+    if config.get("textfile"):
+        exporter.start_textfile_writer(
+            config["textfile"], config.get("textfile_interval", 15.0)
+        )
+    return exporter
@@ -1,31 +1,42 @@
 """
 性能监控模块
-提供性能监控装饰器和查询统计功能
+提供性能监控装饰器和查询统计功能，每个操作的延迟记录在固定内存的直方图中，
+可查询最近1分钟、5分钟、1小时的分位数（p50/p90/p95/p99）、错误率和吞吐量
 """
 
 import time
 import functools
-from typing import Dict, Any, Optional
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence
 from collections import defaultdict, deque
 from datetime import datetime
-import logging
 
+from .latency_histogram import WINDOWS, LatencyHistogram
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
 class PerformanceMonitor:
-    """性能监控器"""
+    """
+    性能监控器（线程安全）
+
+    统计的更新和读取都持有同一把锁，读取返回副本；服务统计、指标导出可以在
+    其他线程中与记录同时进行。
+    """
 
-    def __init__(self, slow_query_threshold: float = 5.0):
+    def __init__(self, slow_query_threshold: float = 5.0, max_statements: int = 500):
         """
         初始化性能监控器
 
         Args:
             slow_query_threshold: 慢查询阈值（秒），默认5秒
+            max_statements: 进程内保留的不同查询语句数上限
         """
         self.slow_query_threshold = slow_query_threshold
+        self._lock = threading.Lock()
         self.query_stats: Dict[str, Dict[str, Any]] = defaultdict(
             lambda: {
                 "count": 0,
@@ -36,6 +47,23 @@ class PerformanceMonitor:
             }
         )
         self.recent_queries: deque = deque(maxlen=100)  # 保留最近100条查询
+        self.slow_query_samples: deque = deque(maxlen=50)  # 保留最近50条慢查询
+        # 每个操作的延迟直方图（分位数、错误率、吞吐量）
+        self.latency: Dict[str, LatencyHistogram] = {}
+
+        # 按语句统计的执行次数（启动预热使用）
+        self.max_statements = max_statements
+        self.statement_stats: Dict[tuple, Dict[str, Any]] = {}
+        self.history_store = None
+        self._history_executor: Optional[ThreadPoolExecutor] = None
+
+        # 导入统计（导入次数、行数、耗时、最近一次的每秒行数）
+        self.import_stats: Dict[str, Any] = {
+            "imports": 0,
+            "rows": 0,
+            "seconds": 0.0,
+            "last_rows_per_second": 0.0,
+        }
 
     def record_query(
         self,
@@ -43,6 +71,7 @@ class PerformanceMonitor:
         duration: float,
         success: bool = True,
         error: Optional[str] = None,
+        detail: Optional[str] = None,
     ) -> None:
         """
         记录查询统计
@@ -52,30 +81,177 @@ class PerformanceMonitor:
             duration: 执行时间（秒）
             success: 是否成功
             error: 错误信息（如果失败）
+            detail: 查询内容（可选，如SQL或表名），只随慢查询样本保存
         """
-        stats = self.query_stats[operation]
-        stats["count"] += 1
-        stats["total_time"] += duration
-        stats["min_time"] = min(stats["min_time"], duration)
-        stats["max_time"] = max(stats["max_time"], duration)
+        slow = duration > self.slow_query_threshold
+        timestamp = datetime.now().isoformat()
+        with self._lock:
+            stats = self.query_stats[operation]
+            stats["count"] += 1
+            stats["total_time"] += duration
+            stats["min_time"] = min(stats["min_time"], duration)
+            stats["max_time"] = max(stats["max_time"], duration)
+
+            histogram = self.latency.get(operation)
+            if histogram is None:
+                histogram = self.latency[operation] = LatencyHistogram()
+            histogram.record(duration, success)
+
+            if slow:
+                stats["slow_queries"] += 1
+                self.slow_query_samples.append(
+                    {
+                        "operation": operation,
+                        "duration": duration,
+                        "success": success,
+                        "error": error,
+                        "detail": detail[:1000] if detail else None,
+                        "timestamp": timestamp,
+                    }
+                )
+
+            # 记录最近查询
+            self.recent_queries.append(
+                {
+                    "operation": operation,
+                    "duration": duration,
+                    "success": success,
+                    "error": error,
+                    "timestamp": timestamp,
+                }
+            )
 
-        if duration > self.slow_query_threshold:
-            stats["slow_queries"] += 1
+        if slow:
             logger.warning(
                 f"慢查询警告: {operation} 耗时 {duration:.2f}秒 "
                 f"(阈值: {self.slow_query_threshold}秒)"
             )
 
-        # 记录最近查询
-        self.recent_queries.append(
+    def record_import(self, rows: int, duration: float) -> None:
+        """
+        记录一次数据导入
+
+        Args:
+            rows: 写入的记录数
+            duration: 导入耗时（秒）
+        """
+        with self._lock:
+            stats = self.import_stats
+            stats["imports"] += 1
+            stats["rows"] += rows
+            stats["seconds"] += duration
+            stats["last_rows_per_second"] = rows / duration if duration > 0 else 0.0
+
+    def get_import_stats(self) -> Dict[str, Any]:
+        """
+        获取导入统计
+
+        Returns:
+            {imports, rows, seconds, last_rows_per_second}
+        """
+        with self._lock:
+            return dict(self.import_stats)
+
+    def set_history_store(self, store) -> None:
+        """
+        设置持久化的查询历史（如磁盘缓存），使查询历史在进程重启后保留
+
+        Args:
+            store: 提供 record_statement(operation, statement, duration, key) 和
+                top_statements(operation, limit) 的对象，None表示只在进程内统计
+        """
+        self.history_store = store
+        if store is not None and self._history_executor is None:
+            # 单线程写入，不阻塞调用方
+            self._history_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="query-history"
+            )
+
+    def record_statement(
+        self,
+        operation: str,
+        statement: str,
+        duration: float,
+        key: Optional[str] = None,
+    ) -> None:
+        """
+        按语句记录查询（用于启动预热时选出最常用的查询）
+
+        Args:
+            operation: 操作名称（如 'execute_sql'）
+            statement: 原始查询语句（预热时原样重放）
+            duration: 执行时间（秒）
+            key: 统计键（如规范化SQL），默认为statement；键相同的语句合并计数，
+                保留最近一次的原始语句
+        """
+        key = (operation, statement if key is None else key)
+        with self._lock:
+            stats = self.statement_stats.get(key)
+            if stats is None:
+                if len(self.statement_stats) >= self.max_statements:
+                    # 淘汰执行次数最少的语句
+                    del self.statement_stats[
+                        min(
+                            self.statement_stats,
+                            key=lambda k: self.statement_stats[k]["count"],
+                        )
+                    ]
+                stats = self.statement_stats[key] = {"count": 0, "total_time": 0.0}
+            stats["count"] += 1
+            stats["total_time"] += duration
+            stats["statement"] = statement
+
+        if self.history_store is not None:
+            self._history_executor.submit(
+                self._store_statement, operation, statement, duration, key[1]
+            )
+
+    def _store_statement(
+        self, operation: str, statement: str, duration: float, key: str
+    ) -> None:
+        try:
+            self.history_store.record_statement(operation, statement, duration, key)
+        except Exception as e:
+            logger.debug(f"保存查询历史失败: {e}")
+
+    def get_top_statements(
+        self, operation: str, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        获取执行次数最多的查询语句
+
+        设置了持久化查询历史时包含之前进程的记录。
+
+        Args:
+            operation: 操作名称
+            limit: 返回数量
+
+        Returns:
+            [{statement, count, avg_time}]，按执行次数降序
+        """
+        if self.history_store is not None:
+            try:
+                return self.history_store.top_statements(operation, limit)
+            except Exception as e:
+                logger.warning(f"读取查询历史失败，使用进程内统计: {e}")
+
+        with self._lock:
+            items = [
+                (stats["statement"], dict(stats))
+                for (op, _), stats in self.statement_stats.items()
+                if op == operation
+            ]
+        items.sort(
+            key=lambda item: (item[1]["count"], item[1]["total_time"]), reverse=True
+        )
+        return [
             {
-                "operation": operation,
-                "duration": duration,
-                "success": success,
-                "error": error,
-                "timestamp": datetime.now().isoformat(),
+                "statement": statement,
+                "count": stats["count"],
+                "avg_time": stats["total_time"] / stats["count"],
             }
-        )
+            for statement, stats in items[:limit]
+        ]
 
     def get_stats(self, operation: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -87,28 +263,94 @@ class PerformanceMonitor:
         Returns:
             统计信息字典
         """
-        if operation:
-            if operation not in self.query_stats:
-                return {}
-            stats = self.query_stats[operation].copy()
-            if stats["count"] > 0:
-                stats["avg_time"] = stats["total_time"] / stats["count"]
+        with self._lock:
+            if operation:
+                if operation not in self.query_stats:
+                    return {}
+                operations = [operation]
             else:
-                stats["avg_time"] = 0.0
-            return {operation: stats}
+                # 返回所有统计
+                operations = list(self.query_stats)
+
+            result = {}
+            for op in operations:
+                stats = self.query_stats[op].copy()
+                if stats["count"] > 0:
+                    stats["avg_time"] = stats["total_time"] / stats["count"]
+                else:
+                    stats["avg_time"] = 0.0
+                self._add_percentiles(op, stats)
+                result[op] = stats
+            return result
+
+    def _add_percentiles(self, operation: str, stats: Dict[str, Any]) -> None:
+        """加入启动以来的p50/p95/p99和错误次数（调用方需持有锁）"""
+        histogram = self.latency.get(operation)
+        if histogram is not None:
+            summary = histogram.summary()
+            stats["errors"] = summary["errors"]
+            for name in ("p50", "p95", "p99"):
+                stats[name] = summary[name]
+
+    def get_latency_stats(
+        self, operation: Optional[str] = None, windows: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        获取延迟分位数、错误率和吞吐量
 
-        # 返回所有统计
-        result = {}
-        for op, stats in self.query_stats.items():
-            stats_copy = stats.copy()
-            if stats_copy["count"] > 0:
-                stats_copy["avg_time"] = stats_copy["total_time"] / stats_copy["count"]
-            else:
-                stats_copy["avg_time"] = 0.0
-            result[op] = stats_copy
+        Args:
+            operation: 操作名称（可选），如果提供则只返回该操作的统计
+            windows: 统计窗口（可选），取值 1m、5m、1h，默认全部
 
+        Returns:
+            {操作: {窗口: {count, errors, error_rate, throughput, mean, max,
+            p50, p90, p95, p99}}}，耗时单位为秒，throughput为每秒调用数；
+            窗口 total 为启动以来的统计
+        """
+        windows = list(WINDOWS) if windows is None else windows
+        for window in windows:
+            if window not in WINDOWS:
+                raise ValueError(
+                    f"未知的统计窗口: {window}（可选: {', '.join(WINDOWS)}）"
+                )
+        now = time.time()
+        result = {}
+        with self._lock:
+            operations = [operation] if operation else list(self.latency)
+            for op in operations:
+                histogram = self.latency.get(op)
+                if histogram is None:
+                    continue
+                stats = {
+                    window: histogram.window(WINDOWS[window], now) for window in windows
+                }
+                stats["total"] = histogram.summary()
+                result[op] = stats
         return result
 
+    def get_latency_buckets(self, bounds: Sequence[float]) -> Dict[str, Dict[str, Any]]:
+        """
+        获取启动以来各操作的累计延迟分布（用于Prometheus直方图）
+
+        Args:
+            bounds: 升序的上界（秒）
+
+        Returns:
+            {操作: {buckets, count, total, errors, slow_queries}}，buckets为耗时
+            不超过各上界的累计调用数
+        """
+        with self._lock:
+            return {
+                op: {
+                    "buckets": histogram.cumulative_buckets(bounds),
+                    "count": histogram.count,
+                    "total": histogram.total,
+                    "errors": histogram.errors,
+                    "slow_queries": self.query_stats[op]["slow_queries"],
+                }
+                for op, histogram in self.latency.items()
+            }
+
     def get_recent_queries(self, limit: int = 10) -> list:
         """
         获取最近的查询记录
@@ -119,7 +361,21 @@ class PerformanceMonitor:
         Returns:
             最近的查询记录列表
         """
-        return list(self.recent_queries)[-limit:]
+        with self._lock:
+            return list(self.recent_queries)[-limit:]
+
+    def get_slow_queries(self, limit: int = 10) -> list:
+        """
+        获取最近的慢查询样本
+
+        Args:
+            limit: 返回的记录数
+
+        Returns:
+            慢查询记录列表（operation、duration、success、error、detail、timestamp）
+        """
+        with self._lock:
+            return list(self.slow_query_samples)[-limit:]
 
     def reset_stats(self, operation: Optional[str] = None) -> None:
         """
@@ -128,12 +384,19 @@ class PerformanceMonitor:
         Args:
             operation: 操作名称（可选），如果提供则只重置该操作的统计
         """
-        if operation:
-            if operation in self.query_stats:
-                del self.query_stats[operation]
-        else:
-            self.query_stats.clear()
-            self.recent_queries.clear()
+        with self._lock:
+            if operation:
+                self.query_stats.pop(operation, None)
+                self.latency.pop(operation, None)
+            else:
+                self.query_stats.clear()
+                self.latency.clear()
+                self.import_stats.update(
+                    imports=0, rows=0, seconds=0.0, last_rows_per_second=0.0
+                )
+                self.recent_queries.clear()
+                self.slow_query_samples.clear()
+                self.statement_stats.clear()
 
 
 # 全局性能监控器实例
@@ -156,12 +419,15 @@ def get_performance_monitor(slow_query_threshold: float = 5.0) -> PerformanceMon
     return _global_monitor
 
 
-def monitor_performance(operation_name: Optional[str] = None):
+def monitor_performance(
+    operation_name: Optional[str] = None, detail_arg: Optional[str] = None
+):
     """
     性能监控装饰器
 
     Args:
         operation_name: 操作名称（可选），如果不提供则使用函数名
+        detail_arg: 参数名（可选），慢查询时把该参数的值保存到慢查询样本
 
     Example:
         @monitor_performance("query_data")
@@ -171,11 +437,25 @@ def monitor_performance(operation_name: Optional[str] = None):
 
     def decorator(func):
         op_name = operation_name or func.__name__
+        signature = inspect.signature(func) if detail_arg else None
+
+        def record(monitor, duration, success, error, args, kwargs):
+            detail = None
+            # 只在慢查询时解析参数，正常调用没有额外开销
+            if signature is not None and duration > monitor.slow_query_threshold:
+                try:
+                    value = signature.bind_partial(*args, **kwargs).arguments.get(
+                        detail_arg
+                    )
+                    detail = None if value is None else str(value)
+                except TypeError:
+                    pass
+            monitor.record_query(op_name, duration, success, error, detail)
 
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             monitor = get_performance_monitor()
-            start_time = time.time()
+            start_time = time.perf_counter()
             success = True
             error = None
 
@@ -187,13 +467,13 @@ def monitor_performance(operation_name: Optional[str] = None):
                 error = str(e)
                 raise
             finally:
-                duration = time.time() - start_time
-                monitor.record_query(op_name, duration, success, error)
+                duration = time.perf_counter() - start_time
+                record(monitor, duration, success, error, args, kwargs)
 
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
             monitor = get_performance_monitor()
-            start_time = time.time()
+            start_time = time.perf_counter()
             success = True
             error = None
 
@@ -205,8 +485,8 @@ def monitor_performance(operation_name: Optional[str] = None):
                 error = str(e)
                 raise
             finally:
-                duration = time.time() - start_time
-                monitor.record_query(op_name, duration, success, error)
+                duration = time.perf_counter() - start_time
+                record(monitor, duration, success, error, args, kwargs)
 
         # 根据函数类型返回相应的包装器
         import asyncio
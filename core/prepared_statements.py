@@ -0,0 +1,305 @@
+"""
+预编译语句缓存模块
+语句模板执行满一定次数后在每个数据库连接上执行一次PREPARE，之后用EXECUTE复用，
+热点元数据查询不再每次重新解析和规划；登记的启动语句在连接池新建连接时预先PREPARE。
+连接归还连接池后预编译语句仍保留在该连接上，下次取出同一连接时继续命中
+"""
+
+import hashlib
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psycopg2
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# psycopg2占位符：%s 转为 $n，%% 转为 %
+_PLACEHOLDER = re.compile(r"%([s%])")
+
+
+def _convert(sql: str) -> Tuple[str, int]:
+    """把psycopg2格式的语句转换为PREPARE可用的形式，返回 (语句, 参数个数)"""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(1) == "%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return _PLACEHOLDER.sub(replace, sql.strip().rstrip(";")), count
+
+
+# 服务启动时在新打开的连接上预先PREPARE的语句模板（热点元数据查询）
+_startup_templates: List[str] = []
+
+
+def register_startup_statement(sql: str) -> str:
+    """
+    登记启动时预编译的语句模板（在模块导入时调用）
+
+    连接池在新打开的连接上预先PREPARE这些语句，不受 prepare_after 限制。
+
+    Args:
+        sql: 语句模板（psycopg2的%s占位符）
+
+    Returns:
+        sql本身，便于直接定义为模块常量
+    """
+    if sql not in _startup_templates:
+        _startup_templates.append(sql)
+    return sql
+
+
+class PreparedStatementCache:
+    """
+    预编译语句注册表（线程安全，所有连接共用）
+
+    语句模板执行满 prepare_after 次后才在连接上PREPARE（一次性的查询不占用
+    服务端内存）；每个连接记录已PREPARE的语句名（LRU，超过 max_per_connection
+    时DEALLOCATE最久未用的语句），连接关闭并被回收后记录随之释放。经由事务级
+    连接池（如PgBouncer transaction模式）连接数据库时应关闭此功能。
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_per_connection: int = 100,
+        max_templates: int = 1000,
+        prepare_after: int = 3,
+    ):
+        """
+        初始化预编译语句缓存
+
+        Args:
+            enabled: 是否启用，关闭时直接执行语句
+            max_per_connection: 每个连接最多保留的预编译语句数
+            max_templates: 最多记住的语句模板数（query_data的模板随过滤条件变化）
+            prepare_after: 语句模板执行满该次数后才PREPARE（启动时预编译的语句除外）
+        """
+        self.enabled = enabled
+        self.max_per_connection = max(1, max_per_connection)
+        self.max_templates = max_templates
+        self.prepare_after = max(1, prepare_after)
+        self._lock = threading.Lock()
+        # 连接 -> OrderedDict(语句名 -> None)
+        self._prepared: "weakref.WeakKeyDictionary[Any, OrderedDict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # 语句模板 -> (语句名, PREPARE语句, EXECUTE语句)
+        self._templates: Dict[str, Tuple[str, str, str]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._direct = 0
+        self._evictions = 0
+        self._errors = 0
+        self._executions: Dict[str, int] = {}
+
+    def _template(self, sql: str) -> Tuple[str, str, str]:
+        template = self._templates.get(sql)
+        if template is None:
+            body, count = _convert(sql)
+            name = "ps_" + hashlib.blake2b(body.encode(), digest_size=8).hexdigest()
+            args = f"({', '.join(['%s'] * count)})" if count else ""
+            template = (name, f"PREPARE {name} AS {body}", f"EXECUTE {name}{args}")
+            with self._lock:
+                if len(self._templates) >= self.max_templates:
+                    # 丢弃最早的模板（连接上的预编译语句由各连接的LRU淘汰）
+                    oldest = next(iter(self._templates))
+                    self._executions.pop(self._templates.pop(oldest)[0], None)
+                self._templates[sql] = template
+        return template
+
+    def execute(
+        self,
+        cur,
+        sql: str,
+        params: Optional[Sequence[Any]] = None,
+        setup: Optional[str] = None,
+    ) -> None:
+        """
+        通过预编译语句执行查询（结果用cur.fetch*读取，与cur.execute相同）
+
+        Args:
+            cur: 游标
+            sql: 语句模板（psycopg2的%s占位符）
+            params: 参数（可选）
+            setup: 与查询在同一次往返中先执行的语句（可选，不含参数），
+                如 SET LOCAL statement_timeout
+        """
+        prefix = f"{setup.rstrip().rstrip(';')}; " if setup else ""
+        if not self.enabled:
+            cur.execute(prefix + sql, params)
+            return
+
+        name, prepare_sql, execute_sql = self._template(sql)
+        conn = cur.connection
+        with self._lock:
+            executions = self._executions[name] = self._executions.get(name, 0) + 1
+            prepared = self._prepared.get(conn)
+            hit = prepared is not None and name in prepared
+            if hit:
+                prepared.move_to_end(name)
+                self._hits += 1
+            elif executions < self.prepare_after and sql not in _startup_templates:
+                # 执行次数不足，不值得PREPARE
+                self._direct += 1
+            else:
+                self._misses += 1
+
+        if not hit:
+            if executions < self.prepare_after and sql not in _startup_templates:
+                cur.execute(prefix + sql, params)
+                return
+            self._prepare(cur, name, prepare_sql)
+        cur.execute(prefix + execute_sql, params)
+
+    def _prepare(self, cur, name: str, prepare_sql: str) -> None:
+        """在游标所属连接上PREPARE语句，连接上的语句数超过上限时先淘汰最久未用的"""
+        conn = cur.connection
+        evicted = None
+        with self._lock:
+            prepared = self._prepared.get(conn)
+            if prepared is None:
+                prepared = self._prepared[conn] = OrderedDict()
+            if name in prepared:
+                return
+            if len(prepared) >= self.max_per_connection:
+                evicted, _ = prepared.popitem(last=False)
+                self._evictions += 1
+
+        if evicted is not None:
+            # 语句已不在连接上（如连接被重置）时忽略
+            self._run_guarded(cur, f"DEALLOCATE {evicted}")
+        error = self._run_guarded(cur, prepare_sql)
+        if error is not None and not isinstance(
+            error, psycopg2.errors.DuplicatePreparedStatement
+        ):
+            raise error
+        # 语句已存在（记录与连接不一致）时直接EXECUTE已有的语句
+        with self._lock:
+            if error is not None:
+                self._errors += 1
+            prepared[name] = None
+
+    def _run_guarded(self, cur, statement: str) -> Optional[psycopg2.Error]:
+        """
+        执行语句，失败时不中止当前事务（事务中使用SAVEPOINT回滚）
+
+        Returns:
+            数据库错误，成功时为None
+        """
+        in_transaction = (
+            not cur.connection.autocommit
+            and cur.connection.info.transaction_status
+            != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+        if in_transaction:
+            cur.execute("SAVEPOINT prepared_statement")
+        try:
+            cur.execute(statement)
+        except psycopg2.Error as e:
+            if in_transaction:
+                cur.execute("ROLLBACK TO SAVEPOINT prepared_statement")
+                cur.execute("RELEASE SAVEPOINT prepared_statement")
+            else:
+                # 事务外失败只会中止本语句开启的隐式事务
+                cur.connection.rollback()
+            return e
+        if in_transaction:
+            cur.execute("RELEASE SAVEPOINT prepared_statement")
+        return None
+
+    def prepare_startup(self, conn) -> int:
+        """
+        在连接上PREPARE所有启动时预编译的语句（连接池新建连接时调用）
+
+        Args:
+            conn: 数据库连接（空闲状态），执行后回滚
+
+        Returns:
+            新PREPARE的语句数
+        """
+        if not self.enabled:
+            return 0
+        count = 0
+        with conn.cursor() as cur:
+            for sql in list(_startup_templates):
+                name, prepare_sql, _ = self._template(sql)
+                with self._lock:
+                    prepared = self._prepared.get(conn)
+                    if prepared is not None and name in prepared:
+                        continue
+                try:
+                    self._prepare(cur, name, prepare_sql)
+                except psycopg2.Error as e:
+                    # 如引用的表尚未创建，首次执行时再PREPARE
+                    logger.debug(f"启动时预编译语句失败: {e}")
+                    continue
+                count += 1
+        conn.rollback()
+        return count
+
+    def forget(self, conn) -> None:
+        """
+        丢弃连接上的预编译语句记录（连接被重置、DISCARD ALL之后调用）
+
+        Args:
+            conn: 数据库连接
+        """
+        with self._lock:
+            self._prepared.pop(conn, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取预编译语句统计
+
+        Returns:
+            统计信息字典（命中率、各语句执行次数）
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            statements = {
+                name: {"sql": sql[:200], "executions": self._executions.get(name, 0)}
+                for sql, (name, _, _) in self._templates.items()
+            }
+            return {
+                "enabled": self.enabled,
+                "connections": len(self._prepared),
+                "prepared": sum(len(names) for names in self._prepared.values()),
+                "prepare_after": self.prepare_after,
+                "hits": self._hits,
+                "misses": self._misses,
+                "direct": self._direct,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "errors": self._errors,
+                "statements": statements,
+            }
+
+
+# 全局预编译语句缓存
+_global_statement_cache: Optional[PreparedStatementCache] = None
+
+
+def get_statement_cache(**kwargs) -> PreparedStatementCache:
+    """
+    获取全局预编译语句缓存
+
+    Args:
+        **kwargs: 首次创建时的PreparedStatementCache参数（enabled、
+            max_per_connection、prepare_after）
+
+    Returns:
+        预编译语句缓存实例
+    """
+    global _global_statement_cache
+    if _global_statement_cache is None:
+        _global_statement_cache = PreparedStatementCache(**kwargs)
+    return _global_statement_cache
@@ -0,0 +1,275 @@
+"""
+查询结果缓存模块
+为只读查询（query_data、execute_sql）提供结果缓存，
+缓存键由规范化SQL、参数、数据库标识和数据版本（data_version模块）组成，
+数据变化后立即失效
+"""
+
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .cache_manager import (
+    CacheManager,
+    _approximate_size,
+    _canonical,
+    dsn_fingerprint,
+)
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 字面量（E'...'转义字符串、$tag$...$tag$美元引用、普通字符串、带引号标识符）、
+# 注释、空白
+_SQL_TOKEN = re.compile(
+    r"""(
+        (?<![\w$])[Ee]'(?:[^'\\]|\\.|'')*'
+      | (?<![\w$])\$(?P<tag>[A-Za-z_][A-Za-z_0-9]*|)\$.*?\$(?P=tag)\$
+      | '(?:[^']|'')*'
+      | "(?:[^"]|"")*"
+    )|(--[^\n]*|/\*.*?\*/)|(\s+)""",
+    re.S | re.X,
+)
+
+# 结果随时间或调用变化的函数，包含这些函数的查询不缓存
+_VOLATILE_SQL = re.compile(
+    r"\b(random|now|clock_timestamp|statement_timestamp|timeofday|nextval|"
+    r"setval|pg_sleep|txid_current|gen_random_uuid)\s*\(|"
+    r"\b(current_timestamp|current_time|current_date|localtime|localtimestamp)\b"
+)
+
+# 结果取决于会话或服务器状态、不随数据版本变化的查询不缓存：
+# 系统目录和统计视图（pg_class、pg_stat_*、pg_locks等）、pg_开头的系统函数
+# （pg_backend_pid()、pg_is_in_recovery()等）、information_schema，
+# 以及会话相关的函数和关键字
+_SESSION_SQL = re.compile(
+    r"\bpg_\w+|\binformation_schema\b|"
+    r"\b(current_setting|set_config|inet_client_addr|inet_client_port|"
+    r"inet_server_addr|inet_server_port|has_\w+_privilege)\s*\(|"
+    r"\b(current_user|session_user|current_role|current_schemas?|user)\b"
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    规范化SQL文本：去除注释、合并空白、关键字和标识符转小写
+
+    字符串字面量（包括E'...'和$tag$...$tag$）和带双引号的标识符保持原样。
+    规范化结果只用作缓存键和统计键，执行时使用原始SQL。
+
+    Args:
+        sql: SQL语句
+
+    Returns:
+        规范化后的SQL
+    """
+    parts = []
+    pos = 0
+    for match in _SQL_TOKEN.finditer(sql):
+        parts.append(sql[pos : match.start()].lower())
+        if match.group(1):
+            parts.append(match.group(1))
+        else:
+            parts.append(" ")
+        pos = match.end()
+    parts.append(sql[pos:].lower())
+
+    normalized = []
+    for part in parts:
+        if not part:
+            continue
+        if part == " " and (not normalized or normalized[-1] == " "):
+            continue
+        normalized.append(part)
+    return "".join(normalized).strip().rstrip(";").rstrip()
+
+
+def is_cacheable_sql(normalized_sql: str) -> bool:
+    """
+    判断规范化后的SQL结果是否可缓存
+
+    包含易变函数、读取系统目录/统计视图/information_schema或依赖会话状态的查询
+    不可缓存：这些结果不随导入数据的版本变化，缓存后会返回过时或其他会话的结果
+
+    Args:
+        normalized_sql: normalize_sql的输出
+
+    Returns:
+        是否可缓存
+    """
+    return (
+        _VOLATILE_SQL.search(normalized_sql) is None
+        and _SESSION_SQL.search(normalized_sql) is None
+    )
+
+
+class QueryResultCache:
+    """只读查询结果缓存"""
+
+    def __init__(
+        self,
+        cache_manager: CacheManager,
+        ttl: int = 3600,
+        max_entry_bytes: int = 2 * 1024 * 1024,
+        prefix: str = "query",
+        persist_seconds: Optional[float] = None,
+    ):
+        """
+        初始化查询结果缓存
+
+        Args:
+            cache_manager: 底层缓存管理器
+            ttl: 最长缓存时间（秒），数据版本变化时立即失效
+            max_entry_bytes: 单条结果的最大缓存大小（字节），超出则不缓存
+            prefix: 缓存键前缀
+            persist_seconds: 查询耗时超过该值（秒）的结果同时写入磁盘缓存
+                （如耗时的聚合查询），None表示不持久化
+        """
+        self.cache_manager = cache_manager
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self.prefix = prefix
+        self.persist_seconds = persist_seconds
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._oversized = 0
+        self._persisted = 0
+
+    def make_key(
+        self,
+        kind: str,
+        statement: Any,
+        params: Any = None,
+        database_config: Optional[Dict[str, Any]] = None,
+        data_version: int = 0,
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            kind: 查询类型（如 execute_sql、query_data）
+            statement: 规范化SQL或查询参数描述
+            params: 查询参数
+            database_config: 数据库配置
+            data_version: 查询涉及数据的版本（数据变化后生成新的键）
+
+        Returns:
+            缓存键
+        """
+        payload = repr(
+            (
+                dsn_fingerprint(database_config),
+                _canonical(statement),
+                _canonical(params),
+            )
+        )
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{self.prefix}:{kind}:v{data_version}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存的查询结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            查询结果（标记 cache_hit=True），未命中返回None
+        """
+        return self._record_lookup(self.cache_manager.get(key))
+
+    def _record_lookup(self, result: Optional[Dict[str, Any]]):
+        with self._lock:
+            if result is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return dict(result, cache_hit=True)
+
+    def set(self, key: str, result: Dict[str, Any]) -> bool:
+        """
+        缓存查询结果
+
+        Args:
+            key: 缓存键
+            result: 查询结果
+
+        Returns:
+            是否已缓存（超过单条大小上限时不缓存）
+        """
+        if not self._fits(result):
+            return False
+        self.cache_manager.set(key, result, ttl=self.ttl)
+        return True
+
+    def _fits(self, result: Dict[str, Any]) -> bool:
+        size = _approximate_size(result)
+        if size > self.max_entry_bytes:
+            with self._lock:
+                self._oversized += 1
+            logger.debug(f"查询结果过大（约{size}字节），不缓存")
+            return False
+        return True
+
+    async def get_or_compute(
+        self, key: str, factory: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        获取缓存结果，未命中时执行查询并缓存
+
+        并发的相同查询合并为一次数据库查询，其余调用共享结果。
+
+        Args:
+            key: 缓存键
+            factory: 返回查询协程的无参函数
+
+        Returns:
+            查询结果
+        """
+        cached_result = self._record_lookup(await self.cache_manager.aget(key))
+        if cached_result is not None:
+            return cached_result
+
+        async def compute():
+            # 等待期间可能已有相同查询写入缓存
+            cached_result = await self.cache_manager.aget(key)
+            if cached_result is not None:
+                return dict(cached_result, cache_hit=True)
+            start = time.perf_counter()
+            result = await factory()
+            if self._fits(result):
+                persist = (
+                    self.persist_seconds is not None
+                    and time.perf_counter() - start >= self.persist_seconds
+                )
+                if persist:
+                    with self._lock:
+                        self._persisted += 1
+                await self.cache_manager.aset(
+                    key, result, ttl=self.ttl, persist=persist
+                )
+            return result
+
+        return await self.cache_manager.single_flight.do(key, compute)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取查询缓存统计
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "oversized": self._oversized,
+                "persisted": self._persisted,
+                "ttl": self.ttl,
+                "max_entry_bytes": self.max_entry_bytes,
+            }
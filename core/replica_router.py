@@ -0,0 +1,242 @@
+"""
+只读副本路由模块
+只读的工具调用（query_data、execute_sql、list_tables等）分发到只读副本：
+选择未完成请求最少的副本，复制延迟超过上限或连接失败的副本暂时排除，
+没有可用副本时回到主库。导入和数据版本读取始终使用主库
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 复制延迟（秒）：已回放完收到的WAL时为0，否则为距最后回放事务的时间；
+# 不处于恢复模式（不是副本）时为0
+_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END;
+"""
+
+
+class _Replica:
+    """单个副本的状态"""
+
+    __slots__ = (
+        "config",
+        "name",
+        "healthy",
+        "lag",
+        "error",
+        "checked_at",
+        "down_until",
+        "routed",
+        "conn",
+    )
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.name = (
+            f"{config.get('host', 'localhost')}:{config.get('port', 5432)}"
+            f"/{config.get('database') or ''}"
+        )
+        self.healthy = True  # 首次检查前视为可用
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.down_until = 0.0
+        self.routed = 0
+        self.conn = None  # 延迟检查使用的专用连接
+
+
+class ReplicaRouter:
+    """
+    主库对应的一组只读副本
+
+    后台线程每 check_interval 秒检查每个副本的复制延迟；
+    取副本连接失败时立即标记为不可用，retry_after 秒后重新参与路由。
+    """
+
+    def __init__(
+        self,
+        replicas: List[Dict[str, Any]],
+        max_lag: float = 10.0,
+        check_interval: float = 5.0,
+        retry_after: float = 30.0,
+    ):
+        """
+        初始化副本路由
+
+        Args:
+            replicas: 副本数据库配置列表
+            max_lag: 允许的最大复制延迟（秒），超过后不再路由到该副本
+            check_interval: 检查复制延迟的间隔（秒），0表示不启动检查线程
+            retry_after: 连接失败的副本被排除的时间（秒）
+        """
+        self.replicas = [_Replica(dict(config)) for config in replicas]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._next = 0  # 未完成请求数相同时轮询
+        self._fallbacks = 0
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+        if check_interval > 0 and self.replicas:
+            self._checker = threading.Thread(
+                target=self._check_loop, name="replica-lag-checker", daemon=True
+            )
+            self._checker.start()
+
+    def choose(
+        self, outstanding: Callable[[Dict[str, Any]], int]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        选择一个副本
+
+        Args:
+            outstanding: 返回某个副本当前未完成请求数（使用中和排队的连接）的函数
+
+        Returns:
+            副本数据库配置，没有可用副本时返回None（调用方使用主库）
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                replica
+                for replica in self.replicas
+                if replica.healthy and replica.down_until <= now
+            ]
+            if not candidates:
+                self._fallbacks += 1
+                return None
+            start = self._next
+            self._next += 1
+        # 从轮询位置开始比较，未完成请求数相同时依次分配
+        ordered = (
+            candidates[start % len(candidates) :]
+            + candidates[: start % len(candidates)]
+        )
+        replica = min(ordered, key=lambda r: outstanding(r.config))
+        with self._lock:
+            replica.routed += 1
+        return replica.config
+
+    def record_fallback(self) -> None:
+        """记录一次改用主库（如副本连接池等待超时，副本本身仍可用）"""
+        with self._lock:
+            self._fallbacks += 1
+
+    def mark_down(self, config: Dict[str, Any], error: Exception) -> None:
+        """
+        标记副本不可用（取连接失败时调用）
+
+        Args:
+            config: 副本数据库配置
+            error: 错误
+        """
+        with self._lock:
+            # 本次调用改用主库
+            self._fallbacks += 1
+            for replica in self.replicas:
+                if replica.config is config or replica.config == config:
+                    replica.down_until = time.monotonic() + self.retry_after
+                    replica.error = str(error)
+                    logger.warning(
+                        f"只读副本 {replica.name} 不可用，{self.retry_after}秒内改用其他副本或主库: {error}"
+                    )
+
+    def check(self) -> None:
+        """检查所有副本的复制延迟"""
+        for replica in self.replicas:
+            try:
+                if replica.conn is None or replica.conn.closed:
+                    replica.conn = psycopg2.connect(
+                        host=replica.config.get("host", "localhost"),
+                        port=replica.config.get("port", 5432),
+                        database=replica.config.get("database"),
+                        user=replica.config.get("user"),
+                        password=replica.config.get("password"),
+                        connect_timeout=max(1, int(self.check_interval)),
+                        client_encoding="UTF8",
+                    )
+                    replica.conn.autocommit = True
+                with replica.conn.cursor() as cur:
+                    cur.execute(_LAG_SQL)
+                    lag = float(cur.fetchone()[0])
+                healthy = lag <= self.max_lag
+                error = None if healthy else f"复制延迟 {lag:.1f}秒 超过上限"
+            except Exception as e:
+                lag, healthy, error = None, False, str(e)
+                if replica.conn is not None:
+                    try:
+                        replica.conn.close()
+                    except Exception:
+                        pass
+                    replica.conn = None
+            with self._lock:
+                if healthy != replica.healthy:
+                    logger.info(
+                        f"只读副本 {replica.name} "
+                        f"{'恢复可用' if healthy else '已排除'}: {error or ''}"
+                    )
+                replica.healthy = healthy
+                replica.lag = lag
+                replica.error = error
+                replica.checked_at = time.time()
+                if healthy:
+                    replica.down_until = 0.0
+
+    def _check_loop(self) -> None:
+        """后台检查线程"""
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"检查只读副本失败: {e}")
+            self._stop.wait(self.check_interval)
+
+    def close(self) -> None:
+        """停止检查线程并关闭检查连接"""
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join(timeout=2)
+        for replica in self.replicas:
+            if replica.conn is not None:
+                try:
+                    replica.conn.close()
+                except Exception:
+                    pass
+                replica.conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取副本路由统计
+
+        Returns:
+            统计信息字典
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "max_lag": self.max_lag,
+                "fallbacks": self._fallbacks,
+                "replicas": [
+                    {
+                        "name": replica.name,
+                        "available": replica.healthy and replica.down_until <= now,
+                        "lag": replica.lag,
+                        "error": replica.error,
+                        "checked_at": replica.checked_at,
+                        "routed": replica.routed,
+                    }
+                    for replica in self.replicas
+                ],
+            }
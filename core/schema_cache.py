@@ -0,0 +1,238 @@
+"""
+表结构缓存模块
+一次pg_catalog查询读取public下所有表的字段、类型、几何字段和索引并缓存，
+query_data等调用不再每次查询information_schema；导入数据（数据版本变化）或
+发现结构不一致时失效
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .cache_manager import dsn_fingerprint
+from .logging_config import get_logger
+from .prepared_statements import get_statement_cache
+
+logger = get_logger(__name__)
+
+# 字段按attnum排序；索引包含索引方法和字段名
+_SCHEMA_SQL = """
+SELECT
+    c.relname,
+    (
+        SELECT json_agg(
+            json_build_array(a.attname, format_type(a.atttypid, a.atttypmod))
+            ORDER BY a.attnum
+        )
+        FROM pg_catalog.pg_attribute a
+        WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    ),
+    (
+        SELECT json_agg(
+            json_build_array(
+                i.relname,
+                am.amname,
+                (
+                    SELECT json_agg(a.attname)
+                    FROM pg_catalog.pg_attribute a
+                    WHERE a.attrelid = c.oid AND a.attnum = ANY(ix.indkey)
+                )
+            )
+            ORDER BY i.relname
+        )
+        FROM pg_catalog.pg_index ix
+        JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_catalog.pg_am am ON am.oid = i.relam
+        WHERE ix.indrelid = c.oid
+    )
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+ORDER BY c.relname;
+"""
+
+# format_type输出，如 geometry(MultiPolygon,4326)
+_GEOMETRY_TYPE = re.compile(r"^(geometry|geography)(?:\((\w+)(?:,\s*(\d+))?\))?$")
+
+
+class TableSchema:
+    """单个表的结构"""
+
+    __slots__ = ("name", "columns", "geometry_columns", "indexes")
+
+    def __init__(self, name: str, columns: List[Any], indexes: List[Any]):
+        self.name = name
+        # [(字段名, 类型)]
+        self.columns = [(column, data_type) for column, data_type in columns]
+        # {字段名: {"type": 几何类型, "srid": SRID}}
+        self.geometry_columns: Dict[str, Dict[str, Any]] = {}
+        for column, data_type in self.columns:
+            match = _GEOMETRY_TYPE.match(data_type)
+            if match:
+                self.geometry_columns[column] = {
+                    "type": match.group(2) or match.group(1),
+                    "srid": int(match.group(3)) if match.group(3) else None,
+                }
+        self.indexes = [
+            {"name": name, "method": method, "columns": index_columns or []}
+            for name, method, index_columns in indexes
+        ]
+
+    @property
+    def column_names(self) -> List[str]:
+        """字段名列表（按表中顺序）"""
+        return [column for column, _ in self.columns]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "table_name": self.name,
+            "columns": [
+                {"name": column, "type": data_type}
+                for column, data_type in self.columns
+            ],
+            "geometry_columns": self.geometry_columns,
+            "indexes": self.indexes,
+        }
+
+
+class _Snapshot:
+    """某个数据库的表结构快照"""
+
+    __slots__ = ("tables", "loaded_at")
+
+    def __init__(self, tables: Dict[str, TableSchema], loaded_at: float):
+        self.tables = tables
+        self.loaded_at = loaded_at
+
+
+class SchemaCache:
+    """
+    表结构缓存（线程安全）
+
+    使用调用方已取出的连接加载，不额外占用连接池；表不在缓存中时重新加载一次
+    （新建的表），同一数据库两次按需重新加载至少间隔 miss_reload_interval 秒。
+    """
+
+    def __init__(self, max_age: float = 3600.0, miss_reload_interval: float = 5.0):
+        """
+        初始化表结构缓存
+
+        Args:
+            max_age: 快照最长使用时间（秒），兜底导入程序以外的DDL
+            miss_reload_interval: 因表不存在而重新加载的最短间隔（秒）
+        """
+        self.max_age = max_age
+        self.miss_reload_interval = miss_reload_interval
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._invalidations = 0
+
+    def get_table(
+        self, database_config: Dict[str, Any], table_name: str, conn
+    ) -> Optional[TableSchema]:
+        """
+        获取表结构
+
+        Args:
+            database_config: 数据库配置
+            table_name: 表名
+            conn: 数据库连接（需要加载时使用）
+
+        Returns:
+            表结构，表不存在时返回None
+        """
+        fingerprint = dsn_fingerprint(database_config)
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshots.get(fingerprint)
+        if snapshot is not None and now - snapshot.loaded_at >= self.max_age:
+            snapshot = None
+
+        if snapshot is not None:
+            schema = snapshot.tables.get(table_name)
+            if schema is not None:
+                with self._lock:
+                    self._hits += 1
+                return schema
+            if now - snapshot.loaded_at < self.miss_reload_interval:
+                with self._lock:
+                    self._misses += 1
+                return None
+
+        with self._lock:
+            self._misses += 1
+        return self._load(fingerprint, conn).tables.get(table_name)
+
+    def get_tables(
+        self, database_config: Dict[str, Any], conn
+    ) -> Dict[str, TableSchema]:
+        """
+        获取所有表的结构
+
+        Args:
+            database_config: 数据库配置
+            conn: 数据库连接（需要加载时使用）
+
+        Returns:
+            {表名: 表结构}
+        """
+        fingerprint = dsn_fingerprint(database_config)
+        with self._lock:
+            snapshot = self._snapshots.get(fingerprint)
+        if snapshot is None or time.monotonic() - snapshot.loaded_at >= self.max_age:
+            snapshot = self._load(fingerprint, conn)
+        return dict(snapshot.tables)
+
+    def _load(self, fingerprint: str, conn) -> _Snapshot:
+        """从pg_catalog读取表结构（一次查询）"""
+        with conn.cursor() as cur:
+            get_statement_cache().execute(cur, _SCHEMA_SQL)
+            rows = cur.fetchall()
+        tables = {
+            name: TableSchema(name, columns or [], indexes or [])
+            for name, columns, indexes in rows
+        }
+        snapshot = _Snapshot(tables, time.monotonic())
+        with self._lock:
+            self._snapshots[fingerprint] = snapshot
+            self._loads += 1
+        logger.debug(f"已加载表结构: {len(tables)} 个表")
+        return snapshot
+
+    def invalidate(self, database_config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        丢弃表结构快照（导入数据、数据版本变化或查询发现结构不一致时调用）
+
+        Args:
+            database_config: 数据库配置（可选），不提供则丢弃所有数据库的快照
+        """
+        with self._lock:
+            self._invalidations += 1
+            if database_config is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(dsn_fingerprint(database_config), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取表结构缓存统计
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "databases": len(self._snapshots),
+                "tables": sum(len(s.tables) for s in self._snapshots.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "loads": self._loads,
+                "invalidations": self._invalidations,
+            }
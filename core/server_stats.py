@@ -0,0 +1,108 @@
+"""
+服务统计模块
+汇总运行中服务的启动状态、各工具延迟分位数、慢查询样本、连接池使用率、
+只读副本状态、缓存命中率和导入统计，供 server_stats 工具和 stats:// 资源返回
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+from .connection_pool import ConnectionPoolManager
+from .performance_monitor import get_performance_monitor
+from .prepared_statements import get_statement_cache
+from .startup import get_startup_state
+
+SECTIONS = (
+    "startup",
+    "tools",
+    "slow_queries",
+    "pools",
+    "replicas",
+    "caches",
+    "imports",
+)
+
+
+def cache_stats(data_importer=None) -> Dict[str, Dict[str, Any]]:
+    """
+    获取各缓存的统计
+
+    Args:
+        data_importer: DataImporter实例（可选），提供结果缓存、查询结果缓存和
+            表结构缓存
+
+    Returns:
+        {缓存名: 统计}，缓存名为 result、query、schema、prepared_statement
+    """
+    caches = {"prepared_statement": get_statement_cache().get_stats()}
+    if data_importer is not None:
+        if data_importer.cache_manager is not None:
+            caches["result"] = data_importer.cache_manager.get_stats()
+        if data_importer.query_cache is not None:
+            caches["query"] = data_importer.query_cache.get_stats()
+        caches["schema"] = data_importer.schema_cache.get_stats()
+    return caches
+
+
+def _tool_stats() -> Dict[str, Any]:
+    monitor = get_performance_monitor()
+    stats = monitor.get_latency_stats()
+    for operation, totals in monitor.get_stats().items():
+        if operation in stats:
+            stats[operation]["slow_queries"] = totals["slow_queries"]
+    return stats
+
+
+def _cache_summary(data_importer) -> Dict[str, Any]:
+    summary = {}
+    for name, stats in cache_stats(data_importer).items():
+        # 各预编译语句的执行次数条目较多，只保留汇总
+        stats.pop("statements", None)
+        summary[name] = stats
+    return summary
+
+
+def collect_server_stats(
+    data_importer=None,
+    sections: Optional[Sequence[str]] = None,
+    slow_query_limit: int = 10,
+) -> Dict[str, Any]:
+    """
+    汇总服务统计
+
+    Args:
+        data_importer: DataImporter实例（可选）
+        sections: 需要的部分（可选），默认全部，取值见 SECTIONS
+        slow_query_limit: 返回的慢查询样本数
+
+    Returns:
+        {部分: 统计}；tools 中各工具按窗口（1m、5m、1h、total）给出
+        p50/p90/p95/p99（秒）、错误率和吞吐量
+    """
+    sections = list(SECTIONS) if not sections else list(sections)
+    for section in sections:
+        if section not in SECTIONS:
+            raise ValueError(f"未知的统计项: {section}（可选: {', '.join(SECTIONS)}）")
+
+    monitor = get_performance_monitor()
+    collectors = {
+        "startup": lambda: get_startup_state().to_dict(),
+        "tools": _tool_stats,
+        "slow_queries": lambda: {
+            "threshold": monitor.slow_query_threshold,
+            "samples": monitor.get_slow_queries(slow_query_limit),
+        },
+        "pools": lambda: {
+            "workloads": ConnectionPoolManager.get_workload_stats(),
+            "pools": ConnectionPoolManager.get_stats(),
+        },
+        "replicas": ConnectionPoolManager.get_replica_stats,
+        "caches": lambda: _cache_summary(data_importer),
+        "imports": monitor.get_import_stats,
+    }
+    result = {}
+    for section in sections:
+        try:
+            result[section] = collectors[section]()
+        except Exception as e:
+            result[section] = {"error": str(e)}
+    return result
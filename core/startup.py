@@ -0,0 +1,166 @@
+"""
+服务启动模块
+服务启动后在后台完成连接预热：读取默认数据库配置，为各负载类型创建连接池并
+预先打开minconn个连接（在连接上加载PostGIS和系统目录），然后预热缓存。
+客户端的第一批调用不再承担建立连接和读取配置的开销
+"""
+
+import asyncio
+import functools
+import time
+from typing import Any, Dict, Optional
+
+from .cache_warmup import warm_up_caches
+from .connection_pool import ConnectionPoolManager
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class StartupState:
+    """启动阶段状态（供健康检查和统计查询）"""
+
+    def __init__(self):
+        self.status = "pending"  # pending、starting、ready、degraded
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """连接预热是否已结束（成功或降级）"""
+        return self.status in ("ready", "degraded")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        获取启动状态
+
+        Returns:
+            状态字典（status、各阶段耗时和结果、就绪耗时、错误信息）
+        """
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "startup_time": (
+                round(self.ready_at - self.started_at, 4)
+                if self.ready_at is not None and self.started_at is not None
+                else None
+            ),
+            "phases": {name: dict(phase) for name, phase in self.phases.items()},
+            "error": self.error,
+        }
+
+
+# 全局启动状态
+_startup_state = StartupState()
+
+
+def get_startup_state() -> StartupState:
+    """获取全局启动状态"""
+    return _startup_state
+
+
+async def run_startup(
+    data_importer,
+    config_manager,
+    warm_up: bool = True,
+    warm_up_queries: int = 10,
+    state: Optional[StartupState] = None,
+) -> Dict[str, Any]:
+    """
+    执行启动阶段：读取配置、预先打开连接池连接，然后预热缓存
+
+    连接预热失败（如数据库暂不可用）时状态为degraded，服务照常处理请求，
+    连接在首次使用时创建。
+
+    Args:
+        data_importer: DataImporter实例
+        config_manager: ConfigManager实例（与DataImporter共用，配置只解析一次）
+        warm_up: 连接就绪后是否预热缓存
+        warm_up_queries: 预热的SQL数量
+        state: 启动状态（可选），默认使用全局状态
+
+    Returns:
+        启动状态字典
+    """
+    state = state or _startup_state
+    state.status = "starting"
+    state.started_at = time.time()
+    loop = asyncio.get_running_loop()
+
+    async def phase(name: str, func, *args, report: bool = True):
+        phase_start = time.time()
+        try:
+            result = await loop.run_in_executor(None, func, *args)
+        except Exception as e:
+            state.phases[name] = {
+                "duration": round(time.time() - phase_start, 4),
+                "error": str(e),
+            }
+            raise
+        state.phases[name] = {"duration": round(time.time() - phase_start, 4)}
+        if report:
+            state.phases[name]["result"] = result
+        return result
+
+    try:
+        # 配置含密码，不写入状态
+        database_config = await phase(
+            "config", config_manager.get_default_database_config, report=False
+        )
+        if data_importer.use_connection_pool:
+            await phase("pools", ConnectionPoolManager.warm_up, database_config)
+        # 读取数据版本（同时启动LISTEN线程），缓存键计算不再等待目录表
+        await phase(
+            "data_version",
+            functools.partial(
+                data_importer.get_data_version, database_config, wait=True
+            ),
+        )
+        state.status = "ready"
+    except Exception as e:
+        state.status = "degraded"
+        state.error = str(e)
+        logger.warning(f"连接预热失败，连接将在首次使用时创建: {e}")
+    state.ready_at = time.time()
+    logger.info(
+        f"服务启动阶段完成（{state.status}），耗时 "
+        f"{state.ready_at - state.started_at:.2f}秒"
+    )
+
+    if warm_up and state.status == "ready":
+        phase_start = time.time()
+        result = await warm_up_caches(data_importer, warm_up_queries)
+        state.phases["cache"] = {
+            "duration": round(time.time() - phase_start, 4),
+            "result": result,
+        }
+    return state.to_dict()
+
+
+def start_startup(
+    data_importer, config_manager, warm_up: bool = True, warm_up_queries: int = 10
+) -> "asyncio.Task":
+    """
+    在事件循环中后台执行启动阶段，不阻塞MCP初始化握手
+
+    调用方需保留返回的任务引用。
+
+    Args:
+        data_importer: DataImporter实例
+        config_manager: ConfigManager实例
+        warm_up: 连接就绪后是否预热缓存
+        warm_up_queries: 预热的SQL数量
+
+    Returns:
+        启动任务
+    """
+    return asyncio.get_running_loop().create_task(
+        run_startup(
+            data_importer,
+            config_manager,
+            warm_up=warm_up,
+            warm_up_queries=warm_up_queries,
+        )
+    )
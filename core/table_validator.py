@@ -5,12 +5,22 @@
 import re
 import psycopg2
 from typing import Set, Optional
-import logging
 
 from .logging_config import get_logger
+from .prepared_statements import get_statement_cache, register_startup_statement
 
 logger = get_logger(__name__)
 
+# 校验表是否存在（热点查询，服务启动时预编译）
+_TABLE_EXISTS_SQL = register_startup_statement(
+    """
+    SELECT table_name
+    FROM information_schema.tables
+    WHERE table_schema = 'public'
+      AND table_name = %s
+    """
+)
+
 
 class TableValidator:
     """表名验证器"""
@@ -22,31 +32,48 @@ class TableValidator:
     _validated_tables: Set[str] = set()
 
     @classmethod
-    def validate_table_name(
-        cls, table_name: str, conn: Optional[psycopg2.extensions.connection] = None
-    ) -> str:
+    def check_format(cls, table_name: str) -> str:
         """
-        验证表名，防止SQL注入
+        只检查表名格式（不访问数据库，不写入验证缓存）
 
         Args:
             table_name: 要验证的表名
-            conn: 数据库连接（可选），如果提供则验证表是否存在
 
         Returns:
-            验证后的表名
+            表名
 
         Raises:
-            ValueError: 表名无效或不存在
+            ValueError: 表名为空或格式无效
         """
         if not table_name:
             raise ValueError("表名不能为空")
 
-        # 检查格式
         if not cls.TABLE_NAME_PATTERN.match(table_name):
             raise ValueError(
                 f"无效的表名格式: {table_name}。"
                 "表名只能包含字母、数字和下划线，且必须以字母或下划线开头"
             )
+        return table_name
+
+    @classmethod
+    def validate_table_name(
+        cls, table_name: str, conn: Optional[psycopg2.extensions.connection] = None
+    ) -> str:
+        """
+        验证表名，防止SQL注入
+
+        Args:
+            table_name: 要验证的表名
+            conn: 数据库连接（可选），如果提供则验证表是否存在
+
+        Returns:
+            验证后的表名
+
+        Raises:
+            ValueError: 表名无效或不存在
+        """
+        # 检查格式
+        cls.check_format(table_name)
 
         # 如果表名已在缓存中，直接返回
         if table_name in cls._validated_tables:
@@ -56,15 +83,7 @@ class TableValidator:
         if conn:
             try:
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        SELECT table_name 
-                        FROM information_schema.tables 
-                        WHERE table_schema = 'public' 
-                          AND table_name = %s
-                        """,
-                        (table_name,),
-                    )
+                    get_statement_cache().execute(cur, _TABLE_EXISTS_SQL, (table_name,))
                     if not cur.fetchone():
                         raise ValueError(f"表不存在: {table_name}")
             except psycopg2.Error as e:
@@ -16,3 +16,11 @@ SELECT extname, extversion
 FROM pg_extension 
 WHERE extname LIKE 'postgis%';
 
+-- 数据版本目录表：导入程序写入数据后递增，MCP服务据此使缓存失效
+CREATE TABLE IF NOT EXISTS public.data_versions (
+    table_name VARCHAR(63) NOT NULL,
+    tile_code VARCHAR(10) NOT NULL DEFAULT '',
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (table_name, tile_code)
+);
@@ -17,6 +17,11 @@ from mcp.types import Resource, Tool, TextContent
 
 from core.data_importer import DataImporter
 from core.config_manager import ConfigManager
+from core.connection_pool import ConnectionPoolManager
+from core.metrics_exporter import start_metrics_exporter
+from core.server_stats import SECTIONS, collect_server_stats
+from core.prepared_statements import get_statement_cache
+from core.startup import start_startup
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -27,7 +32,23 @@ app = Server("china-1m-geodata-postgis-mcp")
 
 # 初始化核心组件
 config_manager = ConfigManager()
-data_importer = DataImporter()
+ConnectionPoolManager.configure(config_manager.get_pool_config())
+get_statement_cache(**config_manager.get_prepared_statement_config())
+replica_config = config_manager.get_replica_config()
+if replica_config["replicas"]:
+    ConnectionPoolManager.set_replicas(
+        config_manager.get_default_database_config(), **replica_config
+    )
+cache_config = config_manager.get_cache_config()
+data_importer = DataImporter(
+    query_cache=cache_config["query_cache"],
+    query_cache_ttl=cache_config["query_cache_ttl"],
+    query_cache_max_entry_bytes=cache_config["query_cache_max_entry_bytes"],
+    query_cache_persist_seconds=cache_config["query_cache_persist_seconds"],
+    disk_cache_dir=cache_config["disk_cache_dir"],
+    disk_cache_max_bytes=cache_config["disk_cache_max_bytes"],
+    config_manager=config_manager,
+)
 
 
 @app.list_resources()
@@ -47,6 +68,16 @@ async def list_resources() -> List[Resource]:
             )
         )
 
+    # 运行中服务的性能统计
+    resources.append(
+        Resource(
+            uri="stats://server",
+            name="服务统计",
+            description="各工具延迟分位数（1分钟/5分钟/1小时）、慢查询样本、连接池使用率、缓存命中率和启动状态",
+            mimeType="application/json",
+        )
+    )
+
     return resources
 
 
@@ -58,6 +89,14 @@ async def read_resource(uri: str) -> str:
         source_config = config_manager.get_data_source(source_name)
         return json.dumps(source_config, ensure_ascii=False, indent=2)
 
+    elif uri.startswith("stats://"):
+        # stats://server 返回全部统计，stats://<统计项> 只返回一项
+        section = uri.replace("stats://", "").strip("/")
+        stats = collect_server_stats(
+            data_importer, None if section in ("", "server") else [section]
+        )
+        return json.dumps(stats, ensure_ascii=False, indent=2, default=str)
+
     else:
         raise ValueError(f"未知的资源URI: {uri}")
 
@@ -202,6 +241,24 @@ async def list_tools() -> List[Tool]:
                 "required": ["sql"],
             },
         ),
+        Tool(
+            name="server_stats",
+            description="查看运行中服务的性能统计，用于诊断调用变慢或失败。返回各工具最近1分钟/5分钟/1小时及启动以来的延迟分位数（p50/p90/p95/p99，单位秒）、错误率和吞吐量，最近的慢查询样本，各负载类型的连接池使用率和排队情况，只读副本状态，缓存命中率，导入统计和启动状态。不访问数据库。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "sections": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": list(SECTIONS)},
+                        "description": "需要的统计项（可选，默认全部）",
+                    },
+                    "slow_query_limit": {
+                        "type": "integer",
+                        "description": "返回的慢查询样本数（默认10）",
+                    },
+                },
+            },
+        ),
     ]
 
 
@@ -249,6 +306,19 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
                 )
             ]
 
+        elif name == "server_stats":
+            result = collect_server_stats(
+                data_importer,
+                arguments.get("sections"),
+                arguments.get("slow_query_limit", 10),
+            )
+            return [
+                TextContent(
+                    type="text",
+                    text=json.dumps(result, ensure_ascii=False, indent=2, default=str),
+                )
+            ]
+
         else:
             raise ValueError(f"未知的工具: {name}")
 
@@ -341,9 +411,36 @@ async def main():
     print("等待MCP客户端连接...", file=sys.stderr)
     print("=" * 60, file=sys.stderr)
 
+    # 可选的指标导出（HTTP端口或textfile），未配置时不启动
+    metrics_exporter = start_metrics_exporter(
+        data_importer, config_manager.get_metrics_config()
+    )
+
     async with stdio_server() as (read_stream, write_stream):
         print("MCP服务器已就绪，开始处理请求...", file=sys.stderr)
-        await app.run(read_stream, write_stream, app.create_initialization_options())
+        # 后台预先打开连接池连接并预热缓存，不阻塞初始化握手
+        startup_task = start_startup(
+            data_importer,
+            config_manager,
+            warm_up=cache_config["warm_up"],
+            warm_up_queries=cache_config["warm_up_queries"],
+        )
+        try:
+            await app.run(
+                read_stream, write_stream, app.create_initialization_options()
+            )
+        finally:
+            # 客户端断开时启动阶段可能仍在进行
+            startup_task.cancel()
+            try:
+                await startup_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"启动阶段失败: {e}", exc_info=True)
+            # 停止指标端点和文件写入线程
+            if metrics_exporter is not None:
+                metrics_exporter.close()
 
 
 if __name__ == "__main__":
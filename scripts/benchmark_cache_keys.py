@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+缓存键生成基准测试
+对比旧的缓存键（json.dumps全部参数含self + MD5）与当前缓存键
+（忽略self、参数规范化、数据库配置指纹、blake2b）的生成耗时和缓存命中率
+
+不需要数据库连接。
+
+使用方法:
+    python scripts/benchmark_cache_keys.py
+    python scripts/benchmark_cache_keys.py --iterations 200000 --calls-per-instance 5
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.cache_manager import CacheManager
+
+
+class FakeImporter:
+    """模拟DataImporter实例（旧缓存键会把实例地址序列化进键）"""
+
+
+def legacy_key(prefix, *args, **kwargs):
+    """旧的缓存键生成方式"""
+    key_data = {
+        "args": args,
+        "kwargs": sorted(kwargs.items()),
+    }
+    key_str = json.dumps(key_data, sort_keys=True, default=str)
+    return f"{prefix}:{hashlib.md5(key_str.encode()).hexdigest()}"
+
+
+def make_configs():
+    """同一数据库的几种等价配置（字段顺序、密码来源不同）"""
+    base = {
+        "host": "postgres",
+        "port": 5432,
+        "database": "gis_data",
+        "user": "postgres",
+        "password": "postgres",
+    }
+    reordered = dict(reversed(list(base.items())))
+    rotated = dict(base, password="rotated-secret")
+    return [base, reordered, rotated]
+
+
+def bench_generation(cache, iterations):
+    """测量单次生成缓存键的耗时"""
+    importer = FakeImporter()
+    config = make_configs()[0]
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        legacy_key("list_tables", importer, database_config=config)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        cache._generate_key("list_tables", database_config=config)
+    current = time.perf_counter() - start
+
+    return legacy, current
+
+
+def bench_hit_rate(iterations, calls_per_instance, seed):
+    """
+    模拟共享缓存下的调用：每个实例处理若干次调用后被替换（如每个会话新建
+    DataImporter），数据库配置在几种等价写法中随机选择，统计命中率
+    """
+    rng = random.Random(seed)
+    configs = make_configs()
+    prefixes = ["list_tables", "list_tile_codes"]
+    cache = CacheManager(sweep_interval=0)
+
+    legacy_seen = set()
+    current_seen = set()
+    legacy_hits = current_hits = 0
+    importers = []  # 保持实例存活，避免新实例复用旧地址
+    for i in range(iterations):
+        if i % calls_per_instance == 0:
+            importers.append(FakeImporter())
+        importer = importers[-1]
+        config = rng.choice(configs)
+        prefix = rng.choice(prefixes)
+
+        key = legacy_key(prefix, importer, database_config=config)
+        if key in legacy_seen:
+            legacy_hits += 1
+        legacy_seen.add(key)
+
+        key = cache._generate_key(prefix, database_config=config)
+        if key in current_seen:
+            current_hits += 1
+        current_seen.add(key)
+
+    cache.close()
+    return {
+        "legacy_hit_rate": legacy_hits / iterations,
+        "legacy_distinct_keys": len(legacy_seen),
+        "current_hit_rate": current_hits / iterations,
+        "current_distinct_keys": len(current_seen),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="缓存键生成基准测试")
+    parser.add_argument("--iterations", type=int, default=100000, help="迭代次数")
+    parser.add_argument(
+        "--calls-per-instance", type=int, default=10, help="每个实例处理的调用数"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    cache = CacheManager(sweep_interval=0)
+    legacy, current = bench_generation(cache, args.iterations)
+    cache.close()
+
+    print("=" * 60)
+    print("缓存键生成耗时")
+    print("=" * 60)
+    print(f"  旧方式（json + MD5）: {legacy / args.iterations * 1e6:.2f} 微秒/次")
+    print(f"  当前方式（规范化 + 指纹）: {current / args.iterations * 1e6:.2f} 微秒/次")
+    print(f"  加速: {legacy / current:.1f}x")
+
+    stats = bench_hit_rate(args.iterations, args.calls_per_instance, args.seed)
+    print()
+    print("=" * 60)
+    print(
+        f"缓存命中率（每个实例 {args.calls_per_instance} 次调用，3 种等价数据库配置）"
+    )
+    print("=" * 60)
+    print(
+        f"  旧方式: {stats['legacy_hit_rate']:.2%}"
+        f"（{stats['legacy_distinct_keys']} 个不同键）"
+    )
+    print(
+        f"  当前方式: {stats['current_hit_rate']:.2%}"
+        f"（{stats['current_distinct_keys']} 个不同键）"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,19 @@ import fiona
 import psycopg2
 from shapely.geometry import shape
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import sys
 import configparser
 import time
 import logging
 from collections import defaultdict
 
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.layer_inventory import load_layer_inventory, plan_layers
+from core.data_version import bump_data_versions
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -267,9 +273,12 @@ def import_gdb_to_unified_tables(
     srid: int = 4326,
     batch_size: int = 1000,
     skip_invalid: bool = True,
+    inventory_cache_dir: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     导入GDB文件的所有图层到统一表结构
+
+    先读取图层清单（要素数、结构、范围），跳过空图层并按要素数从大到小导入
     """
     gdb_name = Path(gdb_path).stem.replace(".gdb", "")
     tile_code = extract_tile_code(gdb_name)
@@ -280,25 +289,29 @@ def import_gdb_to_unified_tables(
         f"开始时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}"
     )
 
-    # 获取所有图层
-    try:
-        layers = fiona.listlayers(gdb_path)
-    except Exception as e:
-        raise ValueError(f"无法读取GDB文件: {e}")
-
-    if not layers:
-        raise ValueError(f"GDB文件为空: {gdb_path}")
+    # 读取图层清单（名称、要素数、结构、范围）
+    inventory = load_layer_inventory(gdb_path, inventory_cache_dir)
+    if not inventory["layers"]:
+        raise ValueError(f"无法读取GDB文件或文件为空: {gdb_path}")
+    layers, empty_layers = plan_layers(inventory)
+    total_layers = len(inventory["layers"])
 
-    logger.info(f"找到 {len(layers)} 个图层，开始处理...")
+    logger.info(
+        f"找到 {total_layers} 个图层（空图层 {len(empty_layers)} 个），开始处理..."
+    )
+    for entry in empty_layers:
+        logger.info(f"  [SKIP] 图层 {entry['name']} 为空（0条记录）")
     logger.info("=" * 60)
 
     # 统计信息
     table_stats = defaultdict(int)
     success_count = 0
     error_count = 0
-    skipped_count = 0
+    skipped_count = len(empty_layers)
+    touched_tables = set()  # 可能已写入数据的表（导入结束后递增数据版本）
 
-    for idx, layer_name in enumerate(layers, 1):
+    for idx, entry in enumerate(layers, 1):
+        layer_name = entry["name"]
         layer_start_time = time.time()
         logger.info(f"[{idx}/{len(layers)}] 处理图层: {layer_name}")
 
@@ -327,27 +340,8 @@ def import_gdb_to_unified_tables(
                     skipped_count += 1
                     continue
 
-            # 检查图层是否有数据
-            layer_empty = False
-            try:
-                with fiona.open(gdb_path, layer=layer_name) as src:
-                    first = next(iter(src), None)
-                    if first is None:
-                        layer_empty = True
-            except StopIteration:
-                layer_empty = True
-            except Exception:
-                pass
-
-            if layer_empty:
-                elapsed = time.time() - layer_start_time
-                logger.info(
-                    f"  [SKIP] 图层 {layer_name} 为空（0条记录） - 耗时 {elapsed:.2f}秒"
-                )
-                skipped_count += 1
-                continue
-
             logger.info(f"  → 导入到表: {table_name}")
+            touched_tables.add(table_name)
             count = import_layer_data(
                 gdb_path,
                 layer_name,
@@ -385,11 +379,17 @@ def import_gdb_to_unified_tables(
         logger.info(f"  进度: {idx}/{len(layers)} ({progress:.1f}%)")
         logger.info("-" * 60)
 
+    # 使MCP服务中包含这些表的缓存立即失效
+    try:
+        bump_data_versions(conn, ((t, tile_code) for t in touched_tables))
+    except Exception as e:
+        logger.warning(f"递增数据版本失败: {e}")
+
     total_time = time.time() - start_time
     logger.info("=" * 60)
     logger.info(f"导入完成!")
     logger.info(f"  总耗时: {total_time:.2f}秒 ({total_time/60:.2f}分钟)")
-    logger.info(f"  总图层数: {len(layers)}")
+    logger.info(f"  总图层数: {total_layers}")
     logger.info(f"  成功导入: {success_count} 个图层")
     logger.info(f"  跳过(空): {skipped_count} 个图层")
     if error_count > 0:
@@ -401,7 +401,7 @@ def import_gdb_to_unified_tables(
         "status": "success",
         "gdb_name": gdb_name,
         "tile_code": tile_code,
-        "total_layers": len(layers),
+        "total_layers": total_layers,
         "success_layers": success_count,
         "error_layers": error_count,
         "skipped_layers": skipped_count,
@@ -433,6 +433,11 @@ def main():
         default=True,
         help="跳过无效几何（默认: True）",
     )
+    parser.add_argument(
+        "--inventory-cache-dir",
+        default=None,
+        help="图层清单缓存目录（可选），重复导入同一GDB时无需重新读取图层信息",
+    )
 
     args = parser.parse_args()
 
@@ -581,7 +586,12 @@ def main():
 
         try:
             result = import_gdb_to_unified_tables(
-                gdb_file, conn, args.srid, args.batch_size, args.skip_invalid
+                gdb_file,
+                conn,
+                args.srid,
+                args.batch_size,
+                args.skip_invalid,
+                inventory_cache_dir=args.inventory_cache_dir,
             )
             total_success += 1
             print(
@@ -60,3 +60,16 @@ def sample_tile_codes():
         ],
         "total": 2,
     }
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    """替换全局性能监控器，并清空连接池管理器的全局状态"""
+    from core import performance_monitor
+    from core.connection_pool import ConnectionPoolManager
+
+    instance = performance_monitor.PerformanceMonitor(slow_query_threshold=1.0)
+    monkeypatch.setattr(performance_monitor, "_global_monitor", instance)
+    monkeypatch.setattr(ConnectionPoolManager, "_pools", {})
+    monkeypatch.setattr(ConnectionPoolManager, "_routers", {})
+    return instance
@@ -0,0 +1,197 @@
+"""
+批量写入器测试：二分定位出错行、按预算提交、提交失败时的计数回退、隔离表写入、
+自适应批量大小
+"""
+
+import psycopg2
+import pytest
+
+pytest.importorskip("fiona")
+
+from core.gdb_importer import AdaptiveBatchSizer, BatchWriter  # noqa: E402
+from core.import_profiler import NULL_PROFILER  # noqa: E402
+
+WKT = "POINT (1 2)"
+
+
+class FakeCursor:
+    """模拟游标：几何为BAD的行插入失败，记录执行的语句"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql.strip())
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        if "import_quarantine" in sql:
+            self.conn.pending_quarantine += len(rows)
+            return
+        self.conn.batches.append(len(rows))
+        if any(row[0] == "BAD" for row in rows):
+            raise psycopg2.DataError("invalid geometry")
+        self.conn.pending_rows += len(rows)
+
+
+class FakeConnection:
+    """模拟连接：记录已提交的行数，可指定接下来若干次提交失败"""
+
+    def __init__(self, fail_commits=0):
+        self.fail_commits = fail_commits
+        self.statements = []
+        self.batches = []
+        self.commits = 0
+        self.pending_rows = 0
+        self.pending_quarantine = 0
+        self.rows = 0
+        self.quarantine_rows = 0
+
+    def commit(self):
+        if self.fail_commits:
+            self.fail_commits -= 1
+            raise psycopg2.OperationalError("connection lost")
+        self.commits += 1
+        self.rows += self.pending_rows
+        self.quarantine_rows += self.pending_quarantine
+        self.pending_rows = self.pending_quarantine = 0
+
+    def rollback(self):
+        self.pending_rows = self.pending_quarantine = 0
+
+
+def make_writer(conn, quarantine=False, **kwargs):
+    return BatchWriter(
+        conn,
+        FakeCursor(conn),
+        "INSERT INTO public.t (geom, tile_code, name) VALUES (%s, %s, %s)",
+        NULL_PROFILER.layer("F49", "layer"),
+        quarantine=(
+            {
+                "table_name": "t",
+                "tile_code": "F49",
+                "layer_name": "layer",
+                "columns": ["name"],
+            }
+            if quarantine
+            else None
+        ),
+        **kwargs,
+    )
+
+
+def rows(count, bad=()):
+    return [("BAD" if i in bad else WKT, "F49", f"n{i}") for i in range(count)]
+
+
+class TestBatchWriter:
+    def test_bisection_rejects_only_bad_rows(self):
+        conn = FakeConnection()
+        writer = make_writer(conn, batch_size=8)
+        writer.add(rows(8, bad={3, 6}))
+        writer.close()
+
+        assert writer.inserted == 6 == conn.rows
+        assert writer.failed == 2
+        assert writer.quarantined == 0
+        # 只继续拆分包含出错行的一半：8 -> 4+4 -> 2+2+2+2 -> 4个单行
+        assert sorted(conn.batches) == [1] * 4 + [2] * 4 + [4] * 2 + [8]
+        assert conn.statements.count("SAVEPOINT import_batch") == len(conn.batches)
+        assert conn.statements.count("ROLLBACK TO SAVEPOINT import_batch") == 7
+
+    def test_commits_by_byte_budget(self):
+        conn = FakeConnection()
+        writer = make_writer(
+            conn,
+            batch_size=10,
+            commit_interval=3600,
+            commit_bytes=(len(WKT) + BatchWriter.ROW_OVERHEAD_BYTES) * 20,
+        )
+        writer.add(rows(10))
+        assert conn.commits == 0
+        writer.add(rows(10))
+        assert conn.commits == 1
+        writer.add(rows(5))
+        writer.close()
+
+        assert conn.commits == 2
+        assert writer.inserted == 25 == conn.rows
+
+    def test_commit_failure_rolls_back_only_uncommitted_rows(self):
+        conn = FakeConnection()
+        writer = make_writer(conn, batch_size=4, commit_interval=3600)
+        writer.add(rows(4))
+        writer._commit()
+        assert conn.rows == 4
+
+        conn.fail_commits = 1
+        writer.add(rows(4, bad={1}))
+        writer.close()
+
+        # 被拒绝的行已计入失败，提交失败只增加实际插入后丢失的3行
+        assert writer.inserted == 4 == conn.rows
+        assert writer.failed == 1 + 3
+
+    def test_abort_keeps_committed_counts(self):
+        conn = FakeConnection()
+        writer = make_writer(conn, batch_size=4, commit_interval=3600)
+        writer.add(rows(4))
+        writer._commit()
+        writer.add(rows(6, bad={0}))
+        writer.abort()
+
+        # 缓冲区中尚未写入的2行直接丢弃，不计入失败
+        assert writer.inserted == 4 == conn.rows
+        assert writer.failed == 1 + 3
+        writer.close()
+        assert conn.commits == 1
+
+
+class TestBatchWriterQuarantine:
+    def test_rejects_are_quarantined_by_stage(self):
+        conn = FakeConnection()
+        writer = make_writer(conn, quarantine=True, batch_size=4)
+        writer.add(
+            rows(4, bad={2}),
+            [{"reason": "几何修复失败", "wkb": b"\x01", "properties": {"name": "x"}}],
+        )
+        writer.close()
+
+        assert writer.inserted == 3
+        assert writer.failed == 1
+        assert writer.quarantined == 2 == conn.quarantine_rows
+        # 修复阶段的拒绝记录先写入，插入失败的行在该批写入后写入
+        savepoints = [s for s in conn.statements if s.startswith("SAVEPOINT")]
+        assert savepoints[0] == "SAVEPOINT import_quarantine"
+        assert savepoints[-1] == "SAVEPOINT import_quarantine"
+
+    def test_commit_failure_rolls_back_quarantined_rows(self):
+        conn = FakeConnection()
+        writer = make_writer(conn, quarantine=True, batch_size=4, commit_interval=3600)
+        writer.add(rows(4, bad={0}))
+        writer._commit()
+        assert conn.quarantine_rows == 1
+
+        conn.fail_commits = 1
+        writer.add(rows(4, bad={1, 2}))
+        writer.close()
+
+        assert writer.quarantined == 1 == conn.quarantine_rows
+        assert writer.inserted == 3 == conn.rows
+        assert writer.failed == 1 + 2 + 2
+
+
+class TestAdaptiveBatchSizer:
+    def test_grows_while_per_row_time_improves(self):
+        sizer = AdaptiveBatchSizer(1000, max_size=5000)
+        assert sizer.observe(1000, 1.0) == 1500
+        assert sizer.observe(1500, 1.2) == 2250
+        # 单行耗时上升后反向调整
+        assert sizer.observe(2250, 2.25) == 1500
+
+    def test_ignores_partial_batches_and_respects_bounds(self):
+        sizer = AdaptiveBatchSizer(1000, min_size=800, max_size=1200)
+        assert sizer.observe(10, 1.0) == 1000
+        assert sizer.observe(1000, 1.0) == 1200
+        assert sizer.observe(1200, 0.1) == 1200
+        assert sizer.observe(1200, 10.0) == 800
@@ -0,0 +1,242 @@
+"""
+缓存管理器测试：内存缓存容量限制和LRU淘汰、相同请求合并执行、缓存键生成
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core import cache_manager as cache_manager_module
+from core.cache_manager import CacheManager, SingleFlight, _canonical, cached
+
+
+@pytest.fixture
+def make_cache():
+    """创建只使用内存缓存的缓存管理器（不启动后台清理线程）"""
+    managers = []
+
+    def factory(**kwargs):
+        manager = CacheManager(use_redis=False, sweep_interval=0, **kwargs)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture
+def cache(make_cache):
+    return make_cache()
+
+
+class TestMemoryCache:
+    def test_evicts_least_recently_used_entry(self, make_cache):
+        cache = make_cache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # a变为最近使用
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_evicts_by_size(self, make_cache):
+        cache = make_cache(max_entries=100, max_bytes=3000)
+        for key in ("a", "b", "c"):
+            cache.set(key, "x" * 1000)
+
+        stats = cache.get_stats()
+        assert stats["memory_cache_bytes"] <= 3000
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+
+    def test_oversized_value_is_not_stored(self, make_cache):
+        cache = make_cache(max_bytes=1000)
+        cache.set("small", "x")
+        cache.set("large", "x" * 5000)
+
+        assert cache.get("large") is None
+        # 过大的值不会挤掉已有条目
+        assert cache.get("small") == "x"
+
+    def test_overwrite_updates_size(self, make_cache):
+        cache = make_cache()
+        cache.set("key", "x" * 1000)
+        cache.set("key", "x")
+        stats = cache.get_stats()
+        assert stats["memory_cache_size"] == 1
+        assert stats["memory_cache_bytes"] < 1000
+
+    def test_expired_entries_are_dropped(self, make_cache):
+        cache = make_cache()
+        cache.set("short", 1, ttl=0.05)
+        cache.set("long", 2, ttl=60)
+        time.sleep(0.06)
+
+        assert cache.purge_expired() == 1
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+        stats = cache.get_stats()
+        assert stats["expirations"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_clear_by_prefix(self, make_cache):
+        cache = make_cache()
+        cache.set("list_tables:1", 1)
+        cache.set("list_tables:2", 2)
+        cache.set("verify_data:1", 3)
+        cache.clear("list_tables:")
+
+        assert cache.get_stats()["memory_cache_size"] == 1
+        assert cache.get("verify_data:1") == 3
+
+
+class TestSingleFlight:
+    def test_concurrent_async_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        async def run():
+            return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+        results = asyncio.run(run())
+        assert calls == 1
+        assert all(result == {"value": 42} for result in results)
+        assert flight.coalesced == 4
+
+    def test_async_error_is_shared(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight()
+
+        async def run():
+            async def value(v):
+                return v
+
+            return await asyncio.gather(
+                flight.do("a", lambda: value(1)), flight.do("b", lambda: value(2))
+            )
+
+        assert asyncio.run(run()) == [1, 2]
+        assert flight.coalesced == 0
+
+    def test_concurrent_threads_share_one_execution(self):
+        flight = SingleFlight()
+        calls = 0
+        started = threading.Event()
+        results = []
+
+        def compute():
+            nonlocal calls
+            calls += 1
+            started.set()
+            time.sleep(0.1)
+            return "done"
+
+        def worker():
+            results.append(flight.do_sync("key", compute))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait(timeout=2)
+        followers = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        for thread in [leader] + followers:
+            thread.join(timeout=5)
+
+        assert calls == 1
+        assert results == ["done"] * 4
+
+
+class TestCacheKeys:
+    def test_dict_order_does_not_matter(self):
+        assert _canonical({"a": 1, "b": [1, 2]}) == _canonical({"b": [1, 2], "a": 1})
+
+    def test_types_are_distinguished(self):
+        assert _canonical(True) != _canonical(1)
+        assert _canonical(1.0) != _canonical(1)
+        assert _canonical([1, 2]) != _canonical("[1, 2]")
+
+    def test_dicts_with_host_keep_all_keys(self, cache):
+        # 只有名为database_config的参数替换为指纹，其他字典完整参与缓存键
+        first = cache._generate_key("q", spatial_filter={"host": "a", "x": 1})
+        second = cache._generate_key("q", spatial_filter={"host": "a", "x": 2})
+        assert first != second
+
+    def test_database_config_fingerprint_ignores_password(
+        self, cache, mock_database_config
+    ):
+        other = dict(mock_database_config, password="changed")
+        assert cache._generate_key(
+            "list_tables", database_config=mock_database_config
+        ) == cache._generate_key("list_tables", database_config=other)
+
+    def test_database_config_identifies_database(self, cache, mock_database_config):
+        other = dict(mock_database_config, database="other_db")
+        assert cache._generate_key(
+            "list_tables", database_config=mock_database_config
+        ) != cache._generate_key("list_tables", database_config=other)
+
+    def test_cached_ignores_self_and_argument_style(self, monkeypatch, cache):
+        monkeypatch.setattr(cache_manager_module, "_global_cache", cache)
+        calls = []
+
+        class Importer:
+            @cached(prefix="tables", ttl=60)
+            async def list_tables(self, category=None, database_config=None):
+                calls.append(category)
+                return {"category": category}
+
+        async def run():
+            await Importer().list_tables("hyd")
+            await Importer().list_tables(category="hyd", database_config=None)
+            await Importer().list_tables("res")
+
+        asyncio.run(run())
+        assert calls == ["hyd", "res"]
+
+    def test_cached_bypasses_cache_when_version_unknown(self, monkeypatch, cache):
+        monkeypatch.setattr(cache_manager_module, "_global_cache", cache)
+        versions = [None, None, 3, 3]
+        calls = []
+
+        @cached(prefix="tiles", ttl=60, version=lambda **kwargs: versions.pop(0))
+        def list_tiles(table_name):
+            calls.append(table_name)
+            return [table_name]
+
+        for _ in range(2):
+            assert list_tiles("boua") == ["boua"]
+        # 版本未知的调用都执行函数且不写入缓存
+        assert calls == ["boua"] * 2
+        assert cache.get_stats()["memory_cache_size"] == 0
+
+        for _ in range(2):
+            assert list_tiles("boua") == ["boua"]
+        assert calls == ["boua"] * 3
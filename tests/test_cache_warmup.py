@@ -0,0 +1,89 @@
+"""
+缓存预热测试：元数据和常用SQL预热、按启用的缓存执行、单项失败不影响其余预热
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core import cache_warmup
+from core.cache_warmup import warm_up_caches
+
+
+class FakeImporter:
+    """记录预热调用的DataImporter"""
+
+    def __init__(self, cache_manager=True, query_cache=True, failing=()):
+        self.cache_manager = object() if cache_manager else None
+        self.query_cache = object() if query_cache else None
+        self.failing = set(failing)
+        self.calls = []
+
+    async def _call(self, name, *args):
+        await asyncio.sleep(0)
+        self.calls.append((name,) + args)
+        if name in self.failing:
+            raise RuntimeError(f"{name} failed")
+
+    def list_tile_codes(self, database_config):
+        return self._call("list_tile_codes")
+
+    def list_tables(self, category):
+        return self._call("list_tables")
+
+    def execute_sql(self, sql, record_history=True):
+        assert record_history is False
+        return self._call("execute_sql", sql)
+
+
+@pytest.fixture
+def history(monkeypatch):
+    statements = [
+        {"statement": "SELECT count(*) FROM boua", "count": 5, "avg_time": 0.2},
+        {"statement": "SELECT count(*) FROM hyda", "count": 3, "avg_time": 0.1},
+    ]
+    monitor = SimpleNamespace(
+        get_top_statements=lambda operation, limit: statements[:limit]
+    )
+    monkeypatch.setattr(cache_warmup, "get_performance_monitor", lambda: monitor)
+    return statements
+
+
+class TestCacheWarmUp:
+    def test_warms_metadata_and_each_history_statement(self, history):
+        importer = FakeImporter()
+        result = asyncio.run(warm_up_caches(importer, top_n=10))
+
+        assert importer.calls == [
+            ("list_tile_codes",),
+            ("list_tables",),
+            ("execute_sql", "SELECT count(*) FROM boua"),
+            ("execute_sql", "SELECT count(*) FROM hyda"),
+        ]
+        assert result["warmed"] == 4
+        assert result["failed"] == 0
+
+    def test_sql_warm_up_requires_query_cache(self, history):
+        importer = FakeImporter(query_cache=False)
+        asyncio.run(warm_up_caches(importer))
+        assert [call[0] for call in importer.calls] == [
+            "list_tile_codes",
+            "list_tables",
+        ]
+
+    def test_metadata_warm_up_requires_result_cache(self, history):
+        importer = FakeImporter(cache_manager=False)
+        asyncio.run(warm_up_caches(importer, top_n=1))
+        assert importer.calls == [("execute_sql", "SELECT count(*) FROM boua")]
+
+    def test_failures_do_not_stop_other_items(self, history):
+        importer = FakeImporter(failing={"list_tile_codes"})
+        result = asyncio.run(warm_up_caches(importer, top_n=0))
+
+        assert [call[0] for call in importer.calls] == [
+            "list_tile_codes",
+            "list_tables",
+        ]
+        assert result["warmed"] == 1
+        assert result["failed"] == 1
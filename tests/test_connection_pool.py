@@ -0,0 +1,214 @@
+"""
+连接池测试：排队顺序、等待超时、异步取连接、连接检查和回收
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from core.connection_pool import ConnectionPool, PoolTimeout
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    """不访问数据库的连接"""
+
+    def __init__(self):
+        self.closed = 0
+        self.info = FakeInfo()
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    """创建使用假连接的连接池（不启动后台清理线程）"""
+    monkeypatch.setattr(ConnectionPool, "_connect", lambda self: FakeConnection())
+    pools = []
+
+    def factory(minconn=0, maxconn=2, timeout=1.0, **kwargs):
+        settings = dict(max_lifetime=None, max_idle=None, ping_after=None)
+        settings.update(kwargs)
+        pool = ConnectionPool(
+            minconn, maxconn, timeout=timeout, reap_interval=0, **settings
+        )
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.closeall()
+
+
+class TestConnectionPool:
+    def test_timeout_when_exhausted(self, make_pool):
+        pool = make_pool(maxconn=2, timeout=0.1)
+        held = [pool.getconn(), pool.getconn()]
+
+        start = time.monotonic()
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+        assert time.monotonic() - start >= 0.1
+
+        stats = pool.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["waiting"] == 0
+        for conn in held:
+            pool.putconn(conn)
+
+    def test_waiters_served_in_order(self, make_pool):
+        pool = make_pool(maxconn=1, timeout=2.0)
+        first = pool.getconn()
+        order = []
+
+        def worker(index):
+            conn = pool.getconn()
+            order.append(index)
+            pool.putconn(conn)
+
+        threads = []
+        for index in range(4):
+            thread = threading.Thread(target=worker, args=(index,))
+            thread.start()
+            threads.append(thread)
+            # 等该线程进入等待队列后再启动下一个
+            while pool.get_stats()["waiting"] < index + 1:
+                time.sleep(0.001)
+
+        pool.putconn(first)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert order == [0, 1, 2, 3]
+        assert pool.get_stats()["size"] == 1
+
+    def test_returned_connection_is_reused(self, make_pool):
+        pool = make_pool(maxconn=2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        assert pool.getconn() is conn
+
+    def test_async_wait_and_timeout(self, make_pool):
+        pool = make_pool(maxconn=1, timeout=0.1)
+
+        async def run():
+            conn = await pool.agetconn()
+            with pytest.raises(PoolTimeout):
+                await pool.agetconn()
+
+            waiter = asyncio.ensure_future(pool.agetconn(timeout=1.0))
+            await asyncio.sleep(0.01)
+            pool.putconn(conn)
+            return conn, await waiter
+
+        conn, handed_over = asyncio.run(run())
+        assert handed_over is conn
+
+    def test_cancelled_waiter_passes_connection_on(self, make_pool):
+        pool = make_pool(maxconn=1, timeout=1.0)
+
+        async def run():
+            conn = await pool.agetconn()
+            cancelled = asyncio.ensure_future(pool.agetconn())
+            waiting = asyncio.ensure_future(pool.agetconn())
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            pool.putconn(conn)
+            return conn, await waiting
+
+        conn, handed_over = asyncio.run(run())
+        assert handed_over is conn
+        assert pool.get_stats()["waiting"] == 0
+
+    def test_cancelled_during_connect_returns_connection(self, make_pool, monkeypatch):
+        pool = make_pool(maxconn=1, timeout=1.0)
+        connecting = threading.Event()
+        release = threading.Event()
+
+        def connect(self):
+            connecting.set()
+            release.wait(5)
+            return FakeConnection()
+
+        monkeypatch.setattr(ConnectionPool, "_connect", connect)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(pool.agetconn())
+            await loop.run_in_executor(None, connecting.wait, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            release.set()
+            # 新建的连接在后台完成后归还，下一个调用方可以取到
+            return await pool.agetconn()
+
+        conn = asyncio.run(run())
+        stats = pool.get_stats()
+        assert stats["size"] == 1
+        assert pool._used == {conn}
+        pool.putconn(conn)
+        assert pool._used == set()
+
+
+class TestConnectionHealth:
+    def test_closed_connection_is_replaced(self, make_pool):
+        pool = make_pool(maxconn=1)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.closed = 1  # 空闲期间被服务端断开
+
+        replacement = pool.getconn()
+        assert replacement is not conn
+        stats = pool.get_stats()
+        assert stats["broken"] == 1
+        assert stats["size"] == 1
+
+    def test_expired_connection_is_closed_on_return(self, make_pool):
+        pool = make_pool(maxconn=1, max_lifetime=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        assert conn.closed
+        stats = pool.get_stats()
+        assert stats["recycled"] == 1
+        assert stats["size"] == 0
+
+    def test_connection_in_transaction_is_rolled_back(self, make_pool):
+        pool = make_pool(maxconn=1)
+        conn = pool.getconn()
+        rollbacks = []
+
+        def rollback():
+            rollbacks.append(conn)
+            conn.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+        conn.info = FakeInfo()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        conn.rollback = rollback
+        pool.putconn(conn)
+
+        assert rollbacks == [conn]
+        assert pool.getconn() is conn
+
+    def test_reap_closes_surplus_idle_connections(self, make_pool):
+        pool = make_pool(minconn=1, maxconn=3, max_idle=0)
+        held = [pool.getconn() for _ in range(3)]
+        for conn in held:
+            pool.putconn(conn)
+
+        assert pool.reap() == 2
+        stats = pool.get_stats()
+        assert stats["size"] == 1
+        assert stats["idle"] == 1
+        assert stats["reaped"] == 2
@@ -0,0 +1,102 @@
+"""
+数据导入器测试：查询超时设置、图幅代码列表
+"""
+
+import asyncio
+import inspect
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.data_importer import DataImporter
+from core.table_validator import TableValidator
+
+
+@pytest.fixture
+def connection():
+    """模拟数据库连接，返回 (连接, 游标)"""
+    conn = MagicMock()
+    cur = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cur
+    return conn, cur
+
+
+@pytest.fixture
+def importer(monkeypatch, connection):
+    """不访问数据库的导入器"""
+    conn, _ = connection
+    importer = DataImporter(use_connection_pool=False, use_cache=False)
+    returned = []
+
+    async def aget_connection(*args, **kwargs):
+        return conn
+
+    monkeypatch.setattr(importer, "_aget_connection", aget_connection)
+    monkeypatch.setattr(
+        importer, "_put_connection", lambda conn, config=None: returned.append(conn)
+    )
+    importer.returned = returned
+    return importer
+
+
+class TestRunSql:
+    def test_timeout_is_local_to_transaction(
+        self, importer, connection, mock_database_config
+    ):
+        conn, cur = connection
+        cur.description = [("id",), ("name",)]
+        cur.fetchall.return_value = [(1, "a")]
+
+        result = asyncio.run(
+            importer._run_sql("SELECT id, name FROM boua", mock_database_config, 5)
+        )
+
+        assert result["data"] == [{"id": 1, "name": "a"}]
+        executed = [call.args[0] for call in cur.execute.call_args_list]
+        assert executed == [
+            "SET LOCAL statement_timeout = 5000",
+            "SELECT id, name FROM boua",
+        ]
+        # 不提交会话级设置，归还时由连接池回滚事务
+        conn.commit.assert_not_called()
+        assert importer.returned == [conn]
+
+
+class TestListTileCodes:
+    def test_tables_come_from_schema_cache(
+        self, importer, connection, mock_database_config, monkeypatch
+    ):
+        conn, cur = connection
+
+        def validate(*args, **kwargs):
+            raise AssertionError("不应逐表查询表是否存在")
+
+        monkeypatch.setattr(TableValidator, "validate_table_name", validate)
+        cur.fetchall.side_effect = [
+            # 表结构快照
+            [
+                ("boua", [["tile_code", "character varying(10)"]], []),
+                ("hyda", [["tile_code", "text"], ["geom", "geometry"]], []),
+                ("lrdl", [["id", "integer"]], []),
+                ("Bad-Name", [["tile_code", "text"]], []),
+            ],
+            [("F49", 10)],
+            [("F49", 5), ("F50", 3)],
+        ]
+        # 不经过@cached，直接调用
+        list_tile_codes = inspect.unwrap(DataImporter.list_tile_codes)
+
+        result = asyncio.run(list_tile_codes(importer, mock_database_config))
+
+        assert result == {
+            "tile_codes": [
+                {
+                    "tile_code": "F49",
+                    "total_records": 15,
+                    "tables": {"boua": 10, "hyda": 5},
+                },
+                {"tile_code": "F50", "total_records": 3, "tables": {"hyda": 3}},
+            ],
+            "total": 2,
+        }
+        assert importer.returned == [conn]
@@ -0,0 +1,95 @@
+"""
+数据版本测试：首次访问不阻塞调用方、后台读取快照、版本变化回调
+"""
+
+import threading
+
+import pytest
+
+from core.data_version import DataVersionTracker
+
+
+@pytest.fixture
+def make_tracker():
+    """创建不启动LISTEN线程的跟踪器，目录表读取由测试提供"""
+    trackers = []
+
+    def factory(load, **kwargs):
+        tracker = DataVersionTracker(
+            lambda config: None, lambda conn, config: None, listen=False, **kwargs
+        )
+        tracker._load = load
+        trackers.append(tracker)
+        return tracker
+
+    yield factory
+    for tracker in trackers:
+        tracker.close()
+
+
+class TestDataVersionTracker:
+    def test_first_access_does_not_block_caller(
+        self, make_tracker, mock_database_config
+    ):
+        release = threading.Event()
+        loaded = threading.Event()
+        threads = []
+
+        def load(config):
+            threads.append(threading.current_thread())
+            release.wait(5)
+            loaded.set()
+            return {"boua": 5}
+
+        tracker = make_tracker(load)
+        # 目录表尚未读取完成：版本未知，读取在后台线程中进行
+        assert tracker.get_version(mock_database_config) is None
+        assert tracker.get_version(mock_database_config, "boua") is None
+
+        release.set()
+        assert loaded.wait(5)
+        tracker._executor.shutdown(wait=True)
+        assert tracker.get_version(mock_database_config, "boua") == 5
+        # 同一数据库同时只有一个读取任务，且不在调用方线程中
+        assert len(threads) == 1
+        assert threads[0] is not threading.current_thread()
+
+    def test_wait_loads_synchronously(self, make_tracker, mock_database_config):
+        tracker = make_tracker(lambda config: {"boua": 5, "hyda": 9})
+        assert tracker.get_version(mock_database_config, wait=True) == 9
+        assert tracker.get_version(mock_database_config, "boua") == 5
+        # 没有版本记录的表使用全库最新版本
+        assert tracker.get_version(mock_database_config, "resa") == 9
+
+    def test_missing_table_is_version_zero(self, make_tracker, mock_database_config):
+        tracker = make_tracker(lambda config: {})
+        assert tracker.get_version(mock_database_config, "boua", wait=True) == 0
+
+    def test_refresh_reports_changed_versions(self, make_tracker, mock_database_config):
+        versions = [{"boua": 1}, {"boua": 1}, {"boua": 2}]
+        tracker = make_tracker(lambda config: versions.pop(0))
+        changed = []
+        tracker.add_callback(changed.append)
+
+        tracker.refresh(mock_database_config)
+        tracker.refresh(mock_database_config)
+        assert changed == []
+        tracker.refresh(mock_database_config)
+        assert changed == [mock_database_config]
+        assert tracker.get_version(mock_database_config, "boua") == 2
+
+    def test_failed_refresh_keeps_previous_snapshot(
+        self, make_tracker, mock_database_config
+    ):
+        results = [{"boua": 3}, RuntimeError("连接失败")]
+
+        def load(config):
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        tracker = make_tracker(load)
+        tracker.refresh(mock_database_config)
+        tracker.refresh(mock_database_config)
+        assert tracker.get_version(mock_database_config, "boua") == 3
@@ -0,0 +1,104 @@
+"""
+磁盘缓存测试：跨进程重启命中、过期和容量淘汰、查询历史
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from core.cache_manager import CacheManager
+from core.disk_cache import DiskCache
+
+
+@pytest.fixture
+def disk(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    yield cache
+    cache.close()
+
+
+class TestDiskCache:
+    def test_entries_survive_reopen(self, tmp_path, disk):
+        disk.set("list_tables:v3:abc", b"payload", time.time() + 60)
+        disk.close()
+
+        reopened = DiskCache(str(tmp_path))
+        assert reopened.get("list_tables:v3:abc") == b"payload"
+        assert reopened.get("list_tables:v4:abc") is None
+        reopened.close()
+
+    def test_expired_entries_are_not_returned(self, disk):
+        disk.set("old", b"x", time.time() - 1)
+        disk.set("new", b"y", time.time() + 60)
+
+        assert disk.get("old") is None
+        assert disk.purge_expired() == 1
+        assert disk.get_stats()["entries"] == 1
+
+    def test_evicts_earliest_expiring_entries(self, disk):
+        now = time.time()
+        disk.set("soon", b"a" * 400, now + 10)
+        disk.set("later", b"b" * 400, now + 100)
+        disk.set("latest", b"c" * 400, now + 1000)
+
+        assert disk.get("soon") is None
+        assert disk.get("latest") is not None
+        stats = disk.get_stats()
+        assert stats["bytes"] <= 1000
+        assert stats["evictions"] == 1
+
+        disk.set("huge", b"x" * 2000, now + 10)
+        assert disk.get("huge") is None
+
+    def test_clear_by_prefix(self, disk):
+        expires = time.time() + 60
+        for key in ("verify_data:v1:a", "verify_data:v2:b", "list_tables:v1:a"):
+            disk.set(key, b"x", expires)
+        disk.clear("verify_data")
+        assert disk.get_stats()["entries"] == 1
+
+    def test_old_versioned_cache_file_is_replaced(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        conn = sqlite3.connect(str(path))
+        conn.executescript(
+            """
+            CREATE TABLE entries (key TEXT PRIMARY KEY, version INTEGER NOT NULL,
+                value BLOB NOT NULL, expires_at REAL NOT NULL, size INTEGER NOT NULL);
+            CREATE TABLE meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT INTO entries VALUES ('k', 0, x'00', 9999999999, 1);
+            """
+        )
+        conn.close()
+
+        cache = DiskCache(str(tmp_path))
+        assert cache.get("k") is None
+        cache.set("k", b"new", time.time() + 60)
+        assert cache.get("k") == b"new"
+        cache.close()
+
+    def test_statement_history_keeps_original_sql(self, disk):
+        for _ in range(3):
+            disk.record_statement("execute_sql", "SELECT 1", 0.5, key="select 1")
+        disk.record_statement("execute_sql", "SELECT 2", 0.1)
+
+        top = disk.top_statements("execute_sql")
+        assert top[0] == {"statement": "SELECT 1", "count": 3, "avg_time": 0.5}
+        assert [item["statement"] for item in top] == ["SELECT 1", "SELECT 2"]
+
+
+class TestCacheManagerDiskTier:
+    def test_persisted_values_hit_after_restart(self, tmp_path):
+        first = CacheManager(sweep_interval=0, disk_cache_dir=str(tmp_path))
+        first.set("list_tables:v1:a", {"tables": ["boua"]}, ttl=60, persist=True)
+        first.set("memory_only", 1, ttl=60)
+        first.close()
+
+        second = CacheManager(sweep_interval=0, disk_cache_dir=str(tmp_path))
+        assert second.get("list_tables:v1:a") == {"tables": ["boua"]}
+        assert second.get("memory_only") is None
+        assert second.get_stats()["disk_hits"] == 1
+        # 回填到内存后不再读取磁盘
+        assert second.get("list_tables:v1:a") == {"tables": ["boua"]}
+        assert second.get_stats()["disk_hits"] == 1
+        second.close()
@@ -0,0 +1,270 @@
+"""
+GDB导入器测试：读取/处理/写入流水线、几何修复和隔离
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+fiona = pytest.importorskip("fiona")
+
+import shapely  # noqa: E402
+
+from core.gdb_importer import (  # noqa: E402
+    QUARANTINE_TABLE,
+    GDBImporter,
+    _extract_same_dimension,
+    convert_features,
+)
+from core.import_profiler import NULL_PROFILER  # noqa: E402
+
+PROF = NULL_PROFILER.layer("F49", "layer")
+
+COLUMNS = [("name", "NAME")]
+
+
+class RecordingWriter:
+    """记录写入内容的写入器（只实现流水线用到的接口）"""
+
+    def __init__(self, fail_after=None):
+        self.rows = []
+        self.rejects = []
+        self.closed = False
+        self.fail_after = fail_after
+        self.failed = 0
+        self.quarantined = 0
+        self.thread_names = set()
+
+    @property
+    def inserted(self):
+        return len(self.rows)
+
+    def add(self, rows, rejects=None):
+        self.thread_names.add(threading.current_thread().name)
+        if self.fail_after is not None and len(self.rows) >= self.fail_after:
+            raise RuntimeError("write failed")
+        self.rows.extend(rows)
+        self.rejects.extend(rejects or [])
+
+    def close(self):
+        self.closed = True
+
+
+def features(count):
+    """生成点要素"""
+    for i in range(count):
+        yield {
+            "geometry": {"type": "Point", "coordinates": (i, i)},
+            "properties": {"NAME": f"n{i}"},
+        }
+
+
+def run(importer, src, writer, executor=None, batch_size=10):
+    return importer._run_pipeline(
+        src, writer, COLUMNS, "F49", batch_size, True, PROF, executor
+    )
+
+
+class TestImportPipeline:
+    def test_rows_arrive_in_order_and_writer_is_closed(self):
+        importer = GDBImporter({}, pipeline=True, queue_size=1)
+        writer = RecordingWriter()
+        stats = run(importer, features(95), writer)
+
+        assert [row[2] for row in writer.rows] == [f"n{i}" for i in range(95)]
+        assert writer.rows[0][:2] == ("POINT (0 0)", "F49")
+        assert writer.closed
+        assert writer.thread_names == {"gdb-import-writer"}
+        assert stats["processed"] == 95
+        assert stats["count"] == 95
+
+    def test_matches_serial_import_with_worker_pool(self):
+        importer = GDBImporter({}, pipeline=True, pipeline_workers=2)
+        serial = RecordingWriter()
+        importer._run_serial(list(features(57)), serial, COLUMNS, "F49", 8, True, PROF)
+
+        pipelined = RecordingWriter()
+        with ThreadPoolExecutor(2) as executor:
+            run(importer, features(57), pipelined, executor, batch_size=8)
+
+        assert pipelined.rows == serial.rows
+
+    def test_reader_error_stops_pipeline(self):
+        def broken():
+            yield from features(25)
+            raise OSError("read failed")
+
+        importer = GDBImporter({}, pipeline=True, queue_size=1)
+        writer = RecordingWriter()
+        with pytest.raises(OSError, match="read failed"):
+            run(importer, broken(), writer)
+        # 出错时不提交剩余数据
+        assert not writer.closed
+
+    def test_writer_error_stops_reader(self):
+        consumed = []
+
+        def source():
+            for feature in features(10000):
+                consumed.append(feature)
+                yield feature
+
+        importer = GDBImporter({}, pipeline=True, queue_size=1)
+        writer = RecordingWriter(fail_after=20)
+        with pytest.raises(RuntimeError, match="write failed"):
+            run(importer, source(), writer)
+        # 有界队列使读取线程在写入失败后很快停止，而不是读完整个图层
+        assert len(consumed) < 200
+        assert not writer.closed
+
+
+BOW_TIE = {"type": "Polygon", "coordinates": [[(0, 0), (2, 2), (2, 0), (0, 2), (0, 0)]]}
+# 三点共线，修复后只剩线，无法保持面类型
+FLAT = {"type": "Polygon", "coordinates": [[(0, 0), (1, 1), (2, 2), (0, 0)]]}
+SQUARE = {"type": "Polygon", "coordinates": [[(0, 0), (1, 0), (1, 1), (0, 0)]]}
+
+
+class TestGeometryRepair:
+    def test_make_valid_repairs_and_keeps_polygon_type(self):
+        records = [
+            (BOW_TIE, {"NAME": "bow"}),
+            (SQUARE, {"NAME": "ok"}),
+            (None, {"NAME": "no geometry"}),
+        ]
+        rows, rejects, timings = convert_features(records, COLUMNS, "F49", True)
+
+        assert rejects == []
+        assert [row[2] for row in rows] == ["bow", "ok"]
+        repaired = shapely.from_wkt(rows[0][0])
+        assert repaired.geom_type == "MultiPolygon"
+        assert repaired.is_valid
+        assert repaired.area == pytest.approx(2.0)
+        assert timings["repair"][1] == 1
+
+    def test_unrepairable_geometry_is_rejected_with_original_wkb(self):
+        records = [(FLAT, {"NAME": "flat"}), ({"type": "Bogus"}, {"NAME": "bad"})]
+        rows, rejects, _ = convert_features(records, COLUMNS, "F49", True)
+
+        assert rows == []
+        parse_error, repair_error = rejects
+        assert parse_error["wkb"] is None
+        assert parse_error["properties"] == {"NAME": "bad"}
+        assert repair_error["reason"].startswith("几何修复失败")
+        assert shapely.from_wkb(repair_error["wkb"]).equals(
+            shapely.geometry.shape(FLAT)
+        )
+
+    def test_invalid_geometry_rejected_when_repair_disabled(self):
+        rows, rejects, _ = convert_features(
+            [(BOW_TIE, {"NAME": "bow"})], COLUMNS, "F49", False
+        )
+        assert rows == []
+        assert rejects[0]["reason"].startswith("Self-intersection")
+
+    def test_extract_same_dimension(self):
+        polygon = shapely.from_wkt("POLYGON ((0 0, 1 0, 1 1, 0 0))")
+        collection = shapely.from_wkt(
+            "GEOMETRYCOLLECTION (POLYGON ((0 0, 1 0, 1 1, 0 0)), LINESTRING (5 5, 6 6))"
+        )
+        assert _extract_same_dimension(polygon, collection).equals(polygon)
+        assert (
+            _extract_same_dimension(polygon, shapely.from_wkt("LINESTRING (0 0, 1 1)"))
+            is None
+        )
+        multi = shapely.from_wkt("MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)))")
+        assert _extract_same_dimension(multi, polygon).geom_type == "MultiPolygon"
+
+
+class LayerCursor:
+    """模拟导入单个图层时使用的游标"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.log.append(" ".join(sql.split()))
+
+    def executemany(self, sql, rows):
+        self.conn.log.append(" ".join(sql.split()))
+
+    def fetchall(self):
+        return [("id",), ("geom",), ("tile_code",), ("name",)]
+
+
+class LayerConnection:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return LayerCursor(self)
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+
+@pytest.fixture
+def gdb_path(tmp_path):
+    """创建包含可修复和无法修复几何的FileGDB"""
+    path = str(tmp_path / "F49.gdb")
+    schema = {"geometry": "Polygon", "properties": {"NAME": "str"}}
+    with fiona.open(
+        path, "w", driver="OpenFileGDB", schema=schema, layer="BOUA", crs="EPSG:4326"
+    ) as dst:
+        for name, geometry in (("bow", BOW_TIE), ("ok", SQUARE), ("flat", FLAT)):
+            dst.write({"geometry": geometry, "properties": {"NAME": name}})
+    return path
+
+
+class TestQuarantine:
+    def import_layer(self, gdb_path, monkeypatch, clear_quarantine):
+        importer = GDBImporter({}, adaptive_batch=False)
+        importer._quarantine_enabled = True
+        monkeypatch.setattr(importer, "_create_table_if_not_exists", lambda *args: True)
+        conn = LayerConnection()
+        stats = importer._import_layer(
+            gdb_path,
+            "BOUA",
+            "boua",
+            "F49",
+            conn,
+            4326,
+            100,
+            True,
+            False,
+            clear_quarantine=clear_quarantine,
+        )
+        return stats, conn.log
+
+    def test_rejects_are_quarantined_with_layer_data(self, gdb_path, monkeypatch):
+        stats, log = self.import_layer(gdb_path, monkeypatch, False)
+
+        assert stats["count"] == 2
+        assert stats["repaired"] == 1
+        assert stats["quarantined"] == 1
+        assert not any(sql.startswith("DELETE") for sql in log)
+        quarantine = log.index(
+            next(sql for sql in log if f"INSERT INTO public.{QUARANTINE_TABLE}" in sql)
+        )
+        assert quarantine < log.index("COMMIT")
+
+    def test_reimport_clears_old_quarantine_in_same_transaction(
+        self, gdb_path, monkeypatch
+    ):
+        _, log = self.import_layer(gdb_path, monkeypatch, True)
+
+        delete = log.index(
+            f"DELETE FROM public.{QUARANTINE_TABLE} "
+            "WHERE table_name = %s AND tile_code = %s"
+        )
+        # 删除旧记录与本次导入的数据在同一事务中提交
+        assert delete < log.index("SAVEPOINT import_batch") < log.index("COMMIT")
@@ -0,0 +1,55 @@
+"""
+导入剖析器测试：阶段累计、按图幅/图层汇总、Chrome Trace导出
+"""
+
+import json
+
+from core.import_profiler import NULL_PROFILER, ImportProfiler
+
+
+class TestImportProfiler:
+    def test_stages_accumulate_per_layer(self):
+        profiler = ImportProfiler()
+        layer = profiler.layer("F49", "BOUA")
+        for _ in range(3):
+            with layer.stage("write"):
+                pass
+        layer.add("read", 0.5, count=10)
+        profiler.layer("F50", "BOUA").add("read", 0.25)
+
+        result = profiler.to_dict()
+        assert result["stages"]["write"]["count"] == 3
+        assert result["stages"]["read"] == {"total_seconds": 0.75, "count": 11}
+        assert result["sheets"]["F49"]["BOUA"]["read"]["count"] == 10
+        assert result["sheets"]["F50"]["BOUA"]["read"]["total_seconds"] == 0.25
+        # 未配置trace_path时不记录逐次事件
+        assert result["trace_events"] == 0
+
+    def test_disabled_profiler_records_nothing(self):
+        layer = NULL_PROFILER.layer("F49", "BOUA")
+        with layer.stage("write"):
+            pass
+        layer.add("read", 1.0)
+
+        result = NULL_PROFILER.to_dict()
+        assert result["enabled"] is False
+        assert result["stages"] == {}
+        assert NULL_PROFILER.dump_chrome_trace() is None
+
+    def test_chrome_trace_export(self, tmp_path):
+        path = tmp_path / "trace" / "import.json"
+        profiler = ImportProfiler(trace_path=str(path), max_trace_events=2)
+        layer = profiler.layer("F49", "HYDA")
+        for name in ("read", "write", "commit"):
+            with layer.stage(name):
+                pass
+
+        assert profiler.dump_chrome_trace() == str(path)
+        events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+        assert [event["name"] for event in events] == ["read", "write"]
+        assert events[0]["cat"] == "F49/HYDA"
+        assert events[0]["ph"] == "X"
+        # 超出上限的事件只计数，阶段统计仍然完整
+        result = profiler.to_dict()
+        assert result["dropped_trace_events"] == 1
+        assert result["stages"]["commit"]["count"] == 1
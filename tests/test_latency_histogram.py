@@ -0,0 +1,83 @@
+"""
+延迟直方图测试：分桶、分位数、时间窗口
+"""
+
+import pytest
+
+from core.latency_histogram import (
+    SLOT_SECONDS,
+    LatencyHistogram,
+    bucket_bounds,
+    bucket_index,
+)
+
+
+class TestBuckets:
+    @pytest.mark.parametrize("seconds", [0.0, 0.000005, 0.001, 0.0123, 0.5, 3.7, 120.0])
+    def test_value_falls_in_its_bucket(self, seconds):
+        lower, upper = bucket_bounds(bucket_index(seconds))
+        micros = int(seconds * 1_000_000) / 1_000_000
+        assert lower <= micros < upper
+
+    def test_relative_error_is_bounded(self):
+        for seconds in (0.001, 0.05, 1.0, 30.0):
+            lower, upper = bucket_bounds(bucket_index(seconds))
+            assert (upper - lower) / lower <= 1 / 16
+
+
+class TestLatencyHistogram:
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        now = histogram.created_at + 100
+        # 1ms到100ms各一次
+        for ms in range(1, 101):
+            histogram.record(ms / 1000, now=now)
+
+        stats = histogram.window(60, now=now)
+        assert stats["count"] == 100
+        assert stats["p50"] == pytest.approx(0.050, rel=0.07)
+        assert stats["p90"] == pytest.approx(0.090, rel=0.07)
+        assert stats["p99"] == pytest.approx(0.099, rel=0.07)
+        assert stats["max"] == pytest.approx(0.1)
+
+    def test_percentile_never_exceeds_max(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0123)
+        summary = histogram.summary()
+        assert summary["p99"] <= summary["max"]
+
+    def test_error_rate(self):
+        histogram = LatencyHistogram()
+        now = histogram.created_at + 10
+        for index in range(10):
+            histogram.record(0.01, success=index >= 2, now=now)
+        stats = histogram.window(60, now=now)
+        assert stats["errors"] == 2
+        assert stats["error_rate"] == pytest.approx(0.2)
+
+    def test_old_calls_leave_the_window(self):
+        histogram = LatencyHistogram()
+        start = histogram.created_at
+        histogram.record(1.0, now=start)
+        histogram.record(0.01, now=start + 120)
+
+        recent = histogram.window(60, now=start + 120)
+        assert recent["count"] == 1
+        assert recent["max"] == pytest.approx(0.01)
+        assert histogram.window(300, now=start + 120)["count"] == 2
+        assert histogram.count == 2
+
+    def test_out_of_order_record_keeps_newer_slot(self):
+        histogram = LatencyHistogram()
+        now = histogram.created_at + 3600 + SLOT_SECONDS
+        histogram.record(0.01, now=now)
+        # 同一位置上一小时前的时间片：只计入累计直方图
+        histogram.record(0.5, now=now - 3600)
+        assert histogram.window(60, now=now)["count"] == 1
+        assert histogram.count == 2
+
+    def test_cumulative_buckets(self):
+        histogram = LatencyHistogram()
+        for seconds in (0.001, 0.02, 0.2, 2.0):
+            histogram.record(seconds)
+        assert histogram.cumulative_buckets((0.01, 0.1, 1.0, 10.0)) == [1, 2, 3, 4]
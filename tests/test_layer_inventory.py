@@ -0,0 +1,118 @@
+"""
+图层清单测试：一次读取各图层元数据、规划导入顺序、清单缓存
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+fiona = pytest.importorskip("fiona")
+
+from core import layer_inventory  # noqa: E402
+from core.layer_inventory import (  # noqa: E402
+    build_layer_inventory,
+    inventory_cache_name,
+    load_layer_inventory,
+    plan_layers,
+)
+
+SCHEMA = {"geometry": "Point", "properties": {"NAME": "str"}}
+
+
+def write_gdb(path, layers):
+    """创建FileGDB，layers为 {图层名: 要素数}"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for name, count in layers.items():
+        with fiona.open(
+            str(path), "w", driver="OpenFileGDB", schema=SCHEMA, layer=name
+        ) as dst:
+            for i in range(count):
+                dst.write(
+                    {
+                        "geometry": {"type": "Point", "coordinates": (i, i + 1)},
+                        "properties": {"NAME": f"n{i}"},
+                    }
+                )
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_inventory():
+    layer_inventory._memory_inventory.clear()
+    yield
+    layer_inventory._memory_inventory.clear()
+
+
+class TestLayerInventory:
+    def test_reads_counts_schema_and_bounds(self, tmp_path):
+        gdb = write_gdb(tmp_path / "F49.gdb", {"BOUA": 3, "EMPTY": 0})
+        layers = {e["name"]: e for e in build_layer_inventory(gdb)["layers"]}
+
+        assert layers["BOUA"]["feature_count"] == 3
+        assert layers["BOUA"]["geometry_type"] == "Point"
+        assert "NAME" in layers["BOUA"]["properties"]
+        assert layers["BOUA"]["bounds"] == [0.0, 1.0, 2.0, 3.0]
+        assert layers["EMPTY"]["feature_count"] == 0
+        assert layers["EMPTY"]["bounds"] is None
+
+    def test_plan_orders_largest_first_and_skips_empty(self):
+        inventory = {
+            "layers": [
+                {"name": "small", "feature_count": 2},
+                {"name": "unknown", "feature_count": None},
+                {"name": "empty", "feature_count": 0},
+                {"name": "large", "feature_count": 50},
+            ]
+        }
+        to_import, empty = plan_layers(inventory)
+        assert [e["name"] for e in to_import] == ["large", "small", "unknown"]
+        assert [e["name"] for e in empty] == ["empty"]
+
+    def test_disk_cache_reused_until_gdb_changes(self, tmp_path, monkeypatch):
+        gdb = write_gdb(tmp_path / "F49.gdb", {"BOUA": 2})
+        cache_dir = tmp_path / "cache"
+        assert load_layer_inventory(gdb, str(cache_dir))["cached"] is False
+        assert (cache_dir / inventory_cache_name(gdb)).exists()
+
+        # 进程重启后从磁盘读取，不再打开GDB
+        layer_inventory._memory_inventory.clear()
+        monkeypatch.setattr(
+            layer_inventory,
+            "build_layer_inventory",
+            lambda path: pytest.fail("GDB should not be reopened"),
+        )
+        cached = load_layer_inventory(gdb, str(cache_dir))
+        assert cached["cached"] is True
+        assert cached["layers"][0]["feature_count"] == 2
+        monkeypatch.undo()
+
+        write_gdb(tmp_path / "F49.gdb", {"HYDA": 1})
+        refreshed = load_layer_inventory(gdb, str(cache_dir))
+        assert refreshed["cached"] is False
+        assert {e["name"] for e in refreshed["layers"]} == {"BOUA", "HYDA"}
+
+    def test_cache_names_differ_for_same_named_gdbs(self, tmp_path):
+        first = write_gdb(tmp_path / "a" / "F49.gdb", {"BOUA": 1})
+        second = write_gdb(tmp_path / "b" / "F49.gdb", {"BOUA": 1})
+        assert inventory_cache_name(first) != inventory_cache_name(second)
+        assert inventory_cache_name(first).startswith("F49.gdb-")
+
+    def test_ogr_exceptions_are_scoped(self, monkeypatch):
+        state = {"enabled": False}
+        fake_ogr = SimpleNamespace(
+            GetUseExceptions=lambda: state["enabled"],
+            UseExceptions=lambda: state.update(enabled=True),
+            DontUseExceptions=lambda: state.update(enabled=False),
+        )
+        monkeypatch.setattr(layer_inventory, "ogr", fake_ogr, raising=False)
+
+        with pytest.raises(RuntimeError):
+            with layer_inventory._ogr_exceptions():
+                assert state["enabled"]
+                raise RuntimeError("open failed")
+        assert state["enabled"] is False
+
+        state["enabled"] = True
+        with layer_inventory._ogr_exceptions():
+            pass
+        assert state["enabled"] is True
@@ -0,0 +1,106 @@
+"""
+指标导出测试：Prometheus/OpenMetrics格式、指标文件、HTTP端点、按配置启动
+"""
+
+import os
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.metrics_exporter import (
+    MetricsExporter,
+    PROMETHEUS_CONTENT_TYPE,
+    start_metrics_exporter,
+)
+
+
+@pytest.fixture
+def exporter(monitor):
+    monitor.record_query("query_data", 0.02)
+    monitor.record_query("query_data", 2.0, success=False)
+    monitor.record_import(1000, 2.0)
+    exporter = MetricsExporter()
+    yield exporter
+    exporter.close()
+
+
+class TestRender:
+    def test_prometheus_format(self, exporter):
+        lines = exporter.render().splitlines()
+
+        assert "# TYPE geodata_tool_duration_seconds histogram" in lines
+        assert (
+            'geodata_tool_duration_seconds_bucket{tool="query_data",le="0.025"} 1'
+            in lines
+        )
+        assert (
+            'geodata_tool_duration_seconds_bucket{tool="query_data",le="+Inf"} 2'
+            in lines
+        )
+        assert 'geodata_tool_duration_seconds_count{tool="query_data"} 2' in lines
+        # 计数器的名称包含_total后缀
+        assert "# TYPE geodata_tool_errors_total counter" in lines
+        assert 'geodata_tool_errors_total{tool="query_data"} 1' in lines
+        assert 'geodata_slow_queries_total{tool="query_data"} 1' in lines
+        assert "geodata_imports_total 1" in lines
+        assert "geodata_import_rows_per_second 500.0" in lines
+        assert "# EOF" not in lines
+
+    def test_openmetrics_format(self, exporter):
+        text = exporter.render(openmetrics=True)
+        assert "# TYPE geodata_tool_errors counter\n" in text
+        assert 'geodata_tool_errors_total{tool="query_data"} 1\n' in text
+        assert text.endswith("# EOF\n")
+
+    def test_label_values_are_escaped(self, monitor):
+        monitor.record_query('say "hi"\\', 0.01)
+        text = MetricsExporter().render()
+        assert 'tool="say \\"hi\\"\\\\"' in text
+
+
+class TestOutputs:
+    def test_write_textfile(self, exporter, tmp_path):
+        path = tmp_path / "geodata.prom"
+        exporter.write_textfile(str(path))
+        assert path.read_text(encoding="utf-8") == exporter.render()
+        assert os.listdir(tmp_path) == ["geodata.prom"]
+
+    def test_http_endpoint(self, exporter):
+        exporter.start_http_server(0)
+        url = f"http://127.0.0.1:{exporter._server.server_port}"
+
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+            assert b"geodata_tool_duration_seconds_count" in response.read()
+        request = urllib.request.Request(
+            f"{url}/metrics", headers={"Accept": "application/openmetrics-text"}
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.read().endswith(b"# EOF\n")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+        assert error.value.code == 404
+
+
+class TestStartMetricsExporter:
+    def test_not_started_without_config(self, monitor):
+        assert start_metrics_exporter(None, {}) is None
+        assert start_metrics_exporter(None, {"port": None, "textfile": ""}) is None
+
+    def test_textfile_writer(self, monitor, tmp_path):
+        path = tmp_path / "geodata.prom"
+        exporter = start_metrics_exporter(
+            None, {"textfile": str(path), "textfile_interval": 60}
+        )
+        try:
+            # 启动后立即写入第一次
+            deadline = time.monotonic() + 5
+            while not path.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert "geodata_imports_total" in path.read_text(encoding="utf-8")
+        finally:
+            exporter.close()
+        exporter._writer.join(timeout=5)
+        assert not exporter._writer.is_alive()
@@ -0,0 +1,74 @@
+"""
+性能监控测试：查询统计、常用语句、多线程记录和读取
+"""
+
+import threading
+
+from core.performance_monitor import PerformanceMonitor
+
+
+class TestPerformanceMonitor:
+    def test_record_query(self):
+        monitor = PerformanceMonitor(slow_query_threshold=1.0)
+        monitor.record_query("query_data", 0.5)
+        monitor.record_query("query_data", 2.0, success=False, detail="boua")
+
+        stats = monitor.get_stats("query_data")["query_data"]
+        assert stats["count"] == 2
+        assert stats["slow_queries"] == 1
+        assert stats["errors"] == 1
+        assert stats["avg_time"] == 1.25
+        assert monitor.get_slow_queries()[0]["detail"] == "boua"
+        assert (
+            monitor.get_latency_stats("query_data")["query_data"]["total"]["count"] == 2
+        )
+
+    def test_top_statements_and_eviction(self):
+        monitor = PerformanceMonitor(max_statements=2)
+        for sql, times in (("SELECT 1", 3), ("SELECT 2", 1)):
+            for _ in range(times):
+                monitor.record_statement("execute_sql", sql, 0.1)
+        # 淘汰执行次数最少的语句
+        monitor.record_statement("execute_sql", "SELECT 3", 0.1)
+
+        top = monitor.get_top_statements("execute_sql")
+        assert [item["statement"] for item in top] == ["SELECT 1", "SELECT 3"]
+        assert top[0]["count"] == 3
+
+    def test_concurrent_record_and_read(self):
+        monitor = PerformanceMonitor(max_statements=50)
+        stop = threading.Event()
+        errors = []
+
+        def writer(index):
+            for n in range(2000):
+                # 不同操作和语句不断加入，读取方遍历时字典大小在变化
+                monitor.record_query(f"op{n % 40}", 0.001)
+                monitor.record_statement("execute_sql", f"SELECT {index}, {n}", 0.001)
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    monitor.get_top_statements("execute_sql")
+                    monitor.get_stats()
+                    monitor.get_latency_stats()
+                    monitor.get_latency_buckets((0.01, 0.1))
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        writers = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        assert errors == []
+        stats = monitor.get_stats()
+        assert sum(s["count"] for s in stats.values()) == 8000
+        assert sum(s["count"] for s in monitor.get_latency_buckets(()).values()) == 8000
+        assert len(monitor.statement_stats) <= 50
@@ -0,0 +1,163 @@
+"""
+预编译语句缓存测试：执行满次数后PREPARE、语句已存在时恢复、启动语句预编译
+"""
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from core import prepared_statements
+from core.prepared_statements import PreparedStatementCache, register_startup_statement
+
+SQL = "SELECT name FROM boua WHERE id = %s"
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        if sql.startswith("PREPARE") and self.connection.prepare_errors:
+            raise self.connection.prepare_errors.pop(0)
+
+
+class FakeConnection:
+    """记录执行的语句，不访问数据库"""
+
+    autocommit = False
+
+    def __init__(self):
+        self.info = FakeInfo()
+        self.executed = []
+        self.prepare_errors = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.executed.append("ROLLBACK")
+
+
+@pytest.fixture(autouse=True)
+def startup_templates(monkeypatch):
+    """测试使用独立的启动语句列表（不包含各模块登记的语句）"""
+    templates = []
+    monkeypatch.setattr(prepared_statements, "_startup_templates", templates)
+    return templates
+
+
+class TestPreparedStatementCache:
+    def test_prepares_after_repeated_use(self):
+        statements = PreparedStatementCache(prepare_after=3)
+        conn = FakeConnection()
+        for _ in range(4):
+            statements.execute(conn.cursor(), SQL, (1,))
+
+        name = statements._template(SQL)[0]
+        assert conn.executed == [
+            SQL,
+            SQL,
+            f"PREPARE {name} AS SELECT name FROM boua WHERE id = $1",
+            f"EXECUTE {name}(%s)",
+            f"EXECUTE {name}(%s)",
+        ]
+        stats = statements.get_stats()
+        assert (stats["direct"], stats["misses"], stats["hits"]) == (2, 1, 1)
+
+    def test_each_connection_prepares_once(self):
+        statements = PreparedStatementCache(prepare_after=1)
+        first, second = FakeConnection(), FakeConnection()
+        for conn in (first, second, first):
+            statements.execute(conn.cursor(), SQL, (1,))
+
+        prepares = [s for s in first.executed + second.executed if "PREPARE" in s]
+        assert len(prepares) == 2
+        assert statements.get_stats()["connections"] == 2
+
+    def test_setup_is_sent_with_query(self):
+        statements = PreparedStatementCache(prepare_after=1)
+        conn = FakeConnection()
+        statements.execute(
+            conn.cursor(), SQL, (1,), setup="SET LOCAL statement_timeout = 1000;"
+        )
+
+        name = statements._template(SQL)[0]
+        assert conn.executed[-1] == (
+            f"SET LOCAL statement_timeout = 1000; EXECUTE {name}(%s)"
+        )
+
+    def test_existing_statement_is_reused(self):
+        statements = PreparedStatementCache(prepare_after=1)
+        conn = FakeConnection()
+        # 连接上已有同名语句（记录与连接不一致，如连接池外PREPARE过）
+        conn.prepare_errors.append(psycopg2.errors.DuplicatePreparedStatement())
+        statements.execute(conn.cursor(), SQL, (1,))
+        statements.execute(conn.cursor(), SQL, (2,))
+
+        name = statements._template(SQL)[0]
+        assert conn.executed[1:] == [
+            "ROLLBACK",
+            f"EXECUTE {name}(%s)",
+            f"EXECUTE {name}(%s)",
+        ]
+        stats = statements.get_stats()
+        assert stats["errors"] == 1
+        assert stats["hits"] == 1
+
+    def test_other_prepare_errors_are_raised(self):
+        statements = PreparedStatementCache(prepare_after=1)
+        conn = FakeConnection()
+        conn.prepare_errors.append(psycopg2.errors.UndefinedTable())
+        with pytest.raises(psycopg2.errors.UndefinedTable):
+            statements.execute(conn.cursor(), SQL, (1,))
+
+    def test_least_recently_used_statement_is_deallocated(self):
+        statements = PreparedStatementCache(prepare_after=1, max_per_connection=1)
+        conn = FakeConnection()
+        other = "SELECT name FROM hyda WHERE id = %s"
+        statements.execute(conn.cursor(), SQL, (1,))
+        statements.execute(conn.cursor(), other, (1,))
+
+        assert f"DEALLOCATE {statements._template(SQL)[0]}" in conn.executed
+        assert statements.get_stats()["evictions"] == 1
+
+    def test_disabled_cache_executes_directly(self):
+        statements = PreparedStatementCache(enabled=False, prepare_after=1)
+        conn = FakeConnection()
+        statements.execute(conn.cursor(), SQL, (1,))
+        assert conn.executed == [SQL]
+
+
+class TestStartupStatements:
+    def test_startup_statement_is_prepared_on_first_use(self, startup_templates):
+        assert register_startup_statement(SQL) == SQL
+        register_startup_statement(SQL)
+        assert startup_templates == [SQL]
+
+        statements = PreparedStatementCache(prepare_after=10)
+        conn = FakeConnection()
+        statements.execute(conn.cursor(), SQL, (1,))
+        assert conn.executed[0].startswith("PREPARE")
+
+    def test_prepare_startup_on_new_connection(self, startup_templates):
+        register_startup_statement(SQL)
+        statements = PreparedStatementCache()
+        conn = FakeConnection()
+
+        assert statements.prepare_startup(conn) == 1
+        assert statements.prepare_startup(conn) == 0
+        assert conn.executed[-1] == "ROLLBACK"
+
+        statements.execute(conn.cursor(), SQL, (1,))
+        assert statements.get_stats()["hits"] == 1
@@ -0,0 +1,127 @@
+"""
+查询结果缓存测试：SQL规范化、可缓存判断、结果缓存
+"""
+
+import asyncio
+
+import pytest
+
+from core.cache_manager import CacheManager
+from core.query_cache import QueryResultCache, is_cacheable_sql, normalize_sql
+
+
+class TestNormalizeSql:
+    def test_whitespace_case_and_comments(self):
+        assert (
+            normalize_sql("SELECT  *\n FROM Boua -- 注释\n WHERE /* x */ id = 1;")
+            == "select * from boua where id = 1"
+        )
+
+    def test_string_literals_keep_case(self):
+        assert normalize_sql("SELECT 'Foo  Bar' FROM t") == "select 'Foo  Bar' from t"
+        assert normalize_sql("SELECT 'It''s' FROM t") == "select 'It''s' from t"
+
+    def test_quoted_identifiers_keep_case(self):
+        assert normalize_sql('SELECT "Name" FROM T') == 'select "Name" from t'
+
+    def test_dollar_quoted_literals(self):
+        assert normalize_sql("SELECT $$Foo  Bar$$") == "select $$Foo  Bar$$"
+        assert (
+            normalize_sql("SELECT $tag$A 'x' $$ B$tag$ FROM T")
+            == "select $tag$A 'x' $$ B$tag$ from t"
+        )
+        assert normalize_sql("SELECT $$Foo$$") != normalize_sql("SELECT $$foo$$")
+
+    def test_escape_string_literals(self):
+        assert (
+            normalize_sql("SELECT E'It\\'s  A' FROM T") == "select E'It\\'s  A' from t"
+        )
+        assert normalize_sql("SELECT E'A'") != normalize_sql("SELECT E'a'")
+
+    def test_positional_parameters_are_not_dollar_quotes(self):
+        assert normalize_sql("SELECT $1, A FROM T") == "select $1, a from t"
+
+
+class TestCacheableSql:
+    def test_volatile_functions_are_not_cacheable(self):
+        assert not is_cacheable_sql(normalize_sql("SELECT now()"))
+        assert not is_cacheable_sql(normalize_sql("SELECT * FROM t ORDER BY random()"))
+        assert is_cacheable_sql(normalize_sql("SELECT * FROM boua LIMIT 10"))
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM pg_stat_activity",
+            "SELECT relname, reltuples FROM pg_class",
+            "SELECT * FROM PG_CATALOG.PG_LOCKS",
+            "SELECT pg_backend_pid()",
+            "SELECT pg_is_in_recovery()",
+            "SELECT column_name FROM information_schema.columns",
+            "SELECT current_user",
+            "SELECT SESSION_USER",
+            "SELECT current_setting('statement_timeout')",
+            "SELECT inet_client_addr()",
+        ],
+    )
+    def test_session_and_catalog_queries_are_not_cacheable(self, sql):
+        assert not is_cacheable_sql(normalize_sql(sql))
+
+    def test_similar_column_names_stay_cacheable(self):
+        assert is_cacheable_sql(
+            normalize_sql(
+                "SELECT user_id, page_count FROM boua WHERE tile_code = 'F49'"
+            )
+        )
+
+
+@pytest.fixture
+def query_cache():
+    manager = CacheManager(use_redis=False, sweep_interval=0)
+    yield QueryResultCache(manager, ttl=60, max_entry_bytes=1000)
+    manager.close()
+
+
+class TestQueryResultCache:
+    def test_key_depends_on_version_and_database(
+        self, query_cache, mock_database_config
+    ):
+        key = query_cache.make_key(
+            "execute_sql", "select 1", database_config=mock_database_config
+        )
+        assert key != query_cache.make_key(
+            "execute_sql",
+            "select 1",
+            database_config=mock_database_config,
+            data_version=1,
+        )
+        assert key != query_cache.make_key(
+            "execute_sql",
+            "select 1",
+            database_config=dict(mock_database_config, database="other"),
+        )
+
+    def test_get_or_compute_caches_and_coalesces(self, query_cache):
+        calls = 0
+
+        async def run_query():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"rows": [[1]]}
+
+        async def run():
+            first = await asyncio.gather(
+                *(query_cache.get_or_compute("k", run_query) for _ in range(3))
+            )
+            return first, await query_cache.get_or_compute("k", run_query)
+
+        first, second = asyncio.run(run())
+        assert calls == 1
+        assert first[0] == {"rows": [[1]]}
+        assert second["cache_hit"] is True
+        assert query_cache.get_stats()["hits"] == 1
+
+    def test_oversized_results_are_not_cached(self, query_cache):
+        assert not query_cache.set("k", {"rows": ["x" * 5000]})
+        assert query_cache.get("k") is None
+        assert query_cache.get_stats()["oversized"] == 1
@@ -0,0 +1,164 @@
+"""
+只读副本路由测试：副本选择、排除和恢复、副本不可用或连接池已满时改用主库
+"""
+
+import asyncio
+
+import pytest
+from psycopg2 import extensions
+
+from core.connection_pool import (
+    ConnectionPool,
+    ConnectionPoolManager,
+    default_pool_settings,
+)
+from core.replica_router import ReplicaRouter
+
+PRIMARY = {"host": "primary", "port": 5432, "database": "test_db"}
+REPLICA = {"host": "replica", "port": 5432, "database": "test_db"}
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    """不访问数据库的连接，记录连接的主机"""
+
+    encoding = "UTF8"
+
+    def __init__(self, host):
+        self.host = host
+        self.closed = 0
+        self.info = FakeInfo()
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def router():
+    router = ReplicaRouter(
+        [dict(REPLICA, host="r1"), dict(REPLICA, host="r2")], check_interval=0
+    )
+    yield router
+    router.close()
+
+
+@pytest.fixture
+def down_hosts():
+    """无法连接的主机"""
+    return set()
+
+
+@pytest.fixture
+def manager(monkeypatch, down_hosts):
+    """使用假连接的连接池管理器（analytics连接池最多1个连接），主库配置一个副本"""
+
+    def connect(self):
+        host = self._connect_kwargs["host"]
+        if host in down_hosts:
+            raise OSError(f"无法连接 {host}")
+        return FakeConnection(host)
+
+    settings = default_pool_settings()
+    for values in settings.values():
+        values.update(max_lifetime=None, max_idle=None, ping_after=None)
+    settings["analytics"].update(minconn=0, maxconn=1, timeout=0.05)
+    monkeypatch.setattr(ConnectionPool, "_connect", connect)
+    monkeypatch.setattr(ConnectionPoolManager, "_settings", settings)
+    monkeypatch.setattr(ConnectionPoolManager, "_pools", {})
+    monkeypatch.setattr(ConnectionPoolManager, "_owners", {})
+    monkeypatch.setattr(ConnectionPoolManager, "_routers", {})
+    ConnectionPoolManager.set_replicas(PRIMARY, [REPLICA], check_interval=0)
+    yield ConnectionPoolManager
+    ConnectionPoolManager.close_all_pools()
+
+
+def replica_stats():
+    return ConnectionPoolManager.get_replica_stats()["primary:5432/test_db"]
+
+
+class TestReplicaRouter:
+    def test_least_outstanding_replica_is_chosen(self, router):
+        outstanding = {"r1": 3, "r2": 1}
+        chosen = router.choose(lambda config: outstanding[config["host"]])
+        assert chosen["host"] == "r2"
+
+    def test_ties_are_spread_round_robin(self, router):
+        hosts = [router.choose(lambda config: 0)["host"] for _ in range(4)]
+        assert hosts == ["r1", "r2", "r1", "r2"]
+
+    def test_failed_replica_is_excluded_until_retry(self, router):
+        router.mark_down(router.replicas[0].config, OSError("连接失败"))
+        assert router.choose(lambda config: 0)["host"] == "r2"
+        assert router.get_stats()["fallbacks"] == 1
+
+        router.replicas[0].down_until = 0.0  # retry_after已过
+        hosts = {router.choose(lambda config: 0)["host"] for _ in range(2)}
+        assert hosts == {"r1", "r2"}
+
+    def test_no_available_replica_falls_back_to_primary(self, router):
+        for replica in router.replicas:
+            replica.healthy = False  # 复制延迟超过上限
+        assert router.choose(lambda config: 0) is None
+        assert router.get_stats()["fallbacks"] == 1
+
+
+class TestReplicaFallback:
+    def test_read_only_connection_uses_replica(self, manager):
+        conn = manager.get_connection(PRIMARY, workload="analytics", read_only=True)
+        assert conn.host == "replica"
+        manager.put_connection(conn, PRIMARY)
+
+        # 导入始终使用主库
+        conn = manager.get_connection(PRIMARY, workload="import", read_only=True)
+        assert conn.host == "primary"
+        manager.put_connection(conn, PRIMARY)
+
+    def test_busy_replica_falls_back_without_exclusion(self, manager):
+        held = manager.get_connection(PRIMARY, workload="analytics", read_only=True)
+        assert held.host == "replica"
+
+        # 副本连接池已满，等待超时后本次改用主库
+        conn = manager.get_connection(PRIMARY, workload="analytics", read_only=True)
+        assert conn.host == "primary"
+        stats = replica_stats()
+        assert stats["fallbacks"] == 1
+        assert stats["replicas"][0]["available"]
+
+        manager.put_connection(conn, PRIMARY)
+        manager.put_connection(held, PRIMARY)
+        conn = manager.get_connection(PRIMARY, workload="analytics", read_only=True)
+        assert conn.host == "replica"
+        manager.put_connection(conn, PRIMARY)
+
+    def test_async_busy_replica_falls_back(self, manager):
+        async def run():
+            held = await manager.aget_connection(
+                PRIMARY, workload="analytics", read_only=True
+            )
+            conn = await manager.aget_connection(
+                PRIMARY, workload="analytics", read_only=True
+            )
+            manager.put_connection(conn, PRIMARY)
+            manager.put_connection(held, PRIMARY)
+            return held, conn
+
+        held, conn = asyncio.run(run())
+        assert (held.host, conn.host) == ("replica", "primary")
+        assert replica_stats()["fallbacks"] == 1
+
+    def test_unreachable_replica_is_excluded(self, manager, down_hosts):
+        down_hosts.add("replica")
+        conn = manager.get_connection(PRIMARY, workload="analytics", read_only=True)
+        assert conn.host == "primary"
+        manager.put_connection(conn, PRIMARY)
+
+        stats = replica_stats()
+        assert stats["fallbacks"] == 1
+        assert not stats["replicas"][0]["available"]
+        assert "无法连接" in stats["replicas"][0]["error"]
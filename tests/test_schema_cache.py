@@ -0,0 +1,88 @@
+"""
+表结构缓存测试：字段和几何类型解析、按需重新加载、失效
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.schema_cache import SchemaCache, TableSchema
+
+ROWS = [
+    (
+        "boua",
+        [
+            ["id", "integer"],
+            ["tile_code", "character varying(10)"],
+            ["geom", "geometry(MultiPolygon,4326)"],
+        ],
+        [["boua_geom_idx", "gist", ["geom"]]],
+    ),
+    ("hyda", [["geom", "geometry"]], None),
+]
+
+
+@pytest.fixture
+def connection():
+    """返回表结构查询结果的模拟连接"""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.side_effect = lambda: list(ROWS)
+    return conn
+
+
+class TestTableSchema:
+    def test_geometry_columns(self):
+        schema = TableSchema("boua", ROWS[0][1], ROWS[0][2])
+        assert schema.column_names == ["id", "tile_code", "geom"]
+        assert schema.geometry_columns == {
+            "geom": {"type": "MultiPolygon", "srid": 4326}
+        }
+        assert schema.indexes == [
+            {"name": "boua_geom_idx", "method": "gist", "columns": ["geom"]}
+        ]
+
+    def test_untyped_geometry(self):
+        schema = TableSchema("hyda", [["geom", "geometry"]], [])
+        assert schema.geometry_columns == {"geom": {"type": "geometry", "srid": None}}
+
+
+class TestSchemaCache:
+    def test_tables_are_loaded_once(self, connection, mock_database_config):
+        cache = SchemaCache()
+        assert cache.get_table(mock_database_config, "boua", connection).name == "boua"
+        assert cache.get_table(mock_database_config, "hyda", connection) is not None
+        assert sorted(cache.get_tables(mock_database_config, connection)) == [
+            "boua",
+            "hyda",
+        ]
+
+        # 首次查找未命中并加载所有表
+        stats = cache.get_stats()
+        assert (stats["loads"], stats["misses"], stats["hits"]) == (1, 1, 1)
+
+    def test_missing_table_reloads_after_interval(
+        self, connection, mock_database_config
+    ):
+        cache = SchemaCache(miss_reload_interval=0)
+        cache.get_tables(mock_database_config, connection)
+        assert cache.get_table(mock_database_config, "resa", connection) is None
+        assert cache.get_stats()["loads"] == 2
+
+        cache = SchemaCache(miss_reload_interval=60)
+        cache.get_tables(mock_database_config, connection)
+        assert cache.get_table(mock_database_config, "resa", connection) is None
+        assert cache.get_stats()["loads"] == 1
+
+    def test_invalidate(self, connection, mock_database_config):
+        cache = SchemaCache()
+        other = dict(mock_database_config, database="other_db")
+        cache.get_tables(mock_database_config, connection)
+        cache.get_tables(other, connection)
+
+        cache.invalidate(other)
+        assert cache.get_stats()["databases"] == 1
+        cache.invalidate()
+        assert cache.get_stats()["databases"] == 0
+        cache.get_table(mock_database_config, "boua", connection)
+        assert cache.get_stats()["loads"] == 3
@@ -0,0 +1,59 @@
+"""
+服务统计测试：统计项选择、未知统计项、单项失败不影响其他统计项
+"""
+
+import pytest
+
+from core.connection_pool import ConnectionPoolManager
+from core.data_importer import DataImporter
+from core.server_stats import SECTIONS, collect_server_stats
+
+
+class TestCollectServerStats:
+    def test_all_sections_by_default(self, monitor):
+        result = collect_server_stats()
+        assert list(result) == list(SECTIONS)
+        # 读取失败的统计项只有error字段
+        assert all(set(stats) != {"error"} for stats in result.values())
+
+    def test_selected_sections(self, monitor):
+        monitor.record_query("query_data", 0.01)
+        monitor.record_query("query_data", 2.0)
+        monitor.record_query("list_tables", 3.0)
+
+        result = collect_server_stats(
+            sections=["tools", "slow_queries"], slow_query_limit=1
+        )
+
+        assert list(result) == ["tools", "slow_queries"]
+        tools = result["tools"]
+        assert set(tools["query_data"]) == {"1m", "5m", "1h", "total", "slow_queries"}
+        assert tools["query_data"]["total"]["count"] == 2
+        assert tools["query_data"]["slow_queries"] == 1
+        assert result["slow_queries"]["threshold"] == 1.0
+        assert [s["operation"] for s in result["slow_queries"]["samples"]] == [
+            "list_tables"
+        ]
+
+    def test_unknown_section(self, monitor):
+        with pytest.raises(ValueError, match="未知的统计项: latency"):
+            collect_server_stats(sections=["tools", "latency"])
+
+    def test_failed_section_is_reported_in_place(self, monitor, monkeypatch):
+        def fail():
+            raise RuntimeError("副本统计不可用")
+
+        monkeypatch.setattr(ConnectionPoolManager, "get_replica_stats", fail)
+        monitor.record_import(100, 1.0)
+
+        result = collect_server_stats(sections=["replicas", "imports"])
+        assert result["replicas"] == {"error": "副本统计不可用"}
+        assert result["imports"]["rows"] == 100
+
+    def test_cache_summary(self, monitor):
+        importer = DataImporter(use_connection_pool=False, use_cache=False)
+        caches = collect_server_stats(importer, sections=["caches"])["caches"]
+
+        assert set(caches) == {"prepared_statement", "schema"}
+        # 各预编译语句的执行次数只在预编译语句统计中给出
+        assert "statements" not in caches["prepared_statement"]